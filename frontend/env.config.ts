@@ -3,9 +3,77 @@ export const config = {
   minimax: {
     apiKey: process.env.MINIMAX_API_KEY || '',
     groupId: process.env.MINIMAX_GROUP_ID || 'MiniMax-M2.1',
-    baseUrl: 'https://api.minimaxi.com/anthropic'
+    baseUrl: process.env.MINIMAX_BASE_URL || 'https://api.minimaxi.com/anthropic'
   },
   system: {
     projectsRoot: process.env.PROJECTS_ROOT || '../projects'
+  },
+  logging: {
+    // debug | info | warn | error | silent
+    level: process.env.LOG_LEVEL || 'info',
+    // 'pretty' (one readable line per record) or 'json' (one JSON object per line)
+    format: process.env.LOG_FORMAT || 'pretty',
+    // Optional file to append to instead of stdout
+    file: process.env.LOG_FILE || '',
+    // Records buffered between flushes; the oldest are dropped past this
+    bufferSize: Number(process.env.LOG_BUFFER_SIZE) || 4096,
+    flushMs: Number(process.env.LOG_FLUSH_MS) || 250,
+    // Log one in N of each high-frequency category, e.g. "chunk=100,heartbeat=10"
+    sampling: process.env.LOG_SAMPLE || 'chunk=100,heartbeat=10'
+  },
+  health: {
+    // Background checks behind /api/health; probes only read the cached results
+    intervalMs: Number(process.env.HEALTH_CHECK_INTERVAL_MS) || 30 * 1000,
+    timeoutMs: Number(process.env.HEALTH_CHECK_TIMEOUT_MS) || 10 * 1000,
+    // The MiniMax check is a real API call, so it runs far less often (HEALTH_MINIMAX_CHECK=0 disables it)
+    minimaxEnabled: !['0', 'false', 'no'].includes((process.env.HEALTH_MINIMAX_CHECK || '').toLowerCase()),
+    minimaxIntervalMs: Number(process.env.HEALTH_MINIMAX_INTERVAL_MS) || 5 * 60 * 1000
+  },
+  llmCache: {
+    // Opt-in replay of identical phase calls from disk (LLM_CACHE=1)
+    enabled: ['1', 'true', 'yes'].includes((process.env.LLM_CACHE || '').toLowerCase()),
+    dir: process.env.LLM_CACHE_DIR || '../.cache/llm',
+    maxBytes: Number(process.env.LLM_CACHE_MAX_BYTES) || 256 * 1024 * 1024,
+    // 'fast' replays hits back to back, 'recorded' with the original chunk timing
+    replay: process.env.LLM_CACHE_REPLAY || 'fast'
+  },
+  singleFlight: {
+    // Identical phase calls running at the same time share one upstream stream
+    enabled: !['0', 'false', 'no'].includes((process.env.GENERATION_SINGLE_FLIGHT || '').toLowerCase())
+  },
+  scheduler: {
+    // Generations running at once (the old Python backend used max_concurrent_users: 5);
+    // further requests queue up to maxQueued, at most maxPerClient per client (0 = no limit)
+    maxConcurrent: Number(process.env.GENERATION_MAX_CONCURRENT) || 5,
+    maxQueued: Number(process.env.GENERATION_MAX_QUEUED) || 50,
+    maxPerClient: Number(process.env.GENERATION_MAX_PER_CLIENT) || 0,
+    // Proxies in front of the server that append to x-forwarded-for; clients
+    // are told apart by that header only when this is set
+    trustedProxyHops: Number(process.env.TRUSTED_PROXY_HOPS) || 0
+  },
+  projectTree: {
+    // Parallel readdir/stat calls while building a project tree
+    concurrency: Number(process.env.PROJECT_TREE_CONCURRENCY) || 64,
+    // Cached trees are dropped on pipeline writes; the TTL catches changes made elsewhere
+    cacheTtlMs: Number(process.env.PROJECT_TREE_CACHE_TTL_MS) || 10 * 1000,
+    maxCachedProjects: Number(process.env.PROJECT_TREE_CACHE_SIZE) || 100
+  },
+  streaming: {
+    // File replay pacing after generation: 'none' (no added latency), 'fixed-rate' or 'frame-budget'
+    filePacing: process.env.FILE_PACING || 'none',
+    charsPerSecond: Number(process.env.FILE_PACING_CHARS_PER_SEC) || 2500,
+    frameMs: Number(process.env.FILE_PACING_FRAME_MS) || 16,
+    maxChunkChars: Number(process.env.FILE_PACING_MAX_CHUNK_CHARS) || 16384,
+    // frame-budget: how long a client may stay behind before pacing is given up
+    maxStallMs: Number(process.env.FILE_PACING_MAX_STALL_MS) || 5000,
+    // Per-project SSE event log for Last-Event-ID replay; set EVENT_LOG_DIR to spill it to disk
+    eventLogCapacity: Number(process.env.EVENT_LOG_CAPACITY) || 5000,
+    eventLogDir: process.env.EVENT_LOG_DIR || '',
+    eventLogRetentionMs: Number(process.env.EVENT_LOG_RETENTION_MS) || 10 * 60 * 1000,
+    // SSE backpressure: bytes buffered per stream before events queue (and
+    // content chunks coalesce), then limits before the oldest model chunks are dropped
+    highWaterMarkBytes: Number(process.env.SSE_HIGH_WATER_MARK) || 64 * 1024,
+    subscriberQueueLimit: Number(process.env.SSE_SUBSCRIBER_QUEUE_LIMIT) || 1000,
+    subscriberMaxQueuedBytes: Number(process.env.SSE_SUBSCRIBER_MAX_QUEUED_BYTES) || 8 * 1024 * 1024
   }
 };
\ No newline at end of file
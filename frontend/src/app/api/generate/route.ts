@@ -1,15 +1,24 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { randomUUID } from 'crypto';
 import fs from 'fs/promises';
+import { createWriteStream, WriteStream } from 'fs';
 import path from 'path';
 import { config } from '../../../../env.config';
 import { minimaxClient } from '../../../lib/minimax';
 import { generateUniversalPrompt, GenerationPhase } from '../../../lib/prompts';
 import { parseGeneratedCode, generateRequirementsTxt } from '../../../lib/parser';
-import { log } from '../../../lib/logger';
+import { log, logger } from '../../../lib/logger';
 import { ensureDirectory, writeFileAtomic, createProjectStructure, fileExists } from '../../../lib/fileSystem';
 import { DEFAULT_README, DEFAULT_REQUIREMENTS, DEFAULT_SPEC, DEFAULT_PLAN } from '../../../lib/templates';
-import { streams, activeGenerations } from '../../../lib/store';
+import { activeGenerations, waitForStream, getStreamDesiredSize, publishEvent, beginGenerationLog, endGenerationLog } from '../../../lib/store';
+import { getFilePacingOptions, paceFileContent } from '../../../lib/filePacing';
+import { StreamingCodeParser, StreamingParseEvent } from '../../../lib/streamingParser';
+import { generationScheduler } from '../../../lib/scheduler';
+import { cachedStream, cacheKey } from '../../../lib/llmCache';
+import { singleFlightStream } from '../../../lib/singleFlight';
+import { loadResumePoint, resetCheckpoints, saveCheckpoint } from '../../../lib/checkpoints';
+import { metrics } from '../../../lib/metrics';
+import { invalidateProjectTree, recordTreeChange, TreeChange, PARTIAL_FILE_SUFFIX } from '../../../lib/projectTree';
 
 // Configuration
 const MINIMAX_API_KEY = config.minimax.apiKey;
@@ -21,6 +30,10 @@ interface GenerateRequest {
   prompt: string;
   projectId: string;
   application_type?: string;
+  // Scheduler priority, higher starts first when generations are queued
+  priority?: number;
+  // Skip the phases checkpointed by an earlier run of this project (prompt optional)
+  resume?: boolean;
 }
 
 interface SSEEvent {
@@ -33,6 +46,9 @@ type PhaseName = GenerationPhase;
 
 const PHASE_ORDER: PhaseName[] = [GenerationPhase.SPECIFY, GenerationPhase.PLAN, GenerationPhase.IMPLEMENT];
 
+// Phases whose output is code; only these are streamed to disk as they arrive
+const FILE_STREAMING_PHASES: ReadonlySet<PhaseName> = new Set([GenerationPhase.IMPLEMENT]);
+
 // Utility functions
 function getPhaseMessage(phase: PhaseName): string {
   switch (phase) {
@@ -64,18 +80,21 @@ export async function POST(request: NextRequest): Promise<NextResponse> {
     let body;
     try {
       body = await request.json();
-      console.log("[API] /generate received body:", body);
+      logger.debug('GENERATE', 'Request body', { projectId: body?.projectId, promptLength: body?.prompt?.length ?? 0, resume: body?.resume === true });
     } catch (jsonError) {
-      console.error("[API] JSON Parse Error:", jsonError);
+      logger.warn('GENERATE', 'Invalid JSON body', { error: jsonError });
       return NextResponse.json({ error: "Invalid JSON" }, { status: 400 });
     }
 
-    const { prompt, projectId } = body;
+    const { projectId } = body;
+    let prompt: string = body.prompt;
+    const resume = body.resume === true;
+    const priority = Number.isFinite(Number(body.priority)) ? Number(body.priority) : 0;
 
     // Check if there's already an active generation for this project
     const existingController = activeGenerations.get(projectId);
     if (existingController) {
-      console.log(`[API] Project ${projectId} already has an active generation, rejecting new request`);
+      logger.info('GENERATE', 'Generation already in progress, rejecting new request', { projectId });
       return NextResponse.json(
         { error: "Generation already in progress for this project" },
         { status: 409 }
@@ -87,56 +106,106 @@ export async function POST(request: NextRequest): Promise<NextResponse> {
       projectId
     });
 
-    if (!prompt?.trim()) {
-      console.error("[API] Missing prompt!");
+    if (!prompt?.trim() && !resume) {
+      logger.warn('GENERATE', 'Missing prompt', { projectId });
       return NextResponse.json({ error: '用户输入不能为空' }, { status: 400 });
     }
 
     if (!projectId?.trim()) {
-      console.error("[API] Missing projectId!");
+      logger.warn('GENERATE', 'Missing projectId');
       return NextResponse.json({ error: '项目ID不能为空' }, { status: 400 });
     }
 
-    // Wait for SSE connection to be established (up to 5 seconds)
-    let controller: ReadableStreamDefaultController | null = null;
-    let hasStreaming = false;
-    const maxWaitTime = 5000; // 5 seconds
-    const startTime = Date.now();
-
-    while (Date.now() - startTime < maxWaitTime) {
-      controller = streams.get(projectId);
-      if (controller) {
-        hasStreaming = true;
-        log('GENERATE', 'SSE connected, enabling streaming', { projectId });
-        break;
+    // Resuming: pick up the checkpointed phases (and the original prompt if none was given)
+    let resumeFrom: Record<string, string> | undefined;
+    if (resume) {
+      const resumePoint = await loadResumePoint(
+        path.join(PROJECTS_ROOT, projectId),
+        PHASE_ORDER,
+        config.minimax.groupId,
+        prompt?.trim() ? prompt : undefined
+      );
+      if (!resumePoint) {
+        return NextResponse.json(
+          { error: 'No matching checkpoint to resume from for this project' },
+          { status: 404 }
+        );
       }
-      // Wait 100ms before checking again
-      await new Promise(resolve => setTimeout(resolve, 100));
+      prompt = prompt?.trim() ? prompt : resumePoint.prompt;
+      resumeFrom = resumePoint.completed;
+      log('GENERATE', 'Resuming from checkpoint', { projectId, completedPhases: Object.keys(resumeFrom) });
     }
 
-    if (!hasStreaming) {
+    // Wait for SSE connection to be established (up to 5 seconds); the stream
+    // route resolves this the moment it registers a subscriber. Events are
+    // logged either way, so a client that connects later is replayed them.
+    const maxWaitTime = 5000; // 5 seconds
+    const waitStartedAt = Date.now();
+    const subscriber = await waitForStream(projectId, maxWaitTime);
+    const hasStreaming = subscriber !== null;
+
+    if (hasStreaming) {
+      log('GENERATE', 'SSE connected, enabling streaming', { projectId, waitMs: Date.now() - waitStartedAt });
+    } else {
       log('GENERATE', 'SSE not connected within timeout, proceeding without streaming', { projectId });
     }
 
     // Create AbortController for this generation
     const abortController = new AbortController();
     activeGenerations.set(projectId, abortController);
+    beginGenerationLog(projectId);
 
-    // Start generation asynchronously - trigger pattern
-    console.log(`[API] About to call startGeneration with hasStreaming: ${hasStreaming}`);
-    startGeneration(projectId, prompt, controller, hasStreaming, abortController);
-    console.log(`[API] startGeneration called successfully`);
+    // Start generation asynchronously - trigger pattern. The scheduler runs it
+    // right away if a slot is free, otherwise queues it and reports the position.
+    const clientId = getClientId(request);
+    logger.debug('GENERATE', 'Submitting generation', { projectId, hasStreaming });
+    const scheduled = generationScheduler.submit({
+      projectId,
+      clientId,
+      priority,
+      signal: abortController.signal,
+      run: () => startGeneration(projectId, prompt, abortController, resumeFrom),
+      onQueued: (position, queueLength) => publishEvent(projectId, 'queued', {
+        project_id: projectId,
+        type: 'queued',
+        position,
+        queue_length: queueLength,
+        timestamp: new Date().toISOString()
+      }),
+      onCancelled: () => {
+        activeGenerations.delete(projectId);
+        endGenerationLog(projectId);
+      }
+    });
+
+    if (scheduled.status === 'rejected') {
+      activeGenerations.delete(projectId);
+      endGenerationLog(projectId);
+      log('GENERATE', 'Generation rejected by scheduler', { projectId, clientId, reason: scheduled.reason });
+      return NextResponse.json(
+        {
+          error: scheduled.reason === 'client_limit'
+            ? 'Too many generations in progress for this client'
+            : 'Generation queue is full, please retry later',
+          reason: scheduled.reason
+        },
+        { status: 429, headers: { 'Retry-After': '30' } }
+      );
+    }
 
-    log('GENERATE', 'Generation triggered', {
+    log('GENERATE', scheduled.status === 'started' ? 'Generation triggered' : 'Generation queued', {
       projectId,
+      clientId,
+      priority,
+      ...(scheduled.status === 'queued' ? { position: scheduled.position } : {}),
       promptPreview: prompt.substring(0, 100) + '...'
     });
 
     // Return immediately
-    return NextResponse.json({ status: 'started' });
+    return NextResponse.json(resumeFrom ? { ...scheduled, resumed_phases: Object.keys(resumeFrom) } : scheduled);
 
   } catch (error) {
-    console.error('API Error:', error);
+    logger.error('GENERATE', 'Request failed', { error });
     return NextResponse.json(
       { error: '生成请求处理失败，请稍后重试' },
       { status: 500 }
@@ -144,6 +213,29 @@ export async function POST(request: NextRequest): Promise<NextResponse> {
   }
 }
 
+// Identifies the caller for the scheduler's per-client limit. request.ip is set
+// by the hosting platform; x-forwarded-for is written by the client unless a
+// proxy in front of us appends to it, so it is only read when TRUSTED_PROXY_HOPS
+// says how many trusted proxies there are, and then only the entry the
+// outermost of them added.
+function getClientId(request: NextRequest): string {
+  if (request.ip) {
+    return request.ip;
+  }
+  const hops = config.scheduler.trustedProxyHops;
+  if (hops > 0) {
+    const forwarded = (request.headers.get('x-forwarded-for') ?? '')
+      .split(',')
+      .map(address => address.trim())
+      .filter(Boolean);
+    const address = forwarded[forwarded.length - hops];
+    if (address) {
+      return address;
+    }
+  }
+  return 'anonymous';
+}
+
 // Safety check: ensure critical files exist
 async function ensureCriticalFiles(projectId: string, projectDir: string, files: Record<string, string>): Promise<void> {
   const criticalFiles = [
@@ -164,30 +256,84 @@ async function ensureCriticalFiles(projectId: string, projectDir: string, files:
       log('GENERATE', 'Creating missing critical file', { filename: name, path: filePath });
       await ensureDirectory(path.dirname(filePath));
       await writeFileAtomic(filePath, defaultContent);
+      publishTreeChange(projectId, name, defaultContent, false);
     }
   }
 }
 
-// Async generation function - Trigger pattern with optional SSE streaming
-async function startGeneration(projectId: string, prompt: string, controller: ReadableStreamDefaultController | null, hasStreaming: boolean, abortController: AbortController): Promise<void> {
-  console.log(`[GENERATION] Starting generation for project ${projectId} with prompt: ${prompt}`);
-  console.log(`[GENERATION] Streaming status - controller: ${!!controller}, hasStreaming: ${hasStreaming}`);
+// Tell clients about a file the pipeline wrote, as a tree_delta they apply locally
+function publishTreeChange(projectId: string, filePath: string, content: string, existed: boolean): void {
+  const sizeBytes = Buffer.byteLength(content, 'utf-8');
+  publishTreeDelta(projectId, existed
+    ? { resized: [{ path: filePath, size_bytes: sizeBytes }] }
+    : { added: [{ path: filePath, size_bytes: sizeBytes, created_at: new Date().toISOString() }] });
+}
+
+function publishTreeDelta(projectId: string, change: TreeChange): void {
+  const delta = recordTreeChange(projectId, change);
+  publishEvent(projectId, 'tree_delta', {
+    project_id: projectId,
+    type: 'tree_delta',
+    ...delta,
+    timestamp: new Date().toISOString()
+  });
+}
+
+// Async generation function - Trigger pattern with optional SSE streaming.
+// `resumeFrom` holds checkpointed output of phases to skip, keyed by phase.
+async function startGeneration(
+  projectId: string,
+  prompt: string,
+  abortController: AbortController,
+  resumeFrom: Record<string, string> = {}
+): Promise<void> {
+  logger.info('GENERATION', 'Starting generation', { projectId, promptLength: prompt.length, resumedPhases: Object.keys(resumeFrom) });
 
-  const encoder = new TextEncoder();
+  let fileWriter: IncrementalFileWriter | null = null;
 
   try {
     const phasesData: Record<string, { content: string; thinking: string }> = {};
     let allCodeParts: string[] = [];
+    // Writes files to disk (and the workbench) as soon as their header shows up in the stream
+    fileWriter = new IncrementalFileWriter(projectId);
+
+    // Completed phases are checkpointed under .generation/ for resuming
+    const projectDir = await createProjectStructure(projectId);
+    // Only scaffolding directories; clients see them once files land in them
+    invalidateProjectTree(projectId);
+    const resuming = Object.keys(resumeFrom).length > 0;
+    if (!resuming) {
+      await resetCheckpoints(projectDir, projectId, prompt, config.minimax.groupId)
+        .catch(error => logger.error('GENERATION', 'Failed to reset checkpoints', { projectId, error }));
+    }
 
     // Execute each phase
     for (const phase of PHASE_ORDER) {
       // Check if generation was cancelled
       if (abortController.signal.aborted) {
-        console.log(`[GENERATION] Generation cancelled for project: ${projectId}`);
+        logger.info('GENERATION', 'Generation cancelled', { projectId });
+        metrics.generations.inc({ outcome: 'cancelled' });
         activeGenerations.delete(projectId);
+        await fileWriter.abort();
         return;
       }
 
+      // Already completed by an earlier run: reuse the checkpointed output
+      const checkpointed = resumeFrom[phase];
+      if (checkpointed !== undefined) {
+        phasesData[phase] = { content: checkpointed, thinking: '' };
+        allCodeParts.push(checkpointed);
+        publishEvent(projectId, 'phase_complete', {
+          project_id: projectId,
+          phase: phase,
+          type: 'phase_complete',
+          content: checkpointed,
+          resumed: true,
+          timestamp: new Date().toISOString()
+        });
+        continue;
+      }
+
       try {
         // Generate prompt
         const phasePrompt = generateUniversalPrompt(
@@ -197,61 +343,91 @@ async function startGeneration(projectId: string, prompt: string, controller: Re
           phasesData.plan?.content || ''
         );
 
-        // Send phase start event via SSE (if connected)
-        if (hasStreaming && controller) {
-          const phaseStartEvent = JSON.stringify({
-            project_id: projectId,
-            phase: phase,
-            type: 'phase_start',
-            timestamp: new Date().toISOString()
-          });
-          controller.enqueue(encoder.encode(`event: phase_start\ndata: ${phaseStartEvent}\n\n`));
-        }
+        // Send phase start event
+        publishEvent(projectId, 'phase_start', {
+          project_id: projectId,
+          phase: phase,
+          type: 'phase_start',
+          timestamp: new Date().toISOString()
+        });
 
-        console.log(`[API] Calling Minimax...`);
+        logger.debug('GENERATION', 'Calling Minimax', { projectId, phase });
 
         // Collect content for this phase
         let phaseContent = '';
         let chunkCount = 0;
+        const phaseStartedAt = performance.now();
+        const observePhase = metrics.phaseDuration.startTimer({ phase });
+        let firstChunkAt = 0;
+        const streamsFiles = FILE_STREAMING_PHASES.has(phase);
+        if (streamsFiles) {
+          fileWriter.beginPhase();
+        }
 
         try {
-          for await (const chunk of minimaxClient.generateCodeStream(phasePrompt, phase)) {
+          // Shared with any identical call already in flight, and served from the
+          // LLM cache when enabled and this exact call was seen before
+          const callParams = { phase, prompt: phasePrompt, model: config.minimax.groupId, baseUrl: config.minimax.baseUrl };
+          const phaseStream = singleFlightStream(cacheKey(callParams), () => cachedStream(
+            callParams,
+            () => minimaxClient.generateCodeStream(phasePrompt, phase)
+          ));
+          for await (const chunk of phaseStream) {
             chunkCount++;
-            console.log(`[API] Minimax Chunk: `, chunk.content.length);
+            // Per-chunk logging is sampled (LOG_SAMPLE); the counter still sees every chunk
+            if (logger.sample('chunk')) {
+              logger.debug('chunk', 'Minimax chunk', { projectId, phase, chunk: chunkCount, length: chunk.content.length });
+            }
 
             if (chunk.type === 'text') {
+              if (!firstChunkAt) {
+                firstChunkAt = performance.now();
+                metrics.minimaxTtfb.observe((firstChunkAt - phaseStartedAt) / 1000, { phase });
+              }
               phaseContent += chunk.content;
-
-              // Send chunk via SSE (if connected)
-              if (hasStreaming && controller) {
-                const chunkEvent = JSON.stringify({
-                  project_id: projectId,
-                  phase: phase,
-                  type: 'chunk',
-                  content: chunk.content,
-                  timestamp: new Date().toISOString()
-                });
-                controller.enqueue(encoder.encode(`event: chunk\ndata: ${chunkEvent}\n\n`));
+              if (streamsFiles) {
+                await fileWriter.push(chunk.content);
               }
+
+              // Send chunk
+              publishEvent(projectId, 'chunk', {
+                project_id: projectId,
+                phase: phase,
+                type: 'chunk',
+                content: chunk.content,
+                timestamp: new Date().toISOString()
+              });
             }
           }
 
-          console.log(`[GENERATION] Phase ${phase} completed with ${phaseContent.length} characters`);
+          observePhase({ outcome: 'completed' });
+          metrics.minimaxChars.inc({ phase }, phaseContent.length);
+          const streamingSeconds = firstChunkAt ? (performance.now() - firstChunkAt) / 1000 : 0;
+          if (streamingSeconds > 0) {
+            metrics.minimaxCharsPerSecond.observe(phaseContent.length / streamingSeconds, { phase });
+          }
+
+          logger.info('GENERATION', 'Phase completed', { projectId, phase, characters: phaseContent.length, chunks: chunkCount });
         } catch (phaseError) {
-          console.error(`[GENERATION] Phase ${phase} failed:`, phaseError);
-
-          // Send phase error via SSE (if connected)
-          if (hasStreaming && controller) {
-            const errorEvent = JSON.stringify({
-              project_id: projectId,
-              phase: phase,
-              type: 'phase_error',
-              error: 'Phase failed',
-              timestamp: new Date().toISOString()
-            });
-            controller.enqueue(encoder.encode(`event: phase_error\ndata: ${errorEvent}\n\n`));
+          observePhase({ outcome: 'failed' });
+          logger.error('GENERATION', 'Phase failed', { projectId, phase, error: phaseError });
+
+          // This phase's output is left out of the final parse, so the files it
+          // streamed to disk must go too
+          if (streamsFiles) {
+            await fileWriter.abortPhase().catch(error =>
+              logger.error('GENERATION', 'Failed to discard files of failed phase', { projectId, phase, error }));
           }
 
+          // Send phase error
+          publishEvent(projectId, 'phase_error', {
+            project_id: projectId,
+            phase: phase,
+            type: 'phase_error',
+            error: 'Phase failed',
+            timestamp: new Date().toISOString()
+          });
+
           throw phaseError;
         }
 
@@ -261,38 +437,43 @@ async function startGeneration(projectId: string, prompt: string, controller: Re
           thinking: '' // Could be enhanced to capture thinking traces
         };
 
-        // Send phase complete via SSE (if connected)
-        if (hasStreaming && controller) {
-          const phaseCompleteEvent = JSON.stringify({
-            project_id: projectId,
-            phase: phase,
-            type: 'phase_complete',
-            content: phaseContent,
-            timestamp: new Date().toISOString()
-          });
-          controller.enqueue(encoder.encode(`event: phase_complete\ndata: ${phaseCompleteEvent}\n\n`));
+        try {
+          await saveCheckpoint(projectDir, phase, phaseContent);
+        } catch (checkpointError) {
+          logger.error('GENERATION', 'Failed to checkpoint phase', { projectId, phase, error: checkpointError });
         }
 
+        // Send phase complete
+        publishEvent(projectId, 'phase_complete', {
+          project_id: projectId,
+          phase: phase,
+          type: 'phase_complete',
+          content: phaseContent,
+          timestamp: new Date().toISOString()
+        });
+
         allCodeParts.push(phaseContent);
 
       } catch (error) {
-        console.error(`Phase ${phase} failed:`, error);
+        logger.warn('GENERATION', 'Continuing after failed phase', { projectId, phase });
         // Continue with other phases
         continue;
       }
     }
 
+    await fileWriter.end();
+
     // Parse and generate files
     const generatedContent = allCodeParts.join('');
-    console.log(`[GENERATION] Generated content length: ${generatedContent.length}`);
+    logger.debug('GENERATION', 'Generated content', { projectId, length: generatedContent.length });
 
     let files: Record<string, string> = {};
     if (generatedContent.trim()) {
       files = parseGeneratedCode(generatedContent);
-      console.log(`[GENERATION] Parsed ${Object.keys(files).length} files:`, Object.keys(files));
+      logger.info('GENERATION', 'Parsed files', { projectId, files: Object.keys(files) });
     } else {
       // Fallback: create sample files if API failed
-      console.log(`[GENERATION] No content generated, creating sample files`);
+      logger.warn('GENERATION', 'No content generated, creating sample files', { projectId });
       files = {
         'main.py': `# Sample Python Calculator App
 # Generated as fallback when API is unavailable
@@ -342,182 +523,295 @@ if __name__ == "__main__":
       };
     }
 
-    // Create project directory
-    const projectDir = await createProjectStructure(projectId);
+    // The final parse is authoritative: files streamed under a header it did not
+    // keep are removed again
+    const documentationFiles = generateDocumentationFiles(prompt, phasesData, files);
+    await fileWriter.discardExcept(filePath => filePath in files || filePath in documentationFiles);
 
-    // Write files
-    log('GENERATE', 'Writing code files', { count: Object.keys(files).length });
-    for (const [filePath, content] of Object.entries(files)) {
-      const fullPath = path.join(projectDir, filePath);
-      log('GENERATE', 'Writing file', {
-        relativePath: filePath,
-        fullPath: path.resolve(fullPath),
-        size: content.length
-      });
+    // Write files not already streamed to disk with their final content
+    const pendingFiles = Object.fromEntries(
+      Object.entries(files).filter(([filePath, content]) => fileWriter!.written.get(filePath) !== content)
+    );
+    log('GENERATE', 'Writing code files', {
+      count: Object.keys(pendingFiles).length,
+      alreadyStreamed: Object.keys(files).length - Object.keys(pendingFiles).length
+    });
+    await writeGeneratedFiles(projectId, projectDir, pendingFiles, 'code', abortController.signal);
 
-      await ensureDirectory(path.dirname(fullPath));
+    // Generate documentation files
+    logger.debug('GENERATION', 'Generated documentation files', { projectId, count: Object.keys(documentationFiles).length });
 
-      // Stream file content in chunks for real-time display
-      if (hasStreaming && controller) {
-        console.log(`[STREAMING] Starting to stream file: ${filePath}, content length: ${content.length}`);
+    await writeGeneratedFiles(projectId, projectDir, documentationFiles, 'documentation', abortController.signal);
 
-        const chunkSize = 50; // Smaller chunks for more frequent updates
-        for (let i = 0; i < content.length; i += chunkSize) {
-          const chunk = content.slice(i, i + chunkSize);
-          const contentEvent = JSON.stringify({
-            project_id: projectId,
-            type: 'file_content_update',
-            path: filePath,
-            content: chunk,
-            offset: i,
-            is_complete: false,
-            timestamp: new Date().toISOString()
-          });
+    // Safety check: ensure all critical files exist
+    await ensureCriticalFiles(projectId, projectDir, files);
 
-          console.log(`[STREAMING] Sending chunk for ${filePath}: offset ${i}, length ${chunk.length}`);
-          controller.enqueue(encoder.encode(`event: file_content_update\ndata: ${contentEvent}\n\n`));
+    // Send completion event
+    publishEvent(projectId, 'generation_complete', {
+      project_id: projectId,
+      type: 'generation_complete',
+      total_files: Object.keys(files).length + Object.keys(documentationFiles).length,
+      timestamp: new Date().toISOString()
+    });
 
-          // Small delay to create streaming effect
-          await new Promise(resolve => setTimeout(resolve, 20));
-        }
+    log('GENERATE', 'Generation completed successfully', { projectId });
+    metrics.generations.inc({ outcome: 'completed' });
+    activeGenerations.delete(projectId);
 
-        // Send completion event
-        const completeEvent = JSON.stringify({
-          project_id: projectId,
-          type: 'file_content_update',
-          path: filePath,
-          content: '',
-          offset: content.length,
-          is_complete: true,
-          timestamp: new Date().toISOString()
-        });
+  } catch (error) {
+    logger.error('GENERATION', 'Generation failed', { projectId, error });
+    metrics.generations.inc({ outcome: 'failed' });
+    activeGenerations.delete(projectId);
+    await fileWriter?.abort();
 
-        console.log(`[STREAMING] Sending completion for ${filePath}`);
-        controller.enqueue(encoder.encode(`event: file_content_update\ndata: ${completeEvent}\n\n`));
-      } else {
-        console.log(`[STREAMING] Streaming disabled for ${filePath}, hasStreaming: ${hasStreaming}, controller: ${!!controller}`);
-      }
+    // Send error event
+    publishEvent(projectId, 'generation_error', {
+      project_id: projectId,
+      type: 'generation_error',
+      error: 'Generation failed',
+      timestamp: new Date().toISOString()
+    });
+  } finally {
+    endGenerationLog(projectId);
+  }
+}
 
-      // Write the complete file atomically
-      await writeFileAtomic(fullPath, content);
+// Feeds model output through StreamingCodeParser and writes each file while it is
+// still being generated: content goes to `<file>.partial`, which is renamed into
+// place when the next file header (or the end of output) closes the section
+class IncrementalFileWriter {
+  // Final content of every file completed so far, keyed by relative path
+  readonly written = new Map<string, string>();
+
+  private parser = new StreamingCodeParser();
+  // Files streamed during the current phase, with their content before it
+  // (undefined for files the phase created)
+  private phaseFiles = new Map<string, string | undefined>();
+  private projectDir: string | null = null;
+  private current: { path: string; fullPath: string; tempPath: string; stream: WriteStream } | null = null;
+
+  constructor(private readonly projectId: string) {}
+
+  async push(text: string): Promise<void> {
+    for (const event of this.parser.push(text)) {
+      await this.handle(event);
+    }
+  }
 
-      // Send file created event via SSE (if connected)
-      if (hasStreaming && controller) {
-        const fileEvent = JSON.stringify({
-          project_id: projectId,
-          type: 'file_created',
-          filename: filePath.split('/').pop() || filePath,
-          path: filePath,
-          size_bytes: Buffer.byteLength(content, 'utf-8'),
-          timestamp: new Date().toISOString()
-        });
-        controller.enqueue(encoder.encode(`event: file_created\ndata: ${fileEvent}\n\n`));
-      }
+  async end(): Promise<void> {
+    for (const event of this.parser.end()) {
+      await this.handle(event);
     }
+  }
 
-    // Generate documentation files
-    const documentationFiles = generateDocumentationFiles(prompt, phasesData, files);
-    console.log(`[GENERATION] Generated ${Object.keys(documentationFiles).length} documentation files`);
-
-    for (const [filePath, content] of Object.entries(documentationFiles)) {
-      const fullPath = path.join(projectDir, filePath);
-      log('GENERATE', 'Writing documentation file', {
-        relativePath: filePath,
-        fullPath: path.resolve(fullPath),
-        size: content.length
+  // Drop the partially written file after a failed generation
+  async abort(): Promise<void> {
+    if (!this.current) {
+      return;
+    }
+    const { stream, tempPath } = this.current;
+    this.current = null;
+    stream.destroy();
+    await fs.rm(tempPath, { force: true });
+  }
+
+  beginPhase(): void {
+    this.phaseFiles.clear();
+  }
+
+  // Undo a failed phase: drop its open file, start the parser over, and remove
+  // (or restore) every file it streamed
+  async abortPhase(): Promise<void> {
+    await this.abort();
+    this.parser = new StreamingCodeParser();
+
+    const phaseFiles = Array.from(this.phaseFiles);
+    this.phaseFiles.clear();
+    for (const [filePath, previous] of phaseFiles) {
+      const fullPath = path.join(this.projectDir!, filePath);
+      if (previous === undefined) {
+        await fs.rm(fullPath, { force: true });
+        // Only completed files reached the tree
+        if (this.written.delete(filePath)) {
+          publishTreeDelta(this.projectId, { removed: [filePath] });
+        }
+        continue;
+      }
+
+      await writeFileAtomic(fullPath, previous);
+      // Back to what was there before the generation, which is not ours to discard
+      this.written.delete(filePath);
+      publishEvent(this.projectId, 'file_content_update', {
+        project_id: this.projectId,
+        type: 'file_content_update',
+        path: filePath,
+        content: previous,
+        offset: 0,
+        replace: true,
+        is_complete: true,
+        timestamp: new Date().toISOString()
       });
+      publishTreeChange(this.projectId, filePath, previous, true);
+    }
+  }
 
-      await ensureDirectory(path.dirname(fullPath));
+  // Delete the streamed files `keep` rejects and tell clients they are gone
+  async discardExcept(keep: (filePath: string) => boolean): Promise<void> {
+    const removed: string[] = [];
+    for (const filePath of Array.from(this.written.keys())) {
+      if (keep(filePath)) {
+        continue;
+      }
+      await fs.rm(path.join(this.projectDir!, filePath), { force: true });
+      this.written.delete(filePath);
+      removed.push(filePath);
+    }
 
-      // Stream documentation file content in chunks for real-time display
-      if (hasStreaming && controller) {
-        console.log(`[STREAMING] Starting to stream doc file: ${filePath}, content length: ${content.length}`);
+    if (removed.length) {
+      log('GENERATE', 'Removed streamed files missing from the final parse', { files: removed });
+      publishTreeDelta(this.projectId, { removed });
+    }
+  }
 
-        const chunkSize = 50; // Smaller chunks for more frequent updates
-        for (let i = 0; i < content.length; i += chunkSize) {
-          const chunk = content.slice(i, i + chunkSize);
-          const contentEvent = JSON.stringify({
-            project_id: projectId,
-            type: 'file_content_update',
-            path: filePath,
-            content: chunk,
-            offset: i,
-            is_complete: false,
-            timestamp: new Date().toISOString()
-          });
+  private async handle(event: StreamingParseEvent): Promise<void> {
+    switch (event.type) {
+      case 'file_start': {
+        if (!this.projectDir) {
+          this.projectDir = await createProjectStructure(this.projectId);
+        }
+        const fullPath = path.join(this.projectDir, event.path);
+        await ensureDirectory(path.dirname(fullPath));
+        if (!this.phaseFiles.has(event.path)) {
+          this.phaseFiles.set(event.path, await fileExists(fullPath) ? await fs.readFile(fullPath, 'utf-8') : undefined);
+        }
 
-          console.log(`[STREAMING] Sending doc chunk for ${filePath}: offset ${i}, length ${chunk.length}`);
-          controller.enqueue(encoder.encode(`event: file_content_update\ndata: ${contentEvent}\n\n`));
+        // Hidden from the project tree until it is renamed into place
+        const tempPath = `${fullPath}${PARTIAL_FILE_SUFFIX}`;
+        this.current = { path: event.path, fullPath, tempPath, stream: createWriteStream(tempPath, 'utf-8') };
+        log('GENERATE', 'Streaming file to disk', { relativePath: event.path });
+        break;
+      }
+
+      case 'file_chunk':
+        this.current?.stream.write(event.content);
+        publishEvent(this.projectId, 'file_content_update', {
+          project_id: this.projectId,
+          type: 'file_content_update',
+          path: event.path,
+          content: event.content,
+          offset: event.offset,
+          // A file can be streamed again by a later phase; the first slice resets it
+          replace: event.offset === 0,
+          is_complete: false,
+          timestamp: new Date().toISOString()
+        });
+        break;
 
-          // Small delay to create streaming effect
-          await new Promise(resolve => setTimeout(resolve, 20));
+      case 'file_end': {
+        const current = this.current;
+        this.current = null;
+        if (!current) {
+          break;
         }
 
-        // Send completion event
-        const completeEvent = JSON.stringify({
-          project_id: projectId,
+        const observeWrite = metrics.fileWrite.startTimer({ kind: 'streamed' });
+        await new Promise<void>((resolve, reject) => {
+          current.stream.once('error', reject);
+          current.stream.end(resolve);
+        });
+        const existed = await fileExists(current.fullPath);
+        await fs.rename(current.tempPath, current.fullPath);
+        observeWrite();
+        publishTreeChange(this.projectId, event.path, event.content, existed);
+        this.written.set(event.path, event.content);
+
+        publishEvent(this.projectId, 'file_content_update', {
+          project_id: this.projectId,
           type: 'file_content_update',
-          path: filePath,
+          path: event.path,
           content: '',
-          offset: content.length,
+          offset: event.content.length,
           is_complete: true,
           timestamp: new Date().toISOString()
         });
-
-        console.log(`[STREAMING] Sending doc completion for ${filePath}`);
-        controller.enqueue(encoder.encode(`event: file_content_update\ndata: ${completeEvent}\n\n`));
-      } else {
-        console.log(`[STREAMING] Streaming disabled for doc ${filePath}, hasStreaming: ${hasStreaming}, controller: ${!!controller}`);
-      }
-
-      // Write the complete documentation file atomically
-      await writeFileAtomic(fullPath, content);
-
-      // Send documentation file created event via SSE (if connected)
-      if (hasStreaming && controller) {
-        const docEvent = JSON.stringify({
-          project_id: projectId,
+        publishEvent(this.projectId, 'file_created', {
+          project_id: this.projectId,
           type: 'file_created',
-          filename: filePath.split('/').pop() || filePath,
-          path: filePath,
-          size_bytes: Buffer.byteLength(content, 'utf-8'),
+          filename: event.path.split('/').pop() || event.path,
+          path: event.path,
+          size_bytes: Buffer.byteLength(event.content, 'utf-8'),
           timestamp: new Date().toISOString()
         });
-        controller.enqueue(encoder.encode(`event: file_created\ndata: ${docEvent}\n\n`));
+        break;
       }
     }
+  }
+}
 
-    // Safety check: ensure all critical files exist
-    await ensureCriticalFiles(projectId, projectDir, files);
+// Write generated files, publishing each one as file_content_update events (paced per
+// config.streaming) followed by file_created
+async function writeGeneratedFiles(
+  projectId: string,
+  projectDir: string,
+  files: Record<string, string>,
+  kind: 'code' | 'documentation',
+  signal: AbortSignal
+): Promise<void> {
+  const pacing = getFilePacingOptions();
+
+  for (const [filePath, content] of Object.entries(files)) {
+    const fullPath = path.join(projectDir, filePath);
+    log('GENERATE', kind === 'code' ? 'Writing file' : 'Writing documentation file', {
+      relativePath: filePath,
+      fullPath: path.resolve(fullPath),
+      size: content.length
+    });
+
+    await ensureDirectory(path.dirname(fullPath));
 
-    // Send completion event via SSE (if connected)
-    if (hasStreaming && controller) {
-      const completionEvent = JSON.stringify({
+    // Stream file content for real-time display
+    for await (const chunk of paceFileContent(content, () => getStreamDesiredSize(projectId), pacing, signal)) {
+      publishEvent(projectId, 'file_content_update', {
         project_id: projectId,
-        type: 'generation_complete',
-        total_files: Object.keys(files).length + Object.keys(documentationFiles).length,
+        type: 'file_content_update',
+        path: filePath,
+        content: chunk.content,
+        offset: chunk.offset,
+        // Clients may already hold a streamed version of this file: start over
+        replace: chunk.offset === 0,
+        is_complete: false,
         timestamp: new Date().toISOString()
       });
-      controller.enqueue(encoder.encode(`event: generation_complete\ndata: ${completionEvent}\n\n`));
     }
 
-    log('GENERATE', 'Generation completed successfully', { projectId });
-    activeGenerations.delete(projectId);
-
-  } catch (error) {
-    console.error('[GENERATION] Generation failed:', error);
-    activeGenerations.delete(projectId);
+    // Send completion event (an empty file has no slices, so it resets here)
+    publishEvent(projectId, 'file_content_update', {
+      project_id: projectId,
+      type: 'file_content_update',
+      path: filePath,
+      content: '',
+      offset: content.length,
+      replace: content.length === 0,
+      is_complete: true,
+      timestamp: new Date().toISOString()
+    });
 
-    // Send error event via SSE (if connected)
-    if (hasStreaming && controller) {
-      const errorEvent = JSON.stringify({
-        project_id: projectId,
-        type: 'generation_error',
-        error: 'Generation failed',
-        timestamp: new Date().toISOString()
-      });
-      controller.enqueue(encoder.encode(`event: generation_error\ndata: ${errorEvent}\n\n`));
-    }
+    // Write the complete file atomically
+    const existed = await fileExists(fullPath);
+    const observeWrite = metrics.fileWrite.startTimer({ kind });
+    await writeFileAtomic(fullPath, content);
+    observeWrite();
+    publishTreeChange(projectId, filePath, content, existed);
+
+    // Send file created event
+    publishEvent(projectId, 'file_created', {
+      project_id: projectId,
+      type: 'file_created',
+      filename: filePath.split('/').pop() || filePath,
+      path: filePath,
+      size_bytes: Buffer.byteLength(content, 'utf-8'),
+      timestamp: new Date().toISOString()
+    });
   }
 }
 
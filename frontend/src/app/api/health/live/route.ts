@@ -0,0 +1,12 @@
+import { NextResponse } from 'next/server';
+
+export const dynamic = 'force-dynamic';
+
+// Liveness: the process is up and serving requests. Never looks at
+// dependencies, so a MiniMax or disk outage does not get the process restarted.
+export async function GET() {
+  return NextResponse.json(
+    { status: 'alive', uptime: process.uptime(), timestamp: new Date().toISOString() },
+    { headers: { 'Cache-Control': 'no-cache' } }
+  );
+}
@@ -0,0 +1,16 @@
+import { NextResponse } from 'next/server';
+import { getHealthReport, healthChecksReady } from '../../../../lib/health';
+
+export const dynamic = 'force-dynamic';
+
+// Readiness: 200 while the critical background checks pass (degraded included),
+// 503 otherwise. Reads cached results only.
+export async function GET() {
+  await healthChecksReady();
+  const report = getHealthReport();
+
+  return NextResponse.json(
+    { status: report.status, ready: report.ready, checks: report.checks, timestamp: new Date().toISOString() },
+    { status: report.ready ? 200 : 503, headers: { 'Cache-Control': 'no-cache' } }
+  );
+}
@@ -0,0 +1,27 @@
+import { NextResponse } from 'next/server';
+import { registry, metrics, collectProcessMetrics } from '../../../lib/metrics';
+import { activeGenerations, getBroadcastMetrics } from '../../../lib/store';
+import { generationScheduler } from '../../../lib/scheduler';
+
+export const dynamic = 'force-dynamic';
+
+// Prometheus text exposition of the pipeline metrics
+export async function GET() {
+  const broadcast = getBroadcastMetrics();
+  const scheduler = generationScheduler.getMetrics();
+
+  metrics.sseProjects.set(broadcast.projects);
+  metrics.sseSubscribers.set(broadcast.subscribers);
+  metrics.ssePendingBytes.set(broadcast.pending_bytes);
+  metrics.activeGenerations.set(activeGenerations.size);
+  metrics.queueDepth.set(scheduler.queue_depth);
+  metrics.runningGenerations.set(scheduler.running);
+  collectProcessMetrics();
+
+  return new NextResponse(registry.render(), {
+    headers: {
+      'Content-Type': 'text/plain; version=0.0.4; charset=utf-8',
+      'Cache-Control': 'no-cache'
+    }
+  });
+}
@@ -2,6 +2,8 @@ import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs/promises';
 import path from 'path';
 import archiver from 'archiver';
+import { CHECKPOINT_DIR } from '../../../../../lib/checkpoints';
+import { metrics } from '../../../../../lib/metrics';
 
 const PROJECTS_ROOT = path.join(process.cwd(), '..', 'projects');
 
@@ -22,6 +24,7 @@ export async function GET(
     }
 
     // Create a readable stream for the ZIP archive
+    const observeZip = metrics.zipBuild.startTimer();
     const archive = archiver('zip', {
       zlib: { level: 9 } // Maximum compression
     });
@@ -32,8 +35,16 @@ export async function GET(
       throw err;
     });
 
-    // Add the entire project directory to the archive
-    archive.directory(projectDir, projectId);
+    // Archive size is only known once the last byte has been produced
+    archive.on('end', () => {
+      observeZip();
+      metrics.zipBytes.observe(archive.pointer());
+    });
+
+    // Add the entire project directory to the archive, minus generation checkpoints
+    archive.directory(projectDir, projectId, entry =>
+      entry.name === CHECKPOINT_DIR || entry.name.startsWith(`${CHECKPOINT_DIR}/`) ? false : entry
+    );
 
     // Finalize the archive (this returns a Promise)
     await archive.finalize();
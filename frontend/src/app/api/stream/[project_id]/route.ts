@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 
-import { streams } from '../../../../lib/store';
+import { logger } from '../../../../lib/logger';
+import { streams, attachStream, unregisterStream, createSubscriber, streamQueuingStrategy, StreamSubscriber } from '../../../../lib/store';
 
 export const dynamic = 'force-dynamic';
 
@@ -16,63 +17,92 @@ export async function GET(
 
   const encoder = new TextEncoder();
 
-  console.log(`[STREAM] Connection requested: ${projectId}`);
+  logger.debug('STREAM', 'Connection requested', { projectId });
+
+  // EventSource sends Last-Event-ID on reconnect; `?lastEventId=` covers manual resumes
+  const lastEventId = parseLastEventId(
+    req.headers.get('last-event-id') ?? req.nextUrl.searchParams.get('lastEventId')
+  );
 
   let interval: NodeJS.Timeout;
+  let subscriber: StreamSubscriber;
 
-  // Create the ReadableStream
+  // Create the ReadableStream, sized in bytes so desiredSize tracks the client's backlog
   const stream = new ReadableStream({
 
-    start(controller) {
-
-      streams.set(projectId, controller);
+    async start(controller) {
 
-      console.log(`[STREAM] Registered: ${projectId} (Total: ${streams.size})`);
+      subscriber = createSubscriber(projectId, controller);
 
       // 1. Initial Handshake
       try {
         controller.enqueue(encoder.encode(`event: connected\ndata: ${JSON.stringify({ status: "ready" })}\n\n`));
-        console.log(`[STREAM] Sent handshake for ${projectId}`);
       } catch (e) {
-        console.error(`[STREAM] Failed to send handshake: ${e}`);
+        logger.warn('STREAM', 'Failed to send handshake', { projectId, error: e });
+        return;
+      }
+
+      // Replay missed events (or the generation in progress), then go live
+      try {
+        const complete = await attachStream(projectId, subscriber, lastEventId);
+        logger.info('STREAM', 'Registered', {
+          projectId,
+          subscriber: subscriber.id,
+          subscribers: streams.get(projectId)?.size ?? 0,
+          resumedAfter: lastEventId,
+          complete
+        });
+      } catch (e) {
+        logger.error('STREAM', 'Failed to replay events', { projectId, error: e });
         return;
       }
 
       // 2. Heartbeat (Every 10s)
+      // Goes through the subscriber queue to stay in order; droppable like content chunks
       interval = setInterval(() => {
-        try {
-          controller.enqueue(encoder.encode(`event: heartbeat\ndata: ${JSON.stringify({ timestamp: Date.now() })}\n\n`));
-          console.log(`[STREAM] Sent heartbeat for ${projectId}`);
-        } catch (e) {
-          console.log(`[STREAM] Heartbeat failed for ${projectId}, cleaning up: ${e}`);
+        const bytes = encoder.encode(`event: heartbeat\ndata: ${JSON.stringify({ timestamp: Date.now() })}\n\n`);
+        if (subscriber.send({ bytes, droppable: true })) {
+          if (logger.sample('heartbeat')) {
+            logger.debug('heartbeat', 'Sent heartbeat', { projectId, subscriber: subscriber.id, pendingBytes: subscriber.pendingBytes });
+          }
+        } else {
+          logger.info('STREAM', 'Heartbeat failed, cleaning up', { projectId, subscriber: subscriber.id });
           clearInterval(interval);
-          streams.delete(projectId);
+          unregisterStream(projectId, subscriber);
         }
       }, 10000);
 
-      // 3. Return a Promise that never resolves - this keeps the stream alive
-      return new Promise(() => {
-        // This promise never resolves, keeping the stream open
-        req.signal.addEventListener('abort', () => {
-          console.log(`[STREAM] Client disconnected: ${projectId}`);
-          clearInterval(interval);
-          streams.delete(projectId);
-          try {
-            controller.close();
-          } catch (e) {
-            console.error(`[STREAM] Error closing controller: ${e}`);
-          }
-        });
-      });
+      // 3. Clean up on disconnect. start() has to settle for pull() to be called;
+      // the stream itself stays open until closed here.
+      const onAbort = () => {
+        logger.info('STREAM', 'Client disconnected', { projectId, subscriber: subscriber.id, dropped: subscriber.dropped });
+        clearInterval(interval);
+        unregisterStream(projectId, subscriber);
+        try {
+          controller.close();
+        } catch (e) {
+          logger.warn('STREAM', 'Error closing controller', { projectId, error: e });
+        }
+      };
+      if (req.signal.aborted) {
+        onAbort();
+      } else {
+        req.signal.addEventListener('abort', onAbort);
+      }
+    },
+
+    // The client drained what was enqueued: hand over events queued meanwhile
+    pull() {
+      subscriber?.flush();
     },
 
     cancel() {
-      console.log(`[STREAM] Stream cancelled: ${projectId}`);
+      logger.info('STREAM', 'Stream cancelled', { projectId });
       clearInterval(interval);
-      streams.delete(projectId);
+      unregisterStream(projectId, subscriber);
     }
 
-  });
+  }, streamQueuingStrategy());
 
   return new NextResponse(stream, {
 
@@ -89,3 +119,10 @@ export async function GET(
   });
 
 }
+
+function parseLastEventId(value: string | null): number | null {
+  if (value === null || !/^\d+$/.test(value.trim())) {
+    return null;
+  }
+  return Number(value.trim());
+}
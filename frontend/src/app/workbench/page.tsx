@@ -1,8 +1,8 @@
 'use client'
 
-import { useState, useEffect, Suspense, useCallback } from 'react'
+import { useState, useEffect, useRef, Suspense, useCallback } from 'react'
 import { useSearchParams } from 'next/navigation'
-import FileExplorer from '../../components/FileExplorer'
+import FileExplorer, { FileItem, TreeDeltaEvent, applyTreeDelta, flattenProjectTree } from '../../components/FileExplorer'
 import WorkbenchScene from '../../components/WorkbenchScene'
 import SSEConnector, { SSEEvent, ConnectionStatus } from '../../components/SSEConnector'
 
@@ -13,9 +13,13 @@ function WorkbenchContent() {
 
   console.log(`[Workbench] URL params - mode: "${mode}", projectId: "${projectId}"`)
 
-  const [files, setFiles] = useState<any[]>([])
+  const [files, setFiles] = useState<FileItem[]>([])
+  // Version of the tree in `files`; null until a tree or delta has been seen
+  const treeVersionRef = useRef<number | null>(null)
   const [isStreaming, setIsStreaming] = useState(mode === 'streaming')
   const [connectionStatus, setConnectionStatus] = useState<'connecting' | 'connected' | 'completed' | 'error'>('connecting')
+  // Set while the generation waits for a scheduler slot
+  const [queuePosition, setQueuePosition] = useState<number | null>(null)
 
   // Update isStreaming when mode changes
   useEffect(() => {
@@ -38,32 +42,68 @@ function WorkbenchContent() {
     console.log(`[Workbench] WorkbenchContent component mounted/re-rendered`)
   })
 
+  // Full tree fetch: initial load, and whenever a delta does not follow on
+  // from the version we hold
+  const loadProjectTree = useCallback(async () => {
+    if (!projectId) return
+    try {
+      const response = await fetch(`/api/projects/${projectId}`)
+      if (!response.ok) return // 404 until generation creates the project
+      const tree = await response.json()
+      treeVersionRef.current = tree.version
+      setFiles(flattenProjectTree(tree.root))
+    } catch (error) {
+      console.error('[Workbench] Failed to load project tree:', error)
+    }
+  }, [projectId])
+
+  useEffect(() => {
+    loadProjectTree()
+  }, [loadProjectTree])
+
+  const handleTreeDelta = useCallback((delta: TreeDeltaEvent) => {
+    const current = treeVersionRef.current
+    if (current !== null && delta.version <= current) {
+      return // Already applied (replayed after a reconnect)
+    }
+    if (current !== null && delta.base_version !== current) {
+      loadProjectTree()
+      return
+    }
+    treeVersionRef.current = delta.version
+    setFiles(prev => applyTreeDelta(prev, delta))
+  }, [loadProjectTree])
+
   const handleStreamEvent = useCallback((event: SSEEvent) => {
     console.log('Received SSE event:', event)
 
     switch (event.type) {
-      case 'file_created':
-        // Add new file to the tree
-        setFiles(prev => [...prev, {
-          name: event.filename,
-          path: event.path,
-          type: 'file',
-          size: event.size_bytes,
-          created: new Date().toISOString()
-        }])
+      case 'queued':
+        setQueuePosition(event.position)
+        break
+
+      case 'tree_delta':
+        // Files are added to the explorer from deltas, not refetched
+        handleTreeDelta(event as SSEEvent & TreeDeltaEvent)
         break
 
       case 'generation_complete':
+        setQueuePosition(null)
         setConnectionStatus('completed')
         setIsStreaming(false)
         break
 
       case 'error':
+        setQueuePosition(null)
         setConnectionStatus('error')
         console.error('Generation error:', event.message || event.error)
         break
 
       case 'phase_start':
+        setQueuePosition(null)
+        console.log(`Phase event: ${event.type}`, event)
+        break
+
       case 'phase_complete':
       case 'chunk':
       case 'thinking':
@@ -71,7 +111,7 @@ function WorkbenchContent() {
         console.log(`Phase event: ${event.type}`, event)
         break
     }
-  }, [])
+  }, [handleTreeDelta])
 
   const handleStatusChange = useCallback((status: ConnectionStatus) => {
     // Map ConnectionStatus to WorkbenchScene expected types
@@ -106,6 +146,7 @@ function WorkbenchContent() {
         files={files}
         isStreaming={isStreaming}
         connectionStatus={connectionStatus}
+        queuePosition={queuePosition}
       />
     </div>
   )
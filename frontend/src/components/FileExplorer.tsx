@@ -1,7 +1,7 @@
 import React from 'react';
 import { Folder, FileText } from 'lucide-react';
 
-interface FileItem {
+export interface FileItem {
   name: string;
   path: string;
   type: 'file' | 'directory';
@@ -9,6 +9,53 @@ interface FileItem {
   created?: string;
 }
 
+// `tree_delta` SSE event: moves the project tree from base_version to version
+export interface TreeDeltaEvent {
+  base_version: number;
+  version: number;
+  added: { path: string; size_bytes: number; created_at?: string }[];
+  removed: string[];
+  resized: { path: string; size_bytes: number }[];
+}
+
+// Flatten a GET /api/projects/{id} tree into the file list shown here
+export function flattenProjectTree(node: any): FileItem[] {
+  if (node.type === 'file') {
+    return [{ name: node.name, path: node.path, type: 'file', size: node.size_bytes, created: node.created_at }];
+  }
+  return (node.children || []).flatMap(flattenProjectTree);
+}
+
+// Apply a tree delta to the file list. Adds are upserts and removing a missing
+// path is a no-op, so applying the same delta twice is harmless.
+export function applyTreeDelta(files: FileItem[], delta: TreeDeltaEvent): FileItem[] {
+  const byPath = new Map(files.map(file => [file.path, file]));
+  for (const path of delta.removed) {
+    // A removed directory takes its files with it
+    for (const key of Array.from(byPath.keys())) {
+      if (key === path || key.startsWith(`${path}/`)) {
+        byPath.delete(key);
+      }
+    }
+  }
+  for (const { path, size_bytes, created_at } of delta.added) {
+    byPath.set(path, {
+      name: path.split('/').pop() || path,
+      path,
+      type: 'file',
+      size: size_bytes,
+      created: created_at ?? byPath.get(path)?.created
+    });
+  }
+  for (const { path, size_bytes } of delta.resized) {
+    const file = byPath.get(path);
+    byPath.set(path, file
+      ? { ...file, size: size_bytes }
+      : { name: path.split('/').pop() || path, path, type: 'file', size: size_bytes });
+  }
+  return Array.from(byPath.values());
+}
+
 interface FileExplorerProps {
   files: FileItem[];
   onFileSelect?: (file: FileItem) => void;
@@ -172,6 +172,16 @@ const SSEConnector: React.FC<SSEConnectorProps> = ({
       });
 
       // Listen for generation events
+      eventSource.addEventListener('queued', (event: any) => {
+        console.log('[SSEConnector] Queued event received');
+        try {
+          const data = JSON.parse(event.data);
+          onEvent({ type: 'queued', ...data });
+        } catch (error) {
+          console.error('[SSEConnector] Failed to parse queued event:', error);
+        }
+      });
+
       eventSource.addEventListener('phase_start', (event: any) => {
         console.log('[SSEConnector] Phase start event received');
         try {
@@ -212,6 +222,15 @@ const SSEConnector: React.FC<SSEConnectorProps> = ({
         }
       });
 
+      eventSource.addEventListener('tree_delta', (event: any) => {
+        try {
+          const data = JSON.parse(event.data);
+          onEvent({ type: 'tree_delta', ...data });
+        } catch (error) {
+          console.error('[SSEConnector] Failed to parse tree_delta event:', error);
+        }
+      });
+
       eventSource.addEventListener('generation_complete', () => {
         console.log('[SSEConnector] Generation complete event received');
         updateStatus('completed');
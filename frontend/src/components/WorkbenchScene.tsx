@@ -13,6 +13,8 @@ interface WorkbenchSceneProps {
   files: FileItem[];
   isStreaming: boolean;
   connectionStatus: 'connecting' | 'connected' | 'completed' | 'error';
+  // Position in the generation queue while waiting for a slot (1 = next)
+  queuePosition?: number | null;
 }
 
 const FileTreeItem: React.FC<{ file: FileItem; depth?: number }> = ({ file, depth = 0 }) => {
@@ -62,7 +64,8 @@ const StatusIndicator: React.FC<{ status: WorkbenchSceneProps['connectionStatus'
 const WorkbenchScene: React.FC<WorkbenchSceneProps> = ({
   files,
   isStreaming,
-  connectionStatus
+  connectionStatus,
+  queuePosition = null
 }) => {
   return (
     <div className="w-full h-full flex flex-col bg-black text-green-400 font-mono">
@@ -75,6 +78,12 @@ const WorkbenchScene: React.FC<WorkbenchSceneProps> = ({
 
         <div className="flex items-center gap-4">
           {isStreaming && <StatusIndicator status={connectionStatus} />}
+          {isStreaming && queuePosition !== null && (
+            <div className="flex items-center gap-2 text-yellow-400 text-sm">
+              <Loader size={16} className="animate-spin" />
+              排队中，前方还有 {queuePosition - 1} 个任务
+            </div>
+          )}
           <div className="text-green-500 text-sm">
             {files.length} 个文件
           </div>
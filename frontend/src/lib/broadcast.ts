@@ -0,0 +1,212 @@
+import { LoggedEvent, formatEvent } from './eventLog';
+
+// One SSE connection subscribed to a project's events.
+//
+// Events are handed over already encoded (the same bytes go to every
+// subscriber). The stream is sized in bytes (highWaterMark); while the
+// controller is under the mark events go straight to it. Past the mark they
+// wait in a per-subscriber queue, drained from the stream's pull():
+//
+// - queued events with the same coalesce key (model chunks of one phase,
+//   content updates of one file) are merged into a single event, as long as no
+//   lifecycle event sits between them;
+// - when the queue is over its event or byte limit, the oldest droppable event
+//   (model chunks, heartbeats) is discarded. File content and lifecycle events
+//   are never dropped: a hole in a file could not be noticed by the client.
+
+export type StreamController = ReadableStreamDefaultController;
+
+export interface OutgoingEvent {
+  bytes: Uint8Array;
+  droppable: boolean;
+  // Logged entry and parsed payload, needed to re-encode a merged event
+  entry?: LoggedEvent;
+  payload?: { content: string } & Record<string, unknown>;
+  coalesceKey?: string | null;
+}
+
+export interface SubscriberOptions {
+  highWaterMark: number;
+  maxQueuedEvents: number;
+  maxQueuedBytes: number;
+}
+
+export interface SubscriberStats {
+  id: number;
+  project_id: string;
+  connected_at: string;
+  queued_events: number;
+  queued_bytes: number;
+  buffered_bytes: number;
+  sent_bytes: number;
+  coalesced: number;
+  dropped: number;
+}
+
+interface QueuedEvent {
+  event: OutgoingEvent;
+  // Content of events merged into this one, in order (null if not merged)
+  parts: string[] | null;
+  size: number;
+}
+
+let nextSubscriberId = 1;
+
+export class StreamSubscriber {
+  readonly id = nextSubscriberId++;
+  readonly connectedAt = new Date();
+
+  private queue: QueuedEvent[] = [];
+  private queuedDroppable = 0;
+  private queuedBytes = 0;
+  private closed = false;
+
+  sentBytes = 0;
+  coalesced = 0;
+  dropped = 0;
+
+  constructor(
+    readonly projectId: string,
+    readonly controller: StreamController,
+    private readonly options: SubscriberOptions
+  ) {}
+
+  get isClosed(): boolean {
+    return this.closed;
+  }
+
+  get queued(): number {
+    return this.queue.length;
+  }
+
+  // Bytes enqueued in the controller that the client has not read yet
+  get bufferedBytes(): number {
+    return this.closed ? 0 : Math.max(0, this.options.highWaterMark - (this.controller.desiredSize ?? 0));
+  }
+
+  // Bytes held for this client, in the controller and in our own queue
+  get pendingBytes(): number {
+    return this.bufferedBytes + this.queuedBytes;
+  }
+
+  // Room left before the high-water mark, or null once the connection is gone
+  get desiredSize(): number | null {
+    return this.closed ? null : (this.controller.desiredSize ?? 0) - this.queuedBytes;
+  }
+
+  // Returns false once the connection is closed
+  send(event: OutgoingEvent): boolean {
+    if (this.closed) {
+      return false;
+    }
+
+    if (!this.queue.length && (this.controller.desiredSize ?? 0) > 0) {
+      return this.write(event.bytes);
+    }
+
+    const size = event.bytes.byteLength;
+    // A `replace` update restarts the file, so it must not be appended to the queued one
+    const index = event.payload && !event.payload.replace ? this.mergeTarget(event.coalesceKey) : -1;
+    if (index >= 0) {
+      const [target] = this.queue.splice(index, 1);
+      target.parts = target.parts ?? [target.event.payload!.content];
+      target.parts.push(event.payload!.content);
+      // The merged event carries the newest id, and moves to the end of the queue
+      // so ids stay in order and Last-Event-ID stays accurate
+      target.event = { ...target.event, entry: event.entry };
+      target.size += size;
+      this.queue.push(target);
+      this.queuedBytes += size;
+      this.coalesced++;
+    } else {
+      this.queue.push({ event, parts: null, size });
+      this.queuedBytes += size;
+      if (event.droppable) {
+        this.queuedDroppable++;
+      }
+    }
+
+    while (this.queuedDroppable > 0
+      && (this.queue.length > this.options.maxQueuedEvents || this.queuedBytes > this.options.maxQueuedBytes)) {
+      this.dropOldest();
+    }
+    return true;
+  }
+
+  // Move queued events into the controller while it has room; call from pull()
+  flush(): void {
+    while (this.queue.length && !this.closed && (this.controller.desiredSize ?? 0) > 0) {
+      const next = this.queue.shift()!;
+      this.queuedBytes -= next.size;
+      if (next.event.droppable) {
+        this.queuedDroppable--;
+      }
+      this.write(next.parts ? encodeMerged(next.event, next.parts) : next.event.bytes);
+    }
+  }
+
+  close(): void {
+    this.closed = true;
+    this.queue = [];
+    this.queuedDroppable = 0;
+    this.queuedBytes = 0;
+  }
+
+  stats(): SubscriberStats {
+    return {
+      id: this.id,
+      project_id: this.projectId,
+      connected_at: this.connectedAt.toISOString(),
+      queued_events: this.queue.length,
+      queued_bytes: this.queuedBytes,
+      buffered_bytes: this.bufferedBytes,
+      sent_bytes: this.sentBytes,
+      coalesced: this.coalesced,
+      dropped: this.dropped
+    };
+  }
+
+  // Queued event to merge an event with this key into: the newest one with the
+  // same key, looking past content of other keys and heartbeats but not past
+  // lifecycle events
+  private mergeTarget(key: string | null | undefined): number {
+    if (!key) {
+      return -1;
+    }
+    for (let i = this.queue.length - 1; i >= 0; i--) {
+      const queued = this.queue[i].event;
+      if (queued.coalesceKey === key) {
+        return i;
+      }
+      if (!queued.coalesceKey && !queued.droppable) {
+        return -1;
+      }
+    }
+    return -1;
+  }
+
+  private write(bytes: Uint8Array): boolean {
+    try {
+      this.controller.enqueue(bytes);
+      this.sentBytes += bytes.byteLength;
+      return true;
+    } catch {
+      // Controller already closed: the client is gone
+      this.close();
+      return false;
+    }
+  }
+
+  private dropOldest(): void {
+    const index = this.queue.findIndex(queued => queued.event.droppable);
+    const [removed] = this.queue.splice(index, 1);
+    this.queuedBytes -= removed.size;
+    this.queuedDroppable--;
+    this.dropped += removed.parts ? removed.parts.length : 1;
+  }
+}
+
+function encodeMerged(event: OutgoingEvent, parts: string[]): Uint8Array {
+  const entry = event.entry!;
+  return formatEvent({ ...entry, data: JSON.stringify({ ...event.payload, content: parts.join('') }) });
+}
@@ -0,0 +1,126 @@
+import { createHash } from 'crypto';
+import fs from 'fs/promises';
+import path from 'path';
+import { ensureDirectory, writeFileAtomic } from './fileSystem';
+
+// Per-project checkpoints of completed generation phases.
+//
+// Each completed phase is written to `<project>/.generation/<phase>.md` and
+// recorded in `.generation/manifest.json`, so a generation that failed (or a
+// process that restarted) can be resumed without paying for the earlier
+// phases again. The directory is hidden from the project tree and download.
+
+export const CHECKPOINT_DIR = '.generation';
+
+const MANIFEST_FILE = 'manifest.json';
+const MANIFEST_VERSION = 1;
+
+export interface PhaseCheckpoint {
+  file: string;
+  chars: number;
+  sha256: string;
+  completed_at: string;
+}
+
+export interface CheckpointManifest {
+  version: number;
+  project_id: string;
+  prompt: string;
+  prompt_sha256: string;
+  model: string;
+  phases: Record<string, PhaseCheckpoint>;
+  updated_at: string;
+}
+
+export interface ResumePoint {
+  prompt: string;
+  // Content of the phases that can be skipped, in phase order
+  completed: Record<string, string>;
+}
+
+const sha256 = (text: string) => createHash('sha256').update(text).digest('hex');
+
+function checkpointDir(projectDir: string): string {
+  return path.join(projectDir, CHECKPOINT_DIR);
+}
+
+export async function readManifest(projectDir: string): Promise<CheckpointManifest | null> {
+  try {
+    const manifest: CheckpointManifest = JSON.parse(
+      await fs.readFile(path.join(checkpointDir(projectDir), MANIFEST_FILE), 'utf-8')
+    );
+    return manifest.version === MANIFEST_VERSION ? manifest : null;
+  } catch {
+    return null;
+  }
+}
+
+// Start a fresh manifest for a generation; earlier checkpoints no longer apply
+export async function resetCheckpoints(projectDir: string, projectId: string, prompt: string, model: string): Promise<void> {
+  await writeManifest(projectDir, {
+    version: MANIFEST_VERSION,
+    project_id: projectId,
+    prompt,
+    prompt_sha256: sha256(prompt),
+    model,
+    phases: {},
+    updated_at: new Date().toISOString()
+  });
+}
+
+// Persist a completed phase; the content file is written before the manifest
+// points at it, so a crash in between leaves the previous state intact
+export async function saveCheckpoint(projectDir: string, phase: string, content: string): Promise<void> {
+  const manifest = await readManifest(projectDir);
+  if (!manifest) {
+    throw new Error(`No checkpoint manifest in ${projectDir}`);
+  }
+
+  const file = `${phase}.md`;
+  await writeFileAtomic(path.join(checkpointDir(projectDir), file), content);
+
+  manifest.phases[phase] = {
+    file,
+    chars: content.length,
+    sha256: sha256(content),
+    completed_at: new Date().toISOString()
+  };
+  manifest.updated_at = new Date().toISOString();
+  await writeManifest(projectDir, manifest);
+}
+
+// Completed phases a resumed generation can skip: the longest prefix of
+// `phaseOrder` with an intact checkpoint. A `prompt` that differs from the
+// checkpointed one (or a different model) invalidates them.
+export async function loadResumePoint(
+  projectDir: string,
+  phaseOrder: readonly string[],
+  model: string,
+  prompt?: string
+): Promise<ResumePoint | null> {
+  const manifest = await readManifest(projectDir);
+  if (!manifest || manifest.model !== model || (prompt && sha256(prompt) !== manifest.prompt_sha256)) {
+    return null;
+  }
+
+  const completed: Record<string, string> = {};
+  for (const phase of phaseOrder) {
+    const checkpoint = manifest.phases[phase];
+    if (!checkpoint) {
+      break;
+    }
+    const content = await fs.readFile(path.join(checkpointDir(projectDir), checkpoint.file), 'utf-8').catch(() => null);
+    if (content === null || sha256(content) !== checkpoint.sha256) {
+      break;
+    }
+    completed[phase] = content;
+  }
+
+  return { prompt: manifest.prompt, completed };
+}
+
+async function writeManifest(projectDir: string, manifest: CheckpointManifest): Promise<void> {
+  const dir = checkpointDir(projectDir);
+  await ensureDirectory(dir);
+  await writeFileAtomic(path.join(dir, MANIFEST_FILE), JSON.stringify(manifest, null, 2));
+}
@@ -0,0 +1,180 @@
+import fs from 'fs';
+import path from 'path';
+import readline from 'readline';
+import { config } from '../../env.config';
+import { logger } from './logger';
+
+// Per-project log of generation events so a client that connects late or
+// reconnects can be replayed what it missed (SSE `id:` / `Last-Event-ID`).
+//
+// Events live in a bounded ring buffer. With config.streaming.eventLogDir set,
+// every event is also appended to `<eventLogDir>/<projectId>.ndjson`, so a
+// replay can reach back past what the ring still holds.
+//
+// Ids are consecutive within a log and never reused across logs: each log
+// starts past every id issued before it, seeded from the clock so ids from
+// before a restart are left behind too. A Last-Event-ID from an expired log is
+// then below the current log's first id and cannot be mistaken for one of its
+// events.
+
+export interface LoggedEvent {
+  id: number;
+  event: string;
+  data: string;
+}
+
+const encoder = new TextEncoder();
+
+const globalIds = globalThis as typeof globalThis & { __specliteEventIds?: { last: number } };
+
+// Highest id handed out by any log in this process
+const issued = globalIds.__specliteEventIds ?? (globalIds.__specliteEventIds = { last: 0 });
+
+function firstIdForNewLog(): number {
+  // Milliseconds x 1000 stays well inside Number.MAX_SAFE_INTEGER
+  return Math.max(Date.now() * 1000, issued.last + 1);
+}
+
+export function formatEvent(entry: LoggedEvent): Uint8Array {
+  return encoder.encode(`id: ${entry.id}\nevent: ${entry.event}\ndata: ${entry.data}\n\n`);
+}
+
+export class ProjectEventLog {
+  private readonly ring: (LoggedEvent | undefined)[];
+  private head = 0;
+  private size = 0;
+  // Id of the first event this log hands out
+  readonly firstId = firstIdForNewLog();
+  private nextId = this.firstId;
+  private spill: fs.WriteStream | null = null;
+  private retentionTimer: NodeJS.Timeout | null = null;
+
+  // Id of the first event of the generation in progress (null when idle)
+  generationStartId: number | null = null;
+
+  constructor(
+    readonly projectId: string,
+    private readonly capacity: number,
+    private readonly spillPath: string | null
+  ) {
+    this.ring = new Array(capacity);
+  }
+
+  get lastId(): number {
+    return this.nextId - 1;
+  }
+
+  get oldestId(): number | null {
+    return this.size ? this.ring[(this.head - this.size + this.capacity) % this.capacity]!.id : null;
+  }
+
+  startGeneration(): void {
+    this.generationStartId = this.nextId;
+    this.cancelRetention();
+  }
+
+  endGeneration(onExpire: () => void, retentionMs: number): void {
+    this.generationStartId = null;
+    this.cancelRetention();
+    this.retentionTimer = setTimeout(onExpire, retentionMs);
+    this.retentionTimer.unref?.();
+  }
+
+  append(event: string, data: string): LoggedEvent {
+    const entry = { id: this.nextId++, event, data };
+    issued.last = Math.max(issued.last, entry.id);
+
+    this.ring[this.head] = entry;
+    this.head = (this.head + 1) % this.capacity;
+    this.size = Math.min(this.size + 1, this.capacity);
+
+    if (this.spillPath) {
+      if (!this.spill) {
+        // A file left by an earlier log holds ids that no longer apply, so it is truncated
+        fs.mkdirSync(path.dirname(this.spillPath), { recursive: true });
+        this.spill = fs.createWriteStream(this.spillPath, { flags: 'w' });
+        this.spill.on('error', error => {
+          logger.error('EVENT_LOG', 'Spill file failed', { projectId: this.projectId, error });
+          this.spill = null;
+        });
+      }
+      this.spill?.write(JSON.stringify(entry) + '\n');
+    }
+
+    return entry;
+  }
+
+  // Events with id > afterId still in the ring; null if some of them were already evicted
+  fromRing(afterId: number): LoggedEvent[] | null {
+    const oldest = this.oldestId;
+    if (oldest === null || afterId >= this.lastId) {
+      return [];
+    }
+    if (afterId + 1 < oldest) {
+      return null;
+    }
+
+    const events: LoggedEvent[] = [];
+    for (let i = this.size - (this.lastId - afterId); i < this.size; i++) {
+      events.push(this.ring[(this.head - this.size + i + this.capacity) % this.capacity]!);
+    }
+    return events;
+  }
+
+  // Events with id > afterId, reading the spill file for anything the ring evicted.
+  // Returns null when the gap cannot be filled.
+  async since(afterId: number): Promise<LoggedEvent[] | null> {
+    const fromRing = this.fromRing(afterId);
+    if (fromRing !== null || !this.spillPath) {
+      return fromRing;
+    }
+
+    const oldest = this.oldestId!;
+    const older: LoggedEvent[] = [];
+    try {
+      const lines = readline.createInterface({ input: fs.createReadStream(this.spillPath, 'utf-8'), crlfDelay: Infinity });
+      for await (const line of lines) {
+        if (!line) {
+          continue;
+        }
+        const entry: LoggedEvent = JSON.parse(line);
+        if (entry.id > afterId && entry.id < oldest) {
+          older.push(entry);
+        }
+      }
+    } catch (error) {
+      logger.error('EVENT_LOG', 'Failed to read spill file', { projectId: this.projectId, error });
+      return null;
+    }
+
+    if (!older.length || older[0].id !== afterId + 1) {
+      return null;
+    }
+
+    // Anything appended while the file was being read is still in the ring
+    const tail = this.fromRing(older[older.length - 1].id);
+    return tail === null ? null : older.concat(tail);
+  }
+
+  close(): void {
+    this.cancelRetention();
+    if (this.spill) {
+      const spillPath = this.spillPath!;
+      this.spill.end(() => fs.rm(spillPath, { force: true }, () => {}));
+      this.spill = null;
+    }
+  }
+
+  private cancelRetention(): void {
+    if (this.retentionTimer) {
+      clearTimeout(this.retentionTimer);
+      this.retentionTimer = null;
+    }
+  }
+}
+
+export function createEventLog(projectId: string): ProjectEventLog {
+  const { eventLogCapacity, eventLogDir } = config.streaming;
+  const spillPath = eventLogDir ? path.join(eventLogDir, `${encodeURIComponent(projectId)}.ndjson`) : null;
+  return new ProjectEventLog(projectId, Math.max(1, eventLogCapacity), spillPath);
+}
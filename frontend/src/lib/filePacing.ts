@@ -0,0 +1,98 @@
+import { config } from '../../env.config';
+
+// Pacing for file_content_update events sent after generation finishes.
+//
+//   none          - no added latency: the file goes out in maxChunkChars slices back to back
+//   fixed-rate    - typing animation at charsPerSecond, one chunk per frameMs
+//   frame-budget  - like fixed-rate, but frames where the client is behind
+//                   (desiredSize <= 0) are skipped and their characters are
+//                   coalesced into the next chunk; a client that stays behind
+//                   for maxStallMs gets the rest unpaced, left to its
+//                   subscriber queue
+export type FilePacingMode = 'none' | 'fixed-rate' | 'frame-budget';
+
+export interface FilePacingOptions {
+  mode: FilePacingMode;
+  charsPerSecond: number;
+  frameMs: number;
+  maxChunkChars: number;
+  maxStallMs: number;
+}
+
+export interface PacedChunk {
+  content: string;
+  offset: number;
+}
+
+const PACING_MODES: FilePacingMode[] = ['none', 'fixed-rate', 'frame-budget'];
+
+export function getFilePacingOptions(): FilePacingOptions {
+  const { filePacing, charsPerSecond, frameMs, maxChunkChars, maxStallMs } = config.streaming;
+  const mode = PACING_MODES.includes(filePacing as FilePacingMode) ? filePacing as FilePacingMode : 'none';
+
+  return {
+    mode,
+    charsPerSecond: Math.max(1, charsPerSecond),
+    frameMs: Math.max(1, frameMs),
+    maxChunkChars: Math.max(1, maxChunkChars),
+    maxStallMs: Math.max(0, maxStallMs)
+  };
+}
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+function* sliceFrom(content: string, start: number, maxChunkChars: number): Generator<PacedChunk> {
+  for (let offset = start; offset < content.length; offset += maxChunkChars) {
+    yield { content: content.slice(offset, offset + maxChunkChars), offset };
+  }
+}
+
+// Yield the content in chunks according to the pacing mode. `desiredSize`
+// reports the SSE controller's remaining queue capacity (null when unknown).
+export async function* paceFileContent(
+  content: string,
+  desiredSize: () => number | null,
+  options: FilePacingOptions = getFilePacingOptions(),
+  signal?: AbortSignal
+): AsyncGenerator<PacedChunk> {
+  if (options.mode === 'none') {
+    yield* sliceFrom(content, 0, options.maxChunkChars);
+    return;
+  }
+
+  const startedAt = Date.now();
+  let offset = 0;
+  let stalledSince: number | null = null;
+
+  while (offset < content.length) {
+    if (signal?.aborted) {
+      return;
+    }
+
+    // Characters owed by now; late timers and skipped frames are made up in one chunk
+    const due = Math.floor((Date.now() - startedAt) * options.charsPerSecond / 1000) - offset;
+    const size = Math.min(due, options.maxChunkChars, content.length - offset);
+
+    const queued = desiredSize();
+    const clientBehind = options.mode === 'frame-budget' && queued !== null && queued <= 0;
+
+    if (!clientBehind) {
+      stalledSince = null;
+    } else if (stalledSince === null) {
+      stalledSince = Date.now();
+    } else if (Date.now() - stalledSince >= options.maxStallMs) {
+      // The client is not reading: stop waiting for it
+      yield* sliceFrom(content, offset, options.maxChunkChars);
+      return;
+    }
+
+    if (!clientBehind && due > 0) {
+      yield { content: content.slice(offset, offset + size), offset };
+      offset += size;
+    }
+
+    if (offset < content.length) {
+      await sleep(options.frameMs);
+    }
+  }
+}
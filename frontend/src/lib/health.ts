@@ -0,0 +1,205 @@
+import fs from 'fs/promises';
+import path from 'path';
+import { config } from '../../env.config';
+import { minimaxClient } from './minimax';
+import { logger } from './logger';
+import { metrics } from './metrics';
+
+// Background health checks with cached results.
+//
+// The expensive checks (a probe write to the projects root, a MiniMax round
+// trip) run on their own intervals, off the request path; /api/health and the
+// liveness/readiness probes only read the cached results, so load balancers can
+// poll as often as they like without touching the disk or the model API.
+//
+// Critical checks gate readiness. A failing non-critical check, or a result
+// that has not been refreshed for a while, only marks the service degraded.
+
+export type HealthStatus = 'healthy' | 'degraded' | 'unhealthy';
+
+export interface CheckResult {
+  // null until the first run has finished
+  healthy: boolean | null;
+  critical: boolean;
+  stale: boolean;
+  checked_at: string | null;
+  age_ms: number | null;
+  duration_ms: number | null;
+  error?: string;
+  details?: Record<string, unknown>;
+}
+
+export interface HealthReport {
+  status: HealthStatus;
+  ready: boolean;
+  checks: Record<string, CheckResult>;
+}
+
+interface HealthCheck {
+  name: string;
+  critical: boolean;
+  intervalMs: number;
+  // Resolves with details when healthy, throws when not
+  run: () => Promise<Record<string, unknown>>;
+}
+
+interface CachedResult {
+  healthy: boolean;
+  checkedAt: number;
+  durationMs: number;
+  error?: string;
+  details?: Record<string, unknown>;
+}
+
+interface MonitorState {
+  checks: HealthCheck[];
+  results: Map<string, CachedResult>;
+  running: Set<string>;
+  timers: NodeJS.Timeout[];
+  // First run of the critical checks, awaited once by the first probe
+  initial: Promise<void>;
+}
+
+async function checkFilesystem(): Promise<Record<string, unknown>> {
+  const projectsRoot = path.resolve(config.system.projectsRoot);
+
+  // Probe file per process so concurrent instances do not trip over each other
+  const probe = path.join(projectsRoot, `.health-check-${process.pid}`);
+  await fs.writeFile(probe, 'ok', 'utf-8');
+  await fs.unlink(probe);
+
+  const entries = await fs.readdir(projectsRoot, { withFileTypes: true });
+  return {
+    writable: true,
+    projects: entries.filter(entry => entry.isDirectory() && !entry.name.startsWith('.')).length
+  };
+}
+
+async function checkMinimax(): Promise<Record<string, unknown>> {
+  if (!(await minimaxClient.testConnection())) {
+    throw new Error('MiniMax connection test failed');
+  }
+  return { connected: true };
+}
+
+function buildChecks(): HealthCheck[] {
+  const { intervalMs, minimaxIntervalMs, minimaxEnabled } = config.health;
+  const checks: HealthCheck[] = [
+    { name: 'filesystem', critical: true, intervalMs, run: checkFilesystem }
+  ];
+  if (minimaxEnabled) {
+    checks.push({ name: 'minimax', critical: false, intervalMs: minimaxIntervalMs, run: checkMinimax });
+  }
+  return checks;
+}
+
+function withTimeout<T>(promise: Promise<T>, ms: number): Promise<T> {
+  let timer: NodeJS.Timeout | undefined;
+  const timeout = new Promise<never>((_, reject) => {
+    timer = setTimeout(() => reject(new Error(`Timed out after ${ms}ms`)), ms);
+  });
+  return Promise.race([promise, timeout]).finally(() => clearTimeout(timer));
+}
+
+async function runCheck(state: MonitorState, check: HealthCheck): Promise<void> {
+  // A slow check is not started again until the previous run settles
+  if (state.running.has(check.name)) {
+    return;
+  }
+  state.running.add(check.name);
+
+  const startedAt = performance.now();
+  let result: CachedResult;
+  try {
+    const details = await withTimeout(check.run(), config.health.timeoutMs);
+    result = { healthy: true, checkedAt: Date.now(), durationMs: performance.now() - startedAt, details };
+  } catch (error) {
+    result = {
+      healthy: false,
+      checkedAt: Date.now(),
+      durationMs: performance.now() - startedAt,
+      error: error instanceof Error ? error.message : String(error)
+    };
+  } finally {
+    state.running.delete(check.name);
+  }
+
+  const previous = state.results.get(check.name);
+  if (previous?.healthy !== result.healthy) {
+    const level = result.healthy ? 'info' : 'warn';
+    logger[level]('HEALTH', `Check ${check.name} is ${result.healthy ? 'passing' : 'failing'}`, {
+      durationMs: Math.round(result.durationMs),
+      error: result.error
+    });
+  }
+  state.results.set(check.name, result);
+  metrics.healthCheckUp.set(result.healthy ? 1 : 0, { check: check.name });
+}
+
+function startMonitor(): MonitorState {
+  const checks = buildChecks();
+  const state: MonitorState = {
+    checks,
+    results: new Map(),
+    running: new Set(),
+    timers: [],
+    initial: Promise.resolve()
+  };
+
+  const initialRuns = checks.map(check => runCheck(state, check));
+  state.initial = Promise.all(initialRuns.filter((_, i) => checks[i].critical)).then(() => {});
+
+  for (const check of checks) {
+    const timer = setInterval(() => void runCheck(state, check), check.intervalMs);
+    timer.unref?.();
+    state.timers.push(timer);
+  }
+  return state;
+}
+
+const globalHealth = globalThis as typeof globalThis & { __specliteHealth?: MonitorState };
+
+function monitor(): MonitorState {
+  return globalHealth.__specliteHealth ?? (globalHealth.__specliteHealth = startMonitor());
+}
+
+// Resolves once the critical checks have a first result; immediately after that
+export function healthChecksReady(): Promise<void> {
+  return monitor().initial;
+}
+
+export function getHealthReport(now = Date.now()): HealthReport {
+  const state = monitor();
+  const checks: Record<string, CheckResult> = {};
+  let ready = true;
+  let degraded = false;
+
+  for (const check of state.checks) {
+    const cached = state.results.get(check.name);
+    // Missing two refreshes in a row means the background loop is stuck
+    const stale = !cached || now - cached.checkedAt > check.intervalMs * 2 + config.health.timeoutMs;
+
+    checks[check.name] = {
+      healthy: cached?.healthy ?? null,
+      critical: check.critical,
+      stale,
+      checked_at: cached ? new Date(cached.checkedAt).toISOString() : null,
+      age_ms: cached ? now - cached.checkedAt : null,
+      duration_ms: cached ? Math.round(cached.durationMs) : null,
+      ...(cached?.error ? { error: cached.error } : {}),
+      ...(cached?.details ? { details: cached.details } : {})
+    };
+
+    if (check.critical && !cached?.healthy) {
+      ready = false;
+    } else if (!cached?.healthy || stale) {
+      degraded = true;
+    }
+  }
+
+  return {
+    status: !ready ? 'unhealthy' : degraded ? 'degraded' : 'healthy',
+    ready,
+    checks
+  };
+}
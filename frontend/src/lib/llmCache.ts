@@ -0,0 +1,268 @@
+import { createHash } from 'crypto';
+import fs from 'fs/promises';
+import path from 'path';
+import { config } from '../../env.config';
+import { logger } from './logger';
+
+// Opt-in on-disk cache of streamed model responses, one entry per phase call.
+//
+// Entries are keyed by a SHA-256 of (phase, full rendered prompt, model
+// parameters) and hold every streamed chunk with its offset from the start of
+// the stream, so a hit can be replayed at full speed or at the recorded pace.
+// Total size is capped (LLM_CACHE_MAX_BYTES); least recently used entries are
+// evicted first. Only complete streams are stored.
+
+export type CacheReplayMode = 'fast' | 'recorded';
+
+export interface LlmCacheOptions {
+  enabled: boolean;
+  dir: string;
+  maxBytes: number;
+  replay: CacheReplayMode;
+}
+
+export interface LlmCacheMetrics {
+  enabled: boolean;
+  replay: CacheReplayMode;
+  entries: number;
+  bytes: number;
+  max_bytes: number;
+  hits: number;
+  misses: number;
+  writes: number;
+  evictions: number;
+  errors: number;
+}
+
+// Parameters that change the model output besides the prompt
+export interface CacheKeyParams {
+  phase: string;
+  prompt: string;
+  model: string;
+  [param: string]: unknown;
+}
+
+interface RecordedChunk<T> {
+  t: number;
+  chunk: T;
+}
+
+interface CacheEntry<T> {
+  key: Omit<CacheKeyParams, 'prompt'>;
+  created_at: string;
+  duration_ms: number;
+  chunks: RecordedChunk<T>[];
+}
+
+interface CacheState {
+  // hash -> size in bytes; Map order is least to most recently used
+  index: Map<string, number> | null;
+  loading: Promise<Map<string, number>> | null;
+  bytes: number;
+  counters: Pick<LlmCacheMetrics, 'hits' | 'misses' | 'writes' | 'evictions' | 'errors'>;
+}
+
+const REPLAY_MODES: CacheReplayMode[] = ['fast', 'recorded'];
+
+export function getLlmCacheOptions(): LlmCacheOptions {
+  const { enabled, dir, maxBytes, replay } = config.llmCache;
+  return {
+    enabled,
+    dir: path.resolve(dir),
+    maxBytes: Math.max(0, maxBytes),
+    replay: REPLAY_MODES.includes(replay as CacheReplayMode) ? replay as CacheReplayMode : 'fast'
+  };
+}
+
+const globalCache = globalThis as typeof globalThis & { __specliteLlmCache?: CacheState };
+
+const state: CacheState = globalCache.__specliteLlmCache ?? (globalCache.__specliteLlmCache = {
+  index: null,
+  loading: null,
+  bytes: 0,
+  counters: { hits: 0, misses: 0, writes: 0, evictions: 0, errors: 0 }
+});
+
+export function cacheKey(params: CacheKeyParams): string {
+  // Sorted keys so the hash does not depend on property order
+  const canonical = JSON.stringify(params, Object.keys(params).sort());
+  return createHash('sha256').update(canonical).digest('hex');
+}
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Stream from the cache on a hit; otherwise stream from `generate()` and store
+// the result once it completes
+export async function* cachedStream<T>(
+  params: CacheKeyParams,
+  generate: () => AsyncIterable<T>,
+  options: LlmCacheOptions = getLlmCacheOptions()
+): AsyncGenerator<T> {
+  if (!options.enabled) {
+    yield* generate();
+    return;
+  }
+
+  const hash = cacheKey(params);
+  const entry = await readEntry<T>(options, hash);
+
+  if (entry) {
+    state.counters.hits++;
+    const startedAt = Date.now();
+    for (const { t, chunk } of entry.chunks) {
+      if (options.replay === 'recorded') {
+        const wait = t - (Date.now() - startedAt);
+        if (wait > 0) {
+          await sleep(wait);
+        }
+      }
+      yield chunk;
+    }
+    return;
+  }
+
+  state.counters.misses++;
+  const startedAt = Date.now();
+  const chunks: RecordedChunk<T>[] = [];
+
+  // Anything that ends the loop early (error, consumer stopping) skips the write
+  for await (const chunk of generate()) {
+    chunks.push({ t: Date.now() - startedAt, chunk });
+    yield chunk;
+  }
+
+  const { prompt: _prompt, ...key } = params;
+  await writeEntry(options, hash, {
+    key,
+    created_at: new Date().toISOString(),
+    duration_ms: Date.now() - startedAt,
+    chunks
+  });
+}
+
+export function getLlmCacheMetrics(): LlmCacheMetrics {
+  const options = getLlmCacheOptions();
+  return {
+    enabled: options.enabled,
+    replay: options.replay,
+    entries: state.index?.size ?? 0,
+    bytes: state.bytes,
+    max_bytes: options.maxBytes,
+    ...state.counters
+  };
+}
+
+function entryPath(options: LlmCacheOptions, hash: string): string {
+  return path.join(options.dir, `${hash}.json`);
+}
+
+// Index of the cache directory, built once from file sizes and mtimes
+// (mtime is bumped on every hit, so it doubles as the last-used time)
+async function loadIndex(options: LlmCacheOptions): Promise<Map<string, number>> {
+  if (state.index) {
+    return state.index;
+  }
+
+  state.loading = state.loading ?? (async () => {
+    const found: { hash: string; size: number; used: number }[] = [];
+    try {
+      for (const name of await fs.readdir(options.dir)) {
+        if (!name.endsWith('.json')) {
+          continue;
+        }
+        const stats = await fs.stat(path.join(options.dir, name)).catch(() => null);
+        if (stats?.isFile()) {
+          found.push({ hash: name.slice(0, -'.json'.length), size: stats.size, used: stats.mtimeMs });
+        }
+      }
+    } catch (error) {
+      if ((error as NodeJS.ErrnoException).code !== 'ENOENT') {
+        throw error;
+      }
+    }
+
+    found.sort((a, b) => a.used - b.used);
+    const index = new Map(found.map(({ hash, size }) => [hash, size] as [string, number]));
+    state.bytes = found.reduce((total, { size }) => total + size, 0);
+    state.index = index;
+    return index;
+  })();
+
+  try {
+    return await state.loading;
+  } finally {
+    state.loading = null;
+  }
+}
+
+async function readEntry<T>(options: LlmCacheOptions, hash: string): Promise<CacheEntry<T> | null> {
+  try {
+    const index = await loadIndex(options);
+    const size = index.get(hash);
+    if (size === undefined) {
+      return null;
+    }
+
+    const file = entryPath(options, hash);
+    const entry: CacheEntry<T> = JSON.parse(await fs.readFile(file, 'utf-8'));
+
+    // Most recently used goes to the end of the map, and of the mtime order on disk
+    index.delete(hash);
+    index.set(hash, size);
+    const now = new Date();
+    fs.utimes(file, now, now).catch(() => {});
+    return entry;
+  } catch (error) {
+    state.counters.errors++;
+    logger.error('LLM_CACHE', 'Failed to read entry', { hash, error });
+    await removeEntry(options, hash);
+    return null;
+  }
+}
+
+async function writeEntry<T>(options: LlmCacheOptions, hash: string, entry: CacheEntry<T>): Promise<void> {
+  try {
+    const index = await loadIndex(options);
+    const data = JSON.stringify(entry);
+    const size = Buffer.byteLength(data, 'utf-8');
+    if (size > options.maxBytes) {
+      return;
+    }
+
+    await fs.mkdir(options.dir, { recursive: true });
+    const file = entryPath(options, hash);
+    const tempFile = `${file}.${process.pid}.tmp`;
+    await fs.writeFile(tempFile, data, 'utf-8');
+    await fs.rename(tempFile, file);
+
+    state.bytes += size - (index.get(hash) ?? 0);
+    index.delete(hash);
+    index.set(hash, size);
+    state.counters.writes++;
+
+    await evict(options, index);
+  } catch (error) {
+    state.counters.errors++;
+    logger.error('LLM_CACHE', 'Failed to write entry', { hash, error });
+  }
+}
+
+// Drop least recently used entries until the cache fits in maxBytes
+async function evict(options: LlmCacheOptions, index: Map<string, number>): Promise<void> {
+  for (const hash of index.keys()) {
+    if (state.bytes <= options.maxBytes) {
+      break;
+    }
+    await removeEntry(options, hash);
+    state.counters.evictions++;
+  }
+}
+
+async function removeEntry(options: LlmCacheOptions, hash: string): Promise<void> {
+  const size = state.index?.get(hash);
+  if (size !== undefined) {
+    state.index!.delete(hash);
+    state.bytes -= size;
+  }
+  await fs.rm(entryPath(options, hash), { force: true }).catch(() => {});
+}
@@ -0,0 +1,243 @@
+import fs from 'fs';
+import { config } from '../../env.config';
+
+// Structured, leveled logging that stays off the request path.
+//
+// A log call only checks the level and pushes a record into a fixed-size ring
+// buffer; formatting and writing happen later, in batches (every flushMs, or
+// sooner once the buffer is half full or an error is logged). When the buffer
+// overflows the oldest records are dropped and counted.
+//
+// High-frequency categories (model chunks, heartbeats) are sampled: guard the
+// call with `logger.sample(category)`, which counts every occurrence and lets
+// one in N through, so the totals stay visible without the per-chunk cost:
+//
+//   if (logger.sample('chunk')) {
+//     logger.debug('chunk', 'Minimax chunk', { projectId, length });
+//   }
+//
+// Record data is serialized at flush time, so do not mutate it after logging.
+
+export type LogLevel = 'debug' | 'info' | 'warn' | 'error';
+
+const LEVELS: Record<LogLevel | 'silent', number> = { debug: 10, info: 20, warn: 30, error: 40, silent: 100 };
+
+interface LogRecord {
+  time: number;
+  level: LogLevel;
+  category: string;
+  message: string;
+  data?: unknown;
+}
+
+interface SampleCounter {
+  every: number;
+  seen: number;
+  emitted: number;
+}
+
+export interface LogStats {
+  level: string;
+  buffered: number;
+  written: number;
+  dropped: number;
+  flushes: number;
+  sampled: Record<string, { every: number; seen: number; emitted: number }>;
+}
+
+interface LoggerState {
+  threshold: number;
+  format: 'json' | 'pretty';
+  ring: (LogRecord | undefined)[];
+  head: number;
+  size: number;
+  samples: Map<string, SampleCounter>;
+  sampleEvery: Record<string, number>;
+  file: fs.WriteStream | null;
+  timer: NodeJS.Timeout | null;
+  written: number;
+  dropped: number;
+  flushes: number;
+}
+
+function parseSampling(spec: string): Record<string, number> {
+  const every: Record<string, number> = {};
+  for (const part of spec.split(',')) {
+    const [category, value] = part.split('=').map(item => item.trim());
+    if (category && Number(value) >= 1) {
+      every[category] = Math.floor(Number(value));
+    }
+  }
+  return every;
+}
+
+function createState(): LoggerState {
+  const { level, format, bufferSize, sampling, file } = config.logging;
+  const state: LoggerState = {
+    threshold: LEVELS[level as LogLevel | 'silent'] ?? LEVELS.info,
+    format: format === 'json' ? 'json' : 'pretty',
+    ring: new Array(Math.max(16, bufferSize)),
+    head: 0,
+    size: 0,
+    samples: new Map(),
+    sampleEvery: parseSampling(sampling),
+    file: file ? fs.createWriteStream(file, { flags: 'a' }) : null,
+    timer: null,
+    written: 0,
+    dropped: 0,
+    flushes: 0
+  };
+
+  // Last-chance synchronous flush; anything still buffered would be lost otherwise
+  process.once('exit', () => flushLogs(true));
+  return state;
+}
+
+const globalLogger = globalThis as typeof globalThis & { __specliteLogger?: LoggerState };
+
+const state: LoggerState = globalLogger.__specliteLogger ?? (globalLogger.__specliteLogger = createState());
+
+function isEnabled(level: LogLevel): boolean {
+  return LEVELS[level] >= state.threshold;
+}
+
+function write(level: LogLevel, category: string, message: string, data?: unknown): void {
+  if (LEVELS[level] < state.threshold) {
+    return;
+  }
+
+  const capacity = state.ring.length;
+  state.ring[state.head] = { time: Date.now(), level, category, message, data };
+  state.head = (state.head + 1) % capacity;
+  if (state.size === capacity) {
+    state.dropped++;
+  } else {
+    state.size++;
+  }
+
+  if (level === 'error' || state.size >= capacity / 2) {
+    scheduleFlush(0);
+  } else {
+    scheduleFlush(config.logging.flushMs);
+  }
+}
+
+function scheduleFlush(delayMs: number): void {
+  if (state.timer) {
+    if (delayMs > 0) {
+      return;
+    }
+    clearTimeout(state.timer);
+  }
+  state.timer = setTimeout(() => flushLogs(false), delayMs);
+  state.timer.unref?.();
+}
+
+// Turn an Error into something JSON.stringify keeps
+function errorReplacer(_key: string, value: unknown): unknown {
+  if (value instanceof Error) {
+    return { name: value.name, message: value.message, stack: value.stack };
+  }
+  return value;
+}
+
+function formatRecord(record: LogRecord): string {
+  if (state.format === 'json') {
+    return JSON.stringify({
+      timestamp: new Date(record.time).toISOString(),
+      level: record.level,
+      category: record.category,
+      message: record.message,
+      data: record.data
+    }, errorReplacer);
+  }
+
+  const data = record.data === undefined ? '' : ` ${JSON.stringify(record.data, errorReplacer)}`;
+  return `${new Date(record.time).toISOString()} ${record.level.toUpperCase().padEnd(5)} [${record.category}] ${record.message}${data}`;
+}
+
+// Write out everything buffered as one batch
+export function flushLogs(sync = false): void {
+  if (state.timer) {
+    clearTimeout(state.timer);
+    state.timer = null;
+  }
+  if (!state.size) {
+    return;
+  }
+
+  const capacity = state.ring.length;
+  const lines: string[] = [];
+  for (let i = state.size; i > 0; i--) {
+    const index = (state.head - i + capacity) % capacity;
+    const record = state.ring[index]!;
+    state.ring[index] = undefined;
+    try {
+      lines.push(formatRecord(record));
+    } catch (error) {
+      lines.push(`${new Date(record.time).toISOString()} ERROR [LOGGER] Failed to format record from ${record.category}: ${error}`);
+    }
+  }
+  state.size = 0;
+  state.written += lines.length;
+  state.flushes++;
+
+  const batch = lines.join('\n') + '\n';
+  if (sync) {
+    if (config.logging.file) {
+      fs.appendFileSync(config.logging.file, batch);
+    } else {
+      fs.writeSync(1, batch);
+    }
+  } else if (state.file) {
+    state.file.write(batch);
+  } else {
+    process.stdout.write(batch);
+  }
+}
+
+export const logger = {
+  debug: (category: string, message: string, data?: unknown) => write('debug', category, message, data),
+  info: (category: string, message: string, data?: unknown) => write('info', category, message, data),
+  warn: (category: string, message: string, data?: unknown) => write('warn', category, message, data),
+  error: (category: string, message: string, data?: unknown) => write('error', category, message, data),
+
+  // Cheap guard for building expensive log data
+  enabled: isEnabled,
+
+  // Count one occurrence of a high-frequency category; true for the one in N
+  // (LOG_SAMPLE) that should be logged. Always false when `level` is disabled.
+  sample(category: string, level: LogLevel = 'debug'): boolean {
+    let counter = state.samples.get(category);
+    if (!counter) {
+      counter = { every: state.sampleEvery[category] ?? 1, seen: 0, emitted: 0 };
+      state.samples.set(category, counter);
+    }
+    if (counter.seen++ % counter.every !== 0 || LEVELS[level] < state.threshold) {
+      return false;
+    }
+    counter.emitted++;
+    return true;
+  }
+};
+
+// Kept for existing callers: an info-level record
+export function log(category: string, message: string, data?: unknown): void {
+  write('info', category, message, data);
+}
+
+export function getLogStats(): LogStats {
+  const sampled: LogStats['sampled'] = {};
+  for (const [category, counter] of state.samples) {
+    sampled[category] = { ...counter };
+  }
+  const level = (Object.keys(LEVELS) as (keyof typeof LEVELS)[]).find(name => LEVELS[name] === state.threshold) ?? 'info';
+  return {
+    level,
+    buffered: state.size,
+    written: state.written,
+    dropped: state.dropped,
+    flushes: state.flushes,
+    sampled
+  };
+}
@@ -0,0 +1,265 @@
+import { monitorEventLoopDelay, type IntervalHistogram } from 'perf_hooks';
+
+// Minimal Prometheus-style metrics registry: counters, gauges and histograms
+// with fixed buckets, rendered in the text exposition format by /api/metrics.
+//
+// Instruments are created once (kept on globalThis like the store) and updated
+// in place; recording is a map lookup and an addition, so it is safe on hot
+// paths. Pipeline metrics are declared at the bottom of this file.
+
+type Labels = Record<string, string | number>;
+
+interface Metric {
+  render(): string[];
+}
+
+function escapeLabel(value: string | number): string {
+  return String(value).replace(/\\/g, '\\\\').replace(/\n/g, '\\n').replace(/"/g, '\\"');
+}
+
+function formatLabels(names: readonly string[], values: readonly (string | number)[], extra = ''): string {
+  const parts = names.map((name, i) => `${name}="${escapeLabel(values[i])}"`);
+  if (extra) {
+    parts.push(extra);
+  }
+  return parts.length ? `{${parts.join(',')}}` : '';
+}
+
+function formatValue(value: number): string {
+  if (value === Infinity) {
+    return '+Inf';
+  }
+  if (value === -Infinity) {
+    return '-Inf';
+  }
+  return Number.isNaN(value) ? 'NaN' : String(value);
+}
+
+abstract class LabeledMetric<T> implements Metric {
+  protected readonly series = new Map<string, { values: (string | number)[]; data: T }>();
+
+  constructor(
+    readonly name: string,
+    readonly help: string,
+    readonly labelNames: readonly string[] = []
+  ) {}
+
+  protected get(labels?: Labels): T {
+    const values = this.labelNames.map(name => labels?.[name] ?? '');
+    const key = values.join('\u0000');
+    let entry = this.series.get(key);
+    if (!entry) {
+      entry = { values, data: this.create() };
+      this.series.set(key, entry);
+    }
+    return entry.data;
+  }
+
+  protected header(type: string): string[] {
+    return [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} ${type}`];
+  }
+
+  protected abstract create(): T;
+  abstract render(): string[];
+}
+
+export class Counter extends LabeledMetric<{ value: number }> {
+  inc(labels?: Labels, amount = 1): void {
+    this.get(labels).value += amount;
+  }
+
+  protected create() {
+    return { value: 0 };
+  }
+
+  render(): string[] {
+    const lines = this.header('counter');
+    for (const { values, data } of this.series.values()) {
+      lines.push(`${this.name}${formatLabels(this.labelNames, values)} ${formatValue(data.value)}`);
+    }
+    return lines;
+  }
+}
+
+export class Gauge extends LabeledMetric<{ value: number }> {
+  set(value: number, labels?: Labels): void {
+    this.get(labels).value = value;
+  }
+
+  inc(labels?: Labels, amount = 1): void {
+    this.get(labels).value += amount;
+  }
+
+  dec(labels?: Labels, amount = 1): void {
+    this.get(labels).value -= amount;
+  }
+
+  protected create() {
+    return { value: 0 };
+  }
+
+  render(): string[] {
+    const lines = this.header('gauge');
+    for (const { values, data } of this.series.values()) {
+      lines.push(`${this.name}${formatLabels(this.labelNames, values)} ${formatValue(data.value)}`);
+    }
+    return lines;
+  }
+}
+
+interface HistogramData {
+  counts: number[];
+  sum: number;
+  count: number;
+}
+
+export class Histogram extends LabeledMetric<HistogramData> {
+  constructor(name: string, help: string, readonly buckets: readonly number[], labelNames: readonly string[] = []) {
+    super(name, help, labelNames);
+  }
+
+  observe(value: number, labels?: Labels): void {
+    const data = this.get(labels);
+    data.sum += value;
+    data.count++;
+    for (let i = 0; i < this.buckets.length; i++) {
+      if (value <= this.buckets[i]) {
+        data.counts[i]++;
+        break;
+      }
+    }
+  }
+
+  // Returns a function that observes the seconds elapsed since startTimer()
+  startTimer(labels?: Labels): (extraLabels?: Labels) => number {
+    const startedAt = performance.now();
+    return extraLabels => {
+      const seconds = (performance.now() - startedAt) / 1000;
+      this.observe(seconds, { ...labels, ...extraLabels });
+      return seconds;
+    };
+  }
+
+  protected create(): HistogramData {
+    return { counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+  }
+
+  render(): string[] {
+    const lines = this.header('histogram');
+    for (const { values, data } of this.series.values()) {
+      // Counts are stored per bucket; the exposition format wants them cumulative
+      let cumulative = 0;
+      this.buckets.forEach((bound, i) => {
+        cumulative += data.counts[i];
+        lines.push(`${this.name}_bucket${formatLabels(this.labelNames, values, `le="${formatValue(bound)}"`)} ${cumulative}`);
+      });
+      lines.push(`${this.name}_bucket${formatLabels(this.labelNames, values, 'le="+Inf"')} ${data.count}`);
+      lines.push(`${this.name}_sum${formatLabels(this.labelNames, values)} ${formatValue(data.sum)}`);
+      lines.push(`${this.name}_count${formatLabels(this.labelNames, values)} ${data.count}`);
+    }
+    return lines;
+  }
+}
+
+export class Registry {
+  private readonly metrics = new Map<string, Metric>();
+
+  counter(name: string, help: string, labelNames: readonly string[] = []): Counter {
+    return this.register(name, () => new Counter(name, help, labelNames));
+  }
+
+  gauge(name: string, help: string, labelNames: readonly string[] = []): Gauge {
+    return this.register(name, () => new Gauge(name, help, labelNames));
+  }
+
+  histogram(name: string, help: string, buckets: readonly number[], labelNames: readonly string[] = []): Histogram {
+    return this.register(name, () => new Histogram(name, help, buckets, labelNames));
+  }
+
+  render(): string {
+    const lines: string[] = [];
+    for (const metric of this.metrics.values()) {
+      lines.push(...metric.render());
+    }
+    return lines.join('\n') + '\n';
+  }
+
+  // Re-registering a name returns the existing instrument (dev hot reloads)
+  private register<T extends Metric>(name: string, create: () => T): T {
+    let metric = this.metrics.get(name);
+    if (!metric) {
+      metric = create();
+      this.metrics.set(name, metric);
+    }
+    return metric as T;
+  }
+}
+
+const globalMetrics = globalThis as typeof globalThis & {
+  __specliteMetrics?: { registry: Registry; eventLoop: IntervalHistogram };
+};
+
+const shared = globalMetrics.__specliteMetrics ?? (globalMetrics.__specliteMetrics = (() => {
+  const eventLoop = monitorEventLoopDelay({ resolution: 20 });
+  eventLoop.enable();
+  return { registry: new Registry(), eventLoop };
+})());
+
+export const registry = shared.registry;
+
+const SECONDS_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300];
+const FAST_SECONDS_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5];
+const BYTES_BUCKETS = [1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864];
+const RATE_BUCKETS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000];
+
+export const metrics = {
+  // Generation pipeline
+  generations: registry.counter('speclite_generations_total', 'Generations finished, by outcome', ['outcome']),
+  activeGenerations: registry.gauge('speclite_active_generations', 'Generations running or queued'),
+  queueDepth: registry.gauge('speclite_generation_queue_depth', 'Generations waiting for a scheduler slot'),
+  runningGenerations: registry.gauge('speclite_generation_running', 'Generations holding a scheduler slot'),
+  phaseDuration: registry.histogram('speclite_phase_duration_seconds', 'Duration of a generation phase', SECONDS_BUCKETS, ['phase', 'outcome']),
+  minimaxTtfb: registry.histogram('speclite_minimax_ttfb_seconds', 'Time from the phase request to the first MiniMax text chunk', SECONDS_BUCKETS, ['phase']),
+  minimaxCharsPerSecond: registry.histogram('speclite_minimax_output_chars_per_second', 'MiniMax output rate after the first chunk', RATE_BUCKETS, ['phase']),
+  minimaxChars: registry.counter('speclite_minimax_output_chars_total', 'Characters of MiniMax text output', ['phase']),
+  fileWrite: registry.histogram('speclite_file_write_seconds', 'Time to write (or finish and rename) a generated file', FAST_SECONDS_BUCKETS, ['kind']),
+
+  // SSE
+  sseProjects: registry.gauge('speclite_sse_projects', 'Projects with at least one connected SSE stream'),
+  sseSubscribers: registry.gauge('speclite_sse_subscribers', 'Connected SSE streams'),
+  ssePendingBytes: registry.gauge('speclite_sse_pending_bytes', 'Bytes buffered or queued for SSE clients'),
+  sseEvents: registry.counter('speclite_sse_events_total', 'SSE events published to connected clients (one per subscriber)', ['event']),
+  sseBytes: registry.counter('speclite_sse_bytes_total', 'SSE bytes published to connected clients'),
+
+  // Project routes
+  zipBuild: registry.histogram('speclite_zip_build_seconds', 'Time to build a project ZIP download', SECONDS_BUCKETS),
+  zipBytes: registry.histogram('speclite_zip_bytes', 'Size of project ZIP downloads', BYTES_BUCKETS),
+  treeBuild: registry.histogram('speclite_tree_build_seconds', 'Time to build a project directory tree', FAST_SECONDS_BUCKETS),
+  treeRequests: registry.counter('speclite_tree_requests_total', 'Project tree lookups, by how they were served (cached, joined, built)', ['result']),
+  treeNotModified: registry.counter('speclite_tree_not_modified_total', 'Project tree requests answered 304 Not Modified'),
+
+  // Background health checks
+  healthCheckUp: registry.gauge('speclite_health_check_up', 'Result of the last background health check (1 = passing)', ['check']),
+
+  // Process
+  eventLoopLag: registry.gauge('nodejs_eventloop_lag_seconds', 'Event loop delay since the previous scrape', ['quantile']),
+  eventLoopLagMax: registry.gauge('nodejs_eventloop_lag_max_seconds', 'Maximum event loop delay since the previous scrape'),
+  memory: registry.gauge('nodejs_memory_bytes', 'Process memory usage', ['type'])
+};
+
+// Snapshot process-level gauges; called by /api/metrics before rendering.
+// Event loop delay is measured per scrape interval, so the histogram is reset.
+export function collectProcessMetrics(): void {
+  const { eventLoop } = shared;
+  for (const quantile of [0.5, 0.9, 0.99]) {
+    metrics.eventLoopLag.set(eventLoop.percentile(quantile * 100) / 1e9, { quantile });
+  }
+  metrics.eventLoopLagMax.set(eventLoop.max / 1e9);
+  eventLoop.reset();
+
+  const memory = process.memoryUsage();
+  metrics.memory.set(memory.rss, { type: 'rss' });
+  metrics.memory.set(memory.heapUsed, { type: 'heap_used' });
+  metrics.memory.set(memory.heapTotal, { type: 'heap_total' });
+  metrics.memory.set(memory.external, { type: 'external' });
+}
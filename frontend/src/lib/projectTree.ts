@@ -0,0 +1,289 @@
+import { createHash } from 'crypto';
+import type { Stats } from 'fs';
+import fs from 'fs/promises';
+import path from 'path';
+import { config } from '../../env.config';
+import { CHECKPOINT_DIR } from './checkpoints';
+import { metrics } from './metrics';
+
+// Directory trees for GET /api/projects/[project_id], built in parallel and
+// cached per project.
+//
+// A build walks the project with readdir({ withFileTypes: true }), so only
+// files (for size and creation time) and symlinks need a stat; every readdir
+// and stat goes through one limiter of PROJECT_TREE_CONCURRENCY slots. The
+// cached tree is dropped when the generation pipeline writes to the project
+// (invalidateProjectTree) and otherwise rebuilt after PROJECT_TREE_CACHE_TTL_MS,
+// which picks up changes made outside the pipeline. At most
+// PROJECT_TREE_CACHE_SIZE projects are kept. The ETag is a hash of the
+// tree and its version, so a rebuild that finds nothing new still answers 304.
+//
+// Every change the pipeline makes is also recorded as a tree delta
+// (recordTreeChange) and pushed to clients as a `tree_delta` SSE event. Each
+// delta moves the project's tree version from `base_version` to `version`;
+// clients holding the base version apply it locally and only refetch the full
+// tree when the versions do not line up. Versions are seeded from the clock,
+// so versions from before a restart never match.
+
+export interface FileNode {
+  type: 'file';
+  name: string;
+  path: string;
+  size_bytes: number;
+  created_at: string;
+}
+
+export interface DirectoryNode {
+  type: 'directory';
+  name: string;
+  path: string;
+  children: TreeNode[];
+}
+
+export type TreeNode = FileNode | DirectoryNode;
+
+export interface ProjectTree {
+  project_id: string;
+  version: number;
+  root: DirectoryNode;
+  total_files: number;
+  generated_at: string;
+}
+
+export interface CachedProjectTree {
+  tree: ProjectTree;
+  etag: string;
+  builtAt: number;
+}
+
+// Files added or changed by the pipeline; parent directories are implied
+export interface TreeDeltaFile {
+  path: string;
+  size_bytes: number;
+  created_at?: string;
+}
+
+export interface TreeChange {
+  added?: TreeDeltaFile[];
+  removed?: string[];
+  resized?: TreeDeltaFile[];
+}
+
+export interface TreeDelta {
+  base_version: number;
+  version: number;
+  added: TreeDeltaFile[];
+  removed: string[];
+  resized: TreeDeltaFile[];
+}
+
+interface TreeCacheState {
+  entries: Map<string, CachedProjectTree>;
+  // Builds in progress, shared by concurrent requests for the same project
+  building: Map<string, { promise: Promise<CachedProjectTree>; generation: number }>;
+  // Bumped on every invalidation; a build only caches its result if no
+  // invalidation happened while it was running
+  generations: Map<string, number>;
+  versions: Map<string, number>;
+}
+
+// Suffix of files the pipeline is still streaming to disk; renamed when complete
+export const PARTIAL_FILE_SUFFIX = '.partial';
+
+type Limiter = <T>(task: () => Promise<T>) => Promise<T>;
+
+function createLimiter(concurrency: number): Limiter {
+  let active = 0;
+  const waiting: (() => void)[] = [];
+
+  return async task => {
+    if (active >= concurrency) {
+      // The slot is handed over by the finishing task, `active` stays the same
+      await new Promise<void>(resolve => waiting.push(resolve));
+    } else {
+      active++;
+    }
+    try {
+      return await task();
+    } finally {
+      const next = waiting.shift();
+      if (next) {
+        next();
+      } else {
+        active--;
+      }
+    }
+  };
+}
+
+function isMissing(error: unknown): boolean {
+  return (error as NodeJS.ErrnoException)?.code === 'ENOENT';
+}
+
+function fileNode(name: string, relativePath: string, stats: Stats): FileNode {
+  return {
+    type: 'file',
+    name,
+    path: relativePath,
+    size_bytes: stats.size,
+    created_at: stats.birthtime.toISOString()
+  };
+}
+
+async function buildDirectory(projectDir: string, relativePath: string, limit: Limiter): Promise<DirectoryNode> {
+  const dirPath = relativePath ? path.join(projectDir, relativePath) : projectDir;
+  const entries = await limit(() => fs.readdir(dirPath, { withFileTypes: true }));
+
+  const children = await Promise.all(entries.map(async (entry): Promise<TreeNode | null> => {
+    // Generation checkpoints and files still being streamed are internal state
+    if ((!relativePath && entry.name === CHECKPOINT_DIR) || entry.name.endsWith(PARTIAL_FILE_SUFFIX)) {
+      return null;
+    }
+    const childPath = relativePath ? path.join(relativePath, entry.name) : entry.name;
+
+    try {
+      if (entry.isDirectory()) {
+        return await buildDirectory(projectDir, childPath, limit);
+      }
+      // Files need a stat for size and birthtime; symlinks one to see what they point at
+      const stats = await limit(() => fs.stat(path.join(dirPath, entry.name)));
+      return stats.isDirectory()
+        ? await buildDirectory(projectDir, childPath, limit)
+        : fileNode(entry.name, childPath, stats);
+    } catch (error) {
+      // Removed between readdir and stat
+      if (isMissing(error)) {
+        return null;
+      }
+      throw error;
+    }
+  }));
+
+  return {
+    type: 'directory',
+    name: path.basename(dirPath),
+    path: relativePath,
+    children: children.filter((child): child is TreeNode => child !== null)
+  };
+}
+
+function countFiles(node: TreeNode): number {
+  if (node.type === 'file') {
+    return 1;
+  }
+  let count = 0;
+  for (const child of node.children) {
+    count += countFiles(child);
+  }
+  return count;
+}
+
+export async function buildProjectTree(projectId: string, projectDir: string): Promise<ProjectTree> {
+  // Taken before the walk: changes made during it are at most re-applied by
+  // the client, and applying a delta twice is harmless
+  const version = getTreeVersion(projectId);
+  const observeBuild = metrics.treeBuild.startTimer();
+  const root = await buildDirectory(projectDir, '', createLimiter(Math.max(1, config.projectTree.concurrency)));
+  observeBuild();
+
+  return {
+    project_id: projectId,
+    version,
+    root,
+    total_files: countFiles(root),
+    generated_at: new Date().toISOString()
+  };
+}
+
+const globalTrees = globalThis as typeof globalThis & { __specliteTreeCache?: TreeCacheState };
+
+const state: TreeCacheState = globalTrees.__specliteTreeCache ?? (globalTrees.__specliteTreeCache = {
+  entries: new Map(),
+  building: new Map(),
+  generations: new Map(),
+  versions: new Map()
+});
+
+// Cached tree for a project, rebuilt when invalidated or older than the TTL
+export async function getProjectTree(projectId: string, projectDir: string): Promise<CachedProjectTree> {
+  const cached = state.entries.get(projectId);
+  if (cached && Date.now() - cached.builtAt < config.projectTree.cacheTtlMs) {
+    metrics.treeRequests.inc({ result: 'cached' });
+    return cached;
+  }
+
+  const generation = state.generations.get(projectId) ?? 0;
+  const inFlight = state.building.get(projectId);
+  if (inFlight && inFlight.generation === generation) {
+    metrics.treeRequests.inc({ result: 'joined' });
+    return inFlight.promise;
+  }
+
+  metrics.treeRequests.inc({ result: 'built' });
+  const promise = (async () => {
+    const tree = await buildProjectTree(projectId, projectDir);
+    const hash = createHash('sha1').update(JSON.stringify(tree.root)).digest('base64url');
+    const etag = `W/"${hash}-${tree.version}"`;
+    const entry = { tree, etag, builtAt: Date.now() };
+    if ((state.generations.get(projectId) ?? 0) === generation) {
+      // Map order doubles as build order; the oldest trees go first
+      state.entries.delete(projectId);
+      state.entries.set(projectId, entry);
+      for (const key of state.entries.keys()) {
+        if (state.entries.size <= config.projectTree.maxCachedProjects) {
+          break;
+        }
+        state.entries.delete(key);
+      }
+    }
+    return entry;
+  })();
+
+  state.building.set(projectId, { promise, generation });
+  try {
+    return await promise;
+  } finally {
+    if (state.building.get(projectId)?.promise === promise) {
+      state.building.delete(projectId);
+    }
+  }
+}
+
+// Drop the cached tree without a delta, for changes clients need not hear about
+export function invalidateProjectTree(projectId: string): void {
+  state.generations.set(projectId, (state.generations.get(projectId) ?? 0) + 1);
+  state.entries.delete(projectId);
+}
+
+export function getTreeVersion(projectId: string): number {
+  let version = state.versions.get(projectId);
+  if (version === undefined) {
+    version = Date.now();
+    state.versions.set(projectId, version);
+  }
+  return version;
+}
+
+// Record a change made by the pipeline: drops the cached tree and returns the
+// delta to publish as a `tree_delta` event
+export function recordTreeChange(projectId: string, change: TreeChange): TreeDelta {
+  invalidateProjectTree(projectId);
+  const baseVersion = getTreeVersion(projectId);
+  state.versions.set(projectId, baseVersion + 1);
+  return {
+    base_version: baseVersion,
+    version: baseVersion + 1,
+    added: change.added ?? [],
+    removed: change.removed ?? [],
+    resized: change.resized ?? []
+  };
+}
+
+// If-None-Match check; weak comparison as allowed for GET
+export function etagMatches(ifNoneMatch: string | null, etag: string): boolean {
+  if (!ifNoneMatch) {
+    return false;
+  }
+  const opaque = (tag: string) => tag.trim().replace(/^W\//, '');
+  return ifNoneMatch.split(',').some(tag => tag.trim() === '*' || opaque(tag) === opaque(etag));
+}
@@ -0,0 +1,272 @@
+import { config } from '../../env.config';
+import { logger } from './logger';
+
+// Admission control in front of startGeneration.
+//
+// At most `maxConcurrent` generations run at once; the rest wait in a priority
+// queue (higher priority first, FIFO within a priority). Among jobs of equal
+// priority the client with the fewest running generations goes first, and no
+// client may hold more than `maxPerClient` running + queued jobs (0 = no
+// limit), so a single client cannot monopolise the slots.
+
+export interface GenerationJob {
+  projectId: string;
+  clientId: string;
+  priority: number;
+  // Aborting the signal removes a queued job (a running job must stop on its own)
+  signal: AbortSignal;
+  run: () => Promise<void>;
+  // Called on submit and whenever the job moves up the queue (1 = next to start)
+  onQueued?: (position: number, queueLength: number) => void;
+  // Called when the job leaves the queue without running
+  onCancelled?: () => void;
+}
+
+export type SubmitResult =
+  | { status: 'started' }
+  | { status: 'queued'; position: number }
+  | { status: 'rejected'; reason: 'queue_full' | 'client_limit' };
+
+export interface SchedulerMetrics {
+  max_concurrent: number;
+  max_queued: number;
+  max_per_client: number;
+  running: number;
+  queue_depth: number;
+  max_queue_depth: number;
+  submitted: number;
+  started: number;
+  completed: number;
+  failed: number;
+  cancelled: number;
+  rejected: number;
+  queue_wait_ms: { count: number; total: number; max: number; last: number; average: number };
+}
+
+interface QueuedJob {
+  job: GenerationJob;
+  enqueuedAt: number;
+  lastPosition: number;
+  onAbort: () => void;
+}
+
+export class GenerationScheduler {
+  private readonly queue: QueuedJob[] = [];
+  private readonly running = new Set<GenerationJob>();
+  private readonly perClient = new Map<string, { running: number; queued: number }>();
+
+  private readonly counters = {
+    maxQueueDepth: 0,
+    submitted: 0,
+    started: 0,
+    completed: 0,
+    failed: 0,
+    cancelled: 0,
+    rejected: 0,
+    waitCount: 0,
+    waitTotal: 0,
+    waitMax: 0,
+    waitLast: 0
+  };
+
+  constructor(
+    private readonly maxConcurrent: number,
+    private readonly maxQueued: number,
+    private readonly maxPerClient: number
+  ) {}
+
+  submit(job: GenerationJob): SubmitResult {
+    const held = this.perClient.get(job.clientId);
+    if (this.maxPerClient > 0 && held && held.running + held.queued >= this.maxPerClient) {
+      this.counters.rejected++;
+      return { status: 'rejected', reason: 'client_limit' };
+    }
+
+    const canStart = this.running.size < this.maxConcurrent && this.queue.length === 0;
+    if (!canStart && this.queue.length >= this.maxQueued) {
+      this.counters.rejected++;
+      return { status: 'rejected', reason: 'queue_full' };
+    }
+
+    this.counters.submitted++;
+
+    if (canStart) {
+      this.recordWait(0);
+      this.start(job);
+      return { status: 'started' };
+    }
+
+    const queued: QueuedJob = {
+      job,
+      enqueuedAt: Date.now(),
+      lastPosition: 0,
+      onAbort: () => this.cancel(queued)
+    };
+    job.signal.addEventListener('abort', queued.onAbort, { once: true });
+
+    this.insert(queued);
+    this.clientCounts(job.clientId).queued++;
+    this.counters.maxQueueDepth = Math.max(this.counters.maxQueueDepth, this.queue.length);
+    this.notifyPositions();
+
+    return { status: 'queued', position: this.queue.indexOf(queued) + 1 };
+  }
+
+  // 1-based position of a project's queued job, or null if it is not queued
+  positionOf(projectId: string): number | null {
+    const index = this.queue.findIndex(queued => queued.job.projectId === projectId);
+    return index === -1 ? null : index + 1;
+  }
+
+  getMetrics(): SchedulerMetrics {
+    const c = this.counters;
+    return {
+      max_concurrent: this.maxConcurrent,
+      max_queued: this.maxQueued,
+      max_per_client: this.maxPerClient,
+      running: this.running.size,
+      queue_depth: this.queue.length,
+      max_queue_depth: c.maxQueueDepth,
+      submitted: c.submitted,
+      started: c.started,
+      completed: c.completed,
+      failed: c.failed,
+      cancelled: c.cancelled,
+      rejected: c.rejected,
+      queue_wait_ms: {
+        count: c.waitCount,
+        total: c.waitTotal,
+        max: c.waitMax,
+        last: c.waitLast,
+        average: c.waitCount ? Math.round(c.waitTotal / c.waitCount) : 0
+      }
+    };
+  }
+
+  private start(job: GenerationJob): void {
+    this.running.add(job);
+    this.clientCounts(job.clientId).running++;
+    this.counters.started++;
+
+    let outcome: Promise<void>;
+    try {
+      outcome = job.run();
+    } catch (error) {
+      outcome = Promise.reject(error);
+    }
+
+    outcome.then(
+      () => { this.counters.completed++; },
+      error => {
+        this.counters.failed++;
+        logger.error('SCHEDULER', 'Generation failed', { projectId: job.projectId, error });
+      }
+    ).finally(() => {
+      this.running.delete(job);
+      this.releaseClient(job.clientId, 'running');
+      this.dispatch();
+    });
+  }
+
+  // Start queued jobs while there are free slots
+  private dispatch(): void {
+    let started = false;
+    while (this.running.size < this.maxConcurrent && this.queue.length) {
+      const [next] = this.queue.splice(this.pickNext(), 1);
+      next.job.signal.removeEventListener('abort', next.onAbort);
+      this.releaseClient(next.job.clientId, 'queued');
+      this.recordWait(Date.now() - next.enqueuedAt);
+      this.start(next.job);
+      started = true;
+    }
+    if (started) {
+      this.notifyPositions();
+    }
+  }
+
+  // Index of the next job to start: the head of the queue, unless another job of
+  // the same priority belongs to a client with fewer running generations
+  private pickNext(): number {
+    const priority = this.queue[0].job.priority;
+    let best = 0;
+    let bestRunning = this.clientCounts(this.queue[0].job.clientId).running;
+
+    for (let i = 1; i < this.queue.length && this.queue[i].job.priority === priority && bestRunning > 0; i++) {
+      const running = this.clientCounts(this.queue[i].job.clientId).running;
+      if (running < bestRunning) {
+        best = i;
+        bestRunning = running;
+      }
+    }
+    return best;
+  }
+
+  private cancel(queued: QueuedJob): void {
+    const index = this.queue.indexOf(queued);
+    if (index === -1) {
+      return;
+    }
+    this.queue.splice(index, 1);
+    this.releaseClient(queued.job.clientId, 'queued');
+    this.counters.cancelled++;
+    queued.job.onCancelled?.();
+    this.notifyPositions();
+  }
+
+  // Queue ordered by priority (descending), then submission order
+  private insert(queued: QueuedJob): void {
+    let index = this.queue.length;
+    while (index > 0 && this.queue[index - 1].job.priority < queued.job.priority) {
+      index--;
+    }
+    this.queue.splice(index, 0, queued);
+  }
+
+  private notifyPositions(): void {
+    this.queue.forEach((queued, index) => {
+      const position = index + 1;
+      if (position !== queued.lastPosition) {
+        queued.lastPosition = position;
+        queued.job.onQueued?.(position, this.queue.length);
+      }
+    });
+  }
+
+  private recordWait(waitMs: number): void {
+    const c = this.counters;
+    c.waitCount++;
+    c.waitTotal += waitMs;
+    c.waitLast = waitMs;
+    c.waitMax = Math.max(c.waitMax, waitMs);
+  }
+
+  private clientCounts(clientId: string): { running: number; queued: number } {
+    let counts = this.perClient.get(clientId);
+    if (!counts) {
+      counts = { running: 0, queued: 0 };
+      this.perClient.set(clientId, counts);
+    }
+    return counts;
+  }
+
+  private releaseClient(clientId: string, kind: 'running' | 'queued'): void {
+    const counts = this.perClient.get(clientId);
+    if (!counts) {
+      return;
+    }
+    counts[kind]--;
+    if (counts.running === 0 && counts.queued === 0) {
+      this.perClient.delete(clientId);
+    }
+  }
+}
+
+const globalScheduler = globalThis as typeof globalThis & { __specliteScheduler?: GenerationScheduler };
+
+// Shared across route modules and dev hot reloads, like the store
+export const generationScheduler: GenerationScheduler = globalScheduler.__specliteScheduler
+  ?? (globalScheduler.__specliteScheduler = new GenerationScheduler(
+    Math.max(1, config.scheduler.maxConcurrent),
+    Math.max(0, config.scheduler.maxQueued),
+    Math.max(0, config.scheduler.maxPerClient)
+  ));
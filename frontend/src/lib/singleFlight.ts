@@ -0,0 +1,120 @@
+import { config } from '../../env.config';
+
+// Single-flight deduplication of streamed upstream calls.
+//
+// The first caller for a key starts the upstream stream; callers arriving
+// while it is still running attach to it instead of starting their own. Every
+// caller gets all chunks from the beginning (chunks seen so far are replayed
+// from memory) and then follows the live stream. The entry is removed as soon
+// as the upstream stream finishes, so later calls start fresh (or hit the LLM
+// cache).
+
+export interface SingleFlightMetrics {
+  enabled: boolean;
+  in_flight: number;
+  // Calls that started a stream of their own. Behind the LLM cache some of these
+  // are cache hits; the cache's `misses` counts the calls that reached MiniMax.
+  leader_calls: number;
+  // Calls that attached to an in-flight stream instead of starting one
+  joined_calls: number;
+}
+
+class SharedStream<T> {
+  private readonly chunks: T[] = [];
+  private finished = false;
+  private failure: { error: unknown } | null = null;
+  private waiters: (() => void)[] = [];
+
+  constructor(source: AsyncIterable<T>, onSettled: () => void) {
+    this.pump(source).finally(onSettled);
+  }
+
+  async *subscribe(): AsyncGenerator<T> {
+    let next = 0;
+    while (true) {
+      if (next < this.chunks.length) {
+        yield this.chunks[next++];
+        continue;
+      }
+      if (this.failure) {
+        throw this.failure.error;
+      }
+      if (this.finished) {
+        return;
+      }
+      await new Promise<void>(resolve => this.waiters.push(resolve));
+    }
+  }
+
+  private async pump(source: AsyncIterable<T>): Promise<void> {
+    try {
+      for await (const chunk of source) {
+        this.chunks.push(chunk);
+        this.wake();
+      }
+      this.finished = true;
+    } catch (error) {
+      this.failure = { error };
+    } finally {
+      this.wake();
+    }
+  }
+
+  private wake(): void {
+    const waiters = this.waiters;
+    this.waiters = [];
+    for (const resolve of waiters) {
+      resolve();
+    }
+  }
+}
+
+interface SingleFlightState {
+  inFlight: Map<string, SharedStream<unknown>>;
+  leaderCalls: number;
+  joined: number;
+}
+
+const globalFlights = globalThis as typeof globalThis & { __specliteSingleFlight?: SingleFlightState };
+
+const state: SingleFlightState = globalFlights.__specliteSingleFlight ?? (globalFlights.__specliteSingleFlight = {
+  inFlight: new Map(),
+  leaderCalls: 0,
+  joined: 0
+});
+
+// Stream `start()`'s output, sharing it with any concurrent call for the same key
+export function singleFlightStream<T>(key: string, start: () => AsyncIterable<T>): AsyncGenerator<T> {
+  if (!config.singleFlight.enabled) {
+    state.leaderCalls++;
+    return toGenerator(start());
+  }
+
+  let shared = state.inFlight.get(key) as SharedStream<T> | undefined;
+  if (shared) {
+    state.joined++;
+  } else {
+    state.leaderCalls++;
+    const created: SharedStream<T> = new SharedStream(start(), () => {
+      if (state.inFlight.get(key) === created) {
+        state.inFlight.delete(key);
+      }
+    });
+    shared = created;
+    state.inFlight.set(key, created);
+  }
+  return shared.subscribe();
+}
+
+export function getSingleFlightMetrics(): SingleFlightMetrics {
+  return {
+    enabled: config.singleFlight.enabled,
+    in_flight: state.inFlight.size,
+    leader_calls: state.leaderCalls,
+    joined_calls: state.joined
+  };
+}
+
+async function* toGenerator<T>(source: AsyncIterable<T>): AsyncGenerator<T> {
+  yield* source;
+}
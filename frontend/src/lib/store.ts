@@ -0,0 +1,360 @@
+import { config } from '../../env.config';
+import { LoggedEvent, ProjectEventLog, createEventLog, formatEvent } from './eventLog';
+import { OutgoingEvent, StreamController, StreamSubscriber, SubscriberStats } from './broadcast';
+import { metrics } from './metrics';
+
+// In-memory state shared by the generate and stream routes.
+//
+// Kept on globalThis so every route module (and Next.js dev hot reloads) see
+// the same maps instead of each getting its own copy.
+//
+// Each project can have any number of SSE subscribers (browser tabs,
+// SSEConnector, WorkbenchView); every published event is encoded once and
+// fanned out to all of them.
+
+export type { StreamController } from './broadcast';
+export { StreamSubscriber } from './broadcast';
+
+// SSE subscribers and their streams are sized in bytes (config.streaming)
+export function createSubscriber(projectId: string, controller: StreamController): StreamSubscriber {
+  const { highWaterMarkBytes, subscriberQueueLimit, subscriberMaxQueuedBytes } = config.streaming;
+  return new StreamSubscriber(projectId, controller, {
+    highWaterMark: highWaterMarkBytes,
+    maxQueuedEvents: subscriberQueueLimit,
+    maxQueuedBytes: subscriberMaxQueuedBytes
+  });
+}
+
+export function streamQueuingStrategy(): QueuingStrategy<Uint8Array> {
+  return { highWaterMark: config.streaming.highWaterMarkBytes, size: chunk => chunk.byteLength };
+}
+
+type StreamWaiter = (subscriber: StreamSubscriber) => void;
+
+export interface StreamWaitMetrics {
+  waits: number;
+  immediate: number;
+  timeouts: number;
+  totalWaitMs: number;
+  maxWaitMs: number;
+  lastWaitMs: number;
+  pending: number;
+}
+
+export interface BroadcastMetrics {
+  projects: number;
+  subscribers: number;
+  queued: number;
+  pending_bytes: number;
+  coalesced: number;
+  dropped: number;
+  // Per connection, largest backlog first
+  streams: SubscriberStats[];
+}
+
+interface StoreState {
+  streams: Map<string, Set<StreamSubscriber>>;
+  activeGenerations: Map<string, AbortController>;
+  streamWaiters: Map<string, Set<StreamWaiter>>;
+  streamWaitMetrics: Omit<StreamWaitMetrics, 'pending'>;
+  eventLogs: Map<string, ProjectEventLog>;
+  // Counters of subscribers that have already disconnected
+  droppedEvents: number;
+  coalescedEvents: number;
+}
+
+const globalStore = globalThis as typeof globalThis & { __specliteStore?: StoreState };
+
+const state: StoreState = globalStore.__specliteStore ?? (globalStore.__specliteStore = {
+  streams: new Map(),
+  activeGenerations: new Map(),
+  streamWaiters: new Map(),
+  streamWaitMetrics: { waits: 0, immediate: 0, timeouts: 0, totalWaitMs: 0, maxWaitMs: 0, lastWaitMs: 0 },
+  eventLogs: new Map(),
+  droppedEvents: 0,
+  coalescedEvents: 0
+});
+
+export const streams = state.streams;
+export const activeGenerations = state.activeGenerations;
+
+// Add a subscriber to the project and wake everyone waiting for one
+export function registerStream(projectId: string, subscriber: StreamSubscriber): void {
+  let subscribers = streams.get(projectId);
+  if (!subscribers) {
+    subscribers = new Set();
+    streams.set(projectId, subscribers);
+  }
+  subscribers.add(subscriber);
+
+  const waiters = state.streamWaiters.get(projectId);
+  if (waiters) {
+    state.streamWaiters.delete(projectId);
+    for (const resolve of waiters) {
+      resolve(subscriber);
+    }
+  }
+}
+
+export function unregisterStream(projectId: string, subscriber: StreamSubscriber): void {
+  const subscribers = streams.get(projectId);
+  if (!subscribers?.delete(subscriber)) {
+    return;
+  }
+
+  state.droppedEvents += subscriber.dropped;
+  state.coalescedEvents += subscriber.coalesced;
+  subscriber.close();
+  if (subscribers.size === 0) {
+    streams.delete(projectId);
+  }
+}
+
+// Room left in the project's streams for paced output: follows the fastest
+// subscriber, slower ones fall back on their own bounded queue. Null when no
+// one is connected.
+export function getStreamDesiredSize(projectId: string): number | null {
+  let desired: number | null = null;
+  for (const subscriber of streams.get(projectId) ?? []) {
+    const size = subscriber.desiredSize;
+    if (size !== null && (desired === null || size > desired)) {
+      desired = size;
+    }
+  }
+  return desired;
+}
+
+// Resolve with a subscriber as soon as one is registered, or null after timeoutMs
+export function waitForStream(projectId: string, timeoutMs: number): Promise<StreamSubscriber | null> {
+  const metrics = state.streamWaitMetrics;
+  const startedAt = Date.now();
+
+  const record = (timedOut: boolean) => {
+    const waited = Date.now() - startedAt;
+    metrics.waits++;
+    metrics.totalWaitMs += waited;
+    metrics.lastWaitMs = waited;
+    metrics.maxWaitMs = Math.max(metrics.maxWaitMs, waited);
+    if (timedOut) {
+      metrics.timeouts++;
+    }
+  };
+
+  const existing = streams.get(projectId)?.values().next().value;
+  if (existing) {
+    metrics.immediate++;
+    record(false);
+    return Promise.resolve(existing);
+  }
+
+  return new Promise(resolve => {
+    let waiters = state.streamWaiters.get(projectId);
+    if (!waiters) {
+      waiters = new Set();
+      state.streamWaiters.set(projectId, waiters);
+    }
+
+    const waiter: StreamWaiter = subscriber => {
+      clearTimeout(timer);
+      record(false);
+      resolve(subscriber);
+    };
+
+    const timer = setTimeout(() => {
+      const pending = state.streamWaiters.get(projectId);
+      pending?.delete(waiter);
+      if (pending && pending.size === 0) {
+        state.streamWaiters.delete(projectId);
+      }
+      record(true);
+      resolve(null);
+    }, timeoutMs);
+
+    waiters.add(waiter);
+  });
+}
+
+export function getStreamWaitMetrics(): StreamWaitMetrics {
+  let pending = 0;
+  for (const waiters of state.streamWaiters.values()) {
+    pending += waiters.size;
+  }
+  return { ...state.streamWaitMetrics, pending };
+}
+
+export function getBroadcastMetrics(): BroadcastMetrics {
+  const metrics: BroadcastMetrics = {
+    projects: streams.size,
+    subscribers: 0,
+    queued: 0,
+    pending_bytes: 0,
+    coalesced: state.coalescedEvents,
+    dropped: state.droppedEvents,
+    streams: []
+  };
+  for (const subscribers of streams.values()) {
+    for (const subscriber of subscribers) {
+      const stats = subscriber.stats();
+      metrics.subscribers++;
+      metrics.queued += stats.queued_events;
+      metrics.pending_bytes += stats.queued_bytes + stats.buffered_bytes;
+      metrics.coalesced += stats.coalesced;
+      metrics.dropped += stats.dropped;
+      metrics.streams.push(stats);
+    }
+  }
+  metrics.streams.sort((a, b) => (b.queued_bytes + b.buffered_bytes) - (a.queued_bytes + a.buffered_bytes));
+  return metrics;
+}
+
+function getEventLog(projectId: string): ProjectEventLog {
+  let log = state.eventLogs.get(projectId);
+  if (!log) {
+    log = createEventLog(projectId);
+    state.eventLogs.set(projectId, log);
+  }
+  return log;
+}
+
+// Mark the start of a generation: clients connecting without Last-Event-ID are
+// replayed everything from here on
+export function beginGenerationLog(projectId: string): void {
+  getEventLog(projectId).startGeneration();
+}
+
+// Keep the finished generation's events for reconnects, then drop the log
+export function endGenerationLog(projectId: string): void {
+  const log = state.eventLogs.get(projectId);
+  log?.endGeneration(() => {
+    if (state.eventLogs.get(projectId) === log && log.generationStartId === null) {
+      log.close();
+      state.eventLogs.delete(projectId);
+    }
+  }, config.streaming.eventLogRetentionMs);
+}
+
+type ContentPayload = { content: string; phase?: string; path?: string; is_complete?: boolean } & Record<string, unknown>;
+
+// Content chunks can be merged for a lagging subscriber (model chunks of a
+// phase, updates of a file). Returns null for lifecycle events.
+function coalesceKey(event: string, data: string | object): string | null {
+  if (typeof data !== 'object' || typeof (data as ContentPayload).content !== 'string') {
+    return null;
+  }
+  const payload = data as ContentPayload;
+  if (event === 'chunk') {
+    return `chunk:${payload.phase ?? ''}`;
+  }
+  if (event === 'file_content_update' && !payload.is_complete) {
+    return `file:${payload.path ?? ''}`;
+  }
+  return null;
+}
+
+// Append an event to the project's log and fan it out to every live subscriber
+export function publishEvent(projectId: string, event: string, data: string | object): LoggedEvent {
+  const entry = getEventLog(projectId).append(event, typeof data === 'string' ? data : JSON.stringify(data));
+
+  const subscribers = streams.get(projectId);
+  if (subscribers) {
+    const key = coalesceKey(event, data);
+    const outgoing: OutgoingEvent = {
+      bytes: formatEvent(entry),
+      // Model chunks are repeated in full by phase_complete; file content is only
+      // ever merged, as clients build files by appending it
+      droppable: event === 'chunk',
+      entry,
+      payload: key !== null ? data as ContentPayload : undefined,
+      coalesceKey: key
+    };
+    let delivered = 0;
+    for (const subscriber of subscribers) {
+      if (subscriber.send(outgoing)) {
+        delivered++;
+      } else {
+        unregisterStream(projectId, subscriber);
+      }
+    }
+    if (delivered) {
+      metrics.sseEvents.inc({ event }, delivered);
+      metrics.sseBytes.inc(undefined, outgoing.bytes.byteLength * delivered);
+    }
+  }
+
+  return entry;
+}
+
+// Reads of the spill file while catching up a reconnecting client, before it
+// is told to resync instead
+const MAX_CATCH_UP_ATTEMPTS = 3;
+
+// Replay what the client missed, then register the subscriber for live events.
+// lastEventId is the client's Last-Event-ID (null on a fresh connection, which
+// gets the generation in progress, if any; 0 for everything the log still
+// holds). Returns false if the log could not
+// cover the gap; the client is then sent a `resync` event instead.
+export async function attachStream(projectId: string, subscriber: StreamSubscriber, lastEventId: number | null): Promise<boolean> {
+  const controller = subscriber.controller;
+  const log = state.eventLogs.get(projectId);
+  let afterId: number | null = null;
+
+  if (log && lastEventId === 0) {
+    // Last-Event-ID 0 asks for everything the log holds
+    afterId = log.firstId - 1;
+  } else if (log && lastEventId !== null) {
+    afterId = lastEventId;
+  } else if (log && log.generationStartId !== null) {
+    afterId = log.generationStartId - 1;
+  }
+
+  let complete = true;
+  if (log && afterId !== null) {
+    let cursor = afterId;
+    const sendResync = () => {
+      complete = false;
+      controller.enqueue(formatEvent({
+        id: log.lastId,
+        event: 'resync',
+        data: JSON.stringify({ project_id: projectId, type: 'resync', last_event_id: lastEventId, timestamp: new Date().toISOString() })
+      }));
+    };
+    const replay = (entries: LoggedEvent[]) => {
+      for (const entry of entries) {
+        controller.enqueue(formatEvent(entry));
+      }
+      if (entries.length) {
+        cursor = entries[entries.length - 1].id;
+      }
+    };
+
+    // An id from before a restart (or another process) cannot be matched up
+    const missed = cursor > log.lastId ? null : await log.since(cursor);
+    if (missed === null) {
+      sendResync();
+      cursor = log.lastId;
+    } else {
+      replay(missed);
+    }
+
+    // Catch up on anything published while the replay was awaited, then go live
+    // in the same tick so nothing slips between replay and registration. If so
+    // much was published that the ring moved past cursor, read the gap again.
+    let tail = log.fromRing(cursor);
+    for (let attempt = 0; tail === null && attempt < MAX_CATCH_UP_ATTEMPTS; attempt++) {
+      const gap = await log.since(cursor);
+      if (gap === null) {
+        break;
+      }
+      replay(gap);
+      tail = log.fromRing(cursor);
+    }
+    if (tail === null) {
+      sendResync();
+    } else {
+      replay(tail);
+    }
+  }
+
+  registerStream(projectId, subscriber);
+  return complete;
+}
@@ -0,0 +1,151 @@
+// Incremental counterpart of parseGeneratedCode: consumes model output chunk by
+// chunk and reports file boundaries as soon as they are seen, instead of
+// waiting for the whole generation.
+//
+// Format (same as parseGeneratedCode): a line holding only a file name starts
+// a new file; every following line belongs to it until the next header.
+// Content is trimmed the same way, so the streamed text matches the final parse.
+
+export type StreamingParseEvent =
+  | { type: 'file_start'; path: string }
+  | { type: 'file_chunk'; path: string; content: string; offset: number }
+  | { type: 'file_end'; path: string; content: string };
+
+// Longest line that is still treated as a possible header before it is complete
+const MAX_HEADER_LENGTH = 200;
+
+// A file name with an extension that starts with a letter, so prose lines such
+// as version numbers (`v1.0`) or decimals (`3.14`) are not taken for headers
+const FILE_HEADER_PATTERN = /^[A-Za-z0-9_][\w\-./]*\.[A-Za-z][A-Za-z0-9]*$/;
+
+export function isFileHeader(line: string): boolean {
+  const trimmed = line.trim();
+  return trimmed.length > 0
+    && trimmed.length <= MAX_HEADER_LENGTH
+    && FILE_HEADER_PATTERN.test(trimmed)
+    && !trimmed.includes('..');
+}
+
+// A partial line can be forwarded early once it can no longer turn into a header
+function cannotBeHeader(partial: string): boolean {
+  return partial.length > MAX_HEADER_LENGTH || /\S\s/.test(partial);
+}
+
+export class StreamingCodeParser {
+  private currentPath: string | null = null;
+  private currentContent = '';
+  // Text of the current line not yet classified (no newline seen)
+  private pendingLine = '';
+  // True once the start of the current line has been forwarded as content
+  private lineCommitted = false;
+  // Whitespace-only text held back until more content follows (the final file is trimmed)
+  private heldWhitespace = '';
+
+  constructor(private readonly headerTest: (line: string) => boolean = isFileHeader) {}
+
+  get activePath(): string | null {
+    return this.currentPath;
+  }
+
+  push(text: string): StreamingParseEvent[] {
+    const events: StreamingParseEvent[] = [];
+    let start = 0;
+
+    while (start < text.length) {
+      const newline = text.indexOf('\n', start);
+
+      if (newline === -1) {
+        const rest = text.slice(start);
+        if (this.lineCommitted) {
+          this.append(rest, events);
+        } else {
+          this.pendingLine += rest;
+          if (this.currentPath && cannotBeHeader(this.pendingLine)) {
+            this.append(this.pendingLine, events);
+            this.pendingLine = '';
+            this.lineCommitted = true;
+          }
+        }
+        break;
+      }
+
+      const segment = text.slice(start, newline);
+      if (this.lineCommitted) {
+        this.append(segment + '\n', events);
+      } else {
+        this.completeLine(this.pendingLine + segment, events);
+        this.pendingLine = '';
+      }
+
+      this.lineCommitted = false;
+      start = newline + 1;
+    }
+
+    return events;
+  }
+
+  // Flush the last line and close the open file
+  end(): StreamingParseEvent[] {
+    const events: StreamingParseEvent[] = [];
+
+    if (this.pendingLine) {
+      if (this.lineCommitted) {
+        this.append(this.pendingLine, events);
+      } else {
+        this.completeLine(this.pendingLine, events, false);
+      }
+      this.pendingLine = '';
+    }
+
+    this.closeFile(events);
+    return events;
+  }
+
+  private completeLine(line: string, events: StreamingParseEvent[], withNewline = true): void {
+    if (this.headerTest(line)) {
+      this.closeFile(events);
+      this.currentPath = line.trim();
+      this.currentContent = '';
+      this.heldWhitespace = '';
+      events.push({ type: 'file_start', path: this.currentPath });
+      return;
+    }
+
+    if (this.currentPath) {
+      this.append(withNewline ? line + '\n' : line, events);
+    }
+  }
+
+  private append(text: string, events: StreamingParseEvent[]): void {
+    if (!this.currentPath || !text) {
+      return;
+    }
+
+    // Hold back trailing whitespace; it is only emitted once non-blank text follows it
+    const buffered = this.heldWhitespace + text;
+    const lastVisible = buffered.search(/\s*$/);
+    let visible = buffered.slice(0, lastVisible);
+    this.heldWhitespace = buffered.slice(lastVisible);
+
+    if (!this.currentContent) {
+      visible = visible.replace(/^\s+/, '');
+    }
+    if (!visible) {
+      return;
+    }
+
+    events.push({ type: 'file_chunk', path: this.currentPath, content: visible, offset: this.currentContent.length });
+    this.currentContent += visible;
+  }
+
+  private closeFile(events: StreamingParseEvent[]): void {
+    if (!this.currentPath) {
+      return;
+    }
+
+    events.push({ type: 'file_end', path: this.currentPath, content: this.currentContent });
+    this.currentPath = null;
+    this.currentContent = '';
+    this.heldWhitespace = '';
+  }
+}
@@ -113,7 +113,7 @@ class HeadlessTester {
           try {
             const health = JSON.parse(data);
 
-            if (health.status === 'healthy' && res.statusCode === 200) {
+            if (['healthy', 'degraded'].includes(health.status) && res.statusCode === 200) {
               this.testResults.healthCheck = true;
               this.log('✅ Health check passed');
               resolve();
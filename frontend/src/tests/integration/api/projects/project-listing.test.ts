@@ -16,6 +16,9 @@ import path from 'path';
 const mockedFs = fs as jest.Mocked<typeof fs>;
 const mockedPath = path as jest.Mocked<typeof path>;
 
+// readdir is called with { withFileTypes: true }
+const dirent = (name: string, isDirectory = false) => ({ name, isDirectory: () => isDirectory });
+
 describe('GET /api/projects/[project_id]', () => {
   beforeEach(() => {
     jest.clearAllMocks();
@@ -41,14 +44,10 @@ describe('GET /api/projects/[project_id]', () => {
     // Mock existing directory
     mockFs.access.mockResolvedValue(undefined);
 
-    // Mock root directory stats
-    const mockRootStats = { isDirectory: () => true };
-    mockFs.stat
-      .mockResolvedValueOnce(mockRootStats) // root dir
-      .mockResolvedValueOnce({ isDirectory: () => true }) // main.py
-      .mockResolvedValueOnce({ isDirectory: () => false, size: 1024, birthtime: new Date() }); // main.py file
+    // Only files are stat'ed; directories come from the readdir entries
+    mockFs.stat.mockResolvedValueOnce({ isDirectory: () => false, size: 1024, birthtime: new Date() }); // main.py file
 
-    mockFs.readdir.mockResolvedValue(['main.py']);
+    mockFs.readdir.mockResolvedValue([dirent('main.py')]);
 
     const request = new NextRequest('http://localhost:3000/api/projects/test-project-id');
     const response = await GET(request, { params: { project_id: 'test-project-id' } });
@@ -68,22 +67,17 @@ describe('GET /api/projects/[project_id]', () => {
     mockFs.access.mockResolvedValue(undefined);
 
     // Mock nested structure: root -> src/ -> main.py
-    const mockRootStats = { isDirectory: () => true };
-    const mockSrcStats = { isDirectory: () => true };
     const mockFileStats = {
       isDirectory: () => false,
       size: 2048,
       birthtime: new Date('2026-01-02T10:00:00Z')
     };
 
-    mockFs.stat
-      .mockResolvedValueOnce(mockRootStats) // root
-      .mockResolvedValueOnce(mockSrcStats)   // src dir
-      .mockResolvedValueOnce(mockFileStats); // main.py
+    mockFs.stat.mockResolvedValueOnce(mockFileStats); // main.py
 
     mockFs.readdir
-      .mockResolvedValueOnce(['src'])        // root contents
-      .mockResolvedValueOnce(['main.py']);   // src contents
+      .mockResolvedValueOnce([dirent('src', true)])  // root contents
+      .mockResolvedValueOnce([dirent('main.py')]);   // src contents
 
     const request = new NextRequest('http://localhost:3000/api/projects/nested-project');
     const response = await GET(request, { params: { project_id: 'nested-project' } });
@@ -102,16 +96,14 @@ describe('GET /api/projects/[project_id]', () => {
   it('should handle files with different extensions', async () => {
     mockFs.access.mockResolvedValue(undefined);
 
-    const mockRootStats = { isDirectory: () => true };
     const mockPyFileStats = { isDirectory: () => false, size: 1024, birthtime: new Date() };
     const mockMdFileStats = { isDirectory: () => false, size: 512, birthtime: new Date() };
 
     mockFs.stat
-      .mockResolvedValueOnce(mockRootStats)
       .mockResolvedValueOnce(mockPyFileStats)
       .mockResolvedValueOnce(mockMdFileStats);
 
-    mockFs.readdir.mockResolvedValue(['main.py', 'README.md']);
+    mockFs.readdir.mockResolvedValue([dirent('main.py'), dirent('README.md')]);
 
     const request = new NextRequest('http://localhost:3000/api/projects/multi-file-project');
     const response = await GET(request, { params: { project_id: 'multi-file-project' } });
@@ -132,6 +124,7 @@ describe('GET /api/projects/[project_id]', () => {
 
   it('should handle filesystem errors gracefully', async () => {
     mockFs.access.mockResolvedValue(undefined);
+    mockFs.readdir.mockResolvedValue([dirent('main.py')]);
     mockFs.stat.mockRejectedValue(new Error('Permission denied'));
 
     const request = new NextRequest('http://localhost:3000/api/projects/error-project');
@@ -141,4 +134,27 @@ describe('GET /api/projects/[project_id]', () => {
     const data = await response.json();
     expect(data.error).toContain('获取项目结构失败');
   });
+
+  it('should return 304 when the tree is unchanged', async () => {
+    mockFs.access.mockResolvedValue(undefined);
+    mockFs.readdir.mockResolvedValue([dirent('main.py')]);
+    mockFs.stat.mockResolvedValue({ isDirectory: () => false, size: 1024, birthtime: new Date() });
+
+    const first = await GET(
+      new NextRequest('http://localhost:3000/api/projects/etag-project'),
+      { params: { project_id: 'etag-project' } }
+    );
+    const etag = first.headers.get('etag');
+    expect(first.status).toBe(200);
+    expect(etag).toBeTruthy();
+
+    const second = await GET(
+      new NextRequest('http://localhost:3000/api/projects/etag-project', { headers: { 'if-none-match': etag! } }),
+      { params: { project_id: 'etag-project' } }
+    );
+    expect(second.status).toBe(304);
+    expect(second.headers.get('etag')).toBe(etag);
+    // Served from the tree cache, no second walk
+    expect(mockFs.readdir).toHaveBeenCalledTimes(1);
+  });
 });
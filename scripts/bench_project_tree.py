@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Project Tree Endpoint Benchmark
+
+Measures GET /api/projects/{project_id} on a synthetic project with thousands
+of files, against a running Next.js server:
+
+    cold         - first request for a project (full directory walk)
+    warm         - repeated requests served from the per-project tree cache
+    conditional  - requests with If-None-Match, answered 304 Not Modified
+
+Each cold round uses a fresh copy of the project so nothing is cached. The
+projects are written straight into the server's projects root and removed
+afterwards (unless --keep).
+
+Usage:
+    python scripts/bench_project_tree.py --files 5000
+    python scripts/bench_project_tree.py --files 20000 --fanout 20 --requests 200 --output tree.json
+
+Dependencies: requests
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+
+from stream_metrics import Histogram
+
+# Configuration
+DEFAULT_BASE_URL = "http://localhost:3000"
+PROJECT_ENDPOINT_TEMPLATE = "/api/projects/{}"
+DEFAULT_PROJECTS_ROOT = Path(__file__).resolve().parent.parent / "projects"
+REQUEST_TIMEOUT = 60  # seconds
+
+FILE_CONTENT = "def handler(event):\n    return {'status': 'ok'}\n"
+
+
+def create_project(projects_root: Path, files: int, fanout: int) -> Path:
+    """Write `files` small files spread over a two-level directory layout."""
+    project_dir = projects_root / f"bench-tree-{uuid.uuid4().hex[:8]}"
+    for index in range(files):
+        directory = project_dir / "src" / f"pkg{index % fanout}" / f"mod{(index // fanout) % fanout}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file{index}.py").write_text(FILE_CONTENT * (index % 5 + 1), encoding="utf-8")
+    (project_dir / "README.md").write_text("# Benchmark project\n", encoding="utf-8")
+    return project_dir
+
+
+def timed_get(session: requests.Session, url: str, headers: Dict[str, str], expected: int) -> requests.Response:
+    response = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    if response.status_code != expected:
+        raise RuntimeError(f"GET {url} returned {response.status_code}, expected {expected}")
+    return response
+
+
+def bench(args: argparse.Namespace) -> Dict:
+    projects_root = Path(args.projects_root).resolve()
+    session = requests.Session()
+    histograms = {name: Histogram(name, unit="ms") for name in ("cold", "warm", "conditional")}
+    created: List[Path] = []
+
+    try:
+        print(f"Creating {args.cold_rounds} project(s) with {args.files} files under {projects_root} ...")
+        for _ in range(args.cold_rounds):
+            created.append(create_project(projects_root, args.files, args.fanout))
+
+        etag = None
+        url = None
+        total_files = None
+        for project_dir in created:
+            url = args.base_url + PROJECT_ENDPOINT_TEMPLATE.format(project_dir.name)
+            start = time.perf_counter()
+            response = timed_get(session, url, {}, 200)
+            histograms["cold"].record((time.perf_counter() - start) * 1000)
+            etag = response.headers.get("ETag")
+            total_files = response.json().get("total_files")
+
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            timed_get(session, url, {}, 200)
+            histograms["warm"].record((time.perf_counter() - start) * 1000)
+
+        if etag:
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                timed_get(session, url, {"If-None-Match": etag}, 304)
+                histograms["conditional"].record((time.perf_counter() - start) * 1000)
+        else:
+            print("Server sent no ETag; skipping conditional requests")
+    finally:
+        if not args.keep:
+            for project_dir in created:
+                shutil.rmtree(project_dir, ignore_errors=True)
+
+    for hist in histograms.values():
+        if hist.count:
+            print(hist.format_table())
+
+    return {
+        "files": args.files,
+        "total_files_reported": total_files,
+        "requests": args.requests,
+        "histograms": {name: hist.summary() for name, hist in histograms.items() if hist.count}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GET /api/projects/{project_id} on a large project")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help=f"Server base URL (default: {DEFAULT_BASE_URL})")
+    parser.add_argument("--projects-root", default=str(DEFAULT_PROJECTS_ROOT),
+                        help="The server's PROJECTS_ROOT (default: ./projects)")
+    parser.add_argument("--files", type=int, default=5000, help="Files in the synthetic project (default: 5000)")
+    parser.add_argument("--fanout", type=int, default=10, help="Directories per level (default: 10)")
+    parser.add_argument("--cold-rounds", type=int, default=3, help="Fresh projects for cold requests (default: 3)")
+    parser.add_argument("--requests", type=int, default=100, help="Warm and conditional requests each (default: 100)")
+    parser.add_argument("--keep", action="store_true", help="Leave the synthetic projects on disk")
+    parser.add_argument("--output", type=str, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    try:
+        report = bench(args)
+    except (requests.RequestException, RuntimeError) as e:
+        print(f"Benchmark failed: {e}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+SSE Parser Micro-Benchmark
+
+Measures events/sec and MB/s of the shared incremental parser (sse_parser.py)
+against the legacy `buffer += chunk; buffer.split("\\n\\n")` approach that the
+scripts used to hand-roll.
+
+By default a multi-megabyte stream shaped like a real /api/stream session is
+synthesized (many small `chunk` events, large `phase_complete` payloads and
+`file_content_update` slices). Pass --input to replay a recorded raw SSE
+capture instead.
+
+Usage:
+    python scripts/bench_sse_parser.py [--input FILE] [--size-mb 8] [--chunk-size 4096] [--rounds 3]
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Callable, Iterable, List
+
+from sse_parser import iter_sse_events
+
+PHASES = ["specify", "plan", "implement"]
+
+
+def synthesize_stream(target_bytes: int) -> bytes:
+    """Build a recorded-looking SSE stream of roughly target_bytes."""
+    frames: List[bytes] = []
+    total = 0
+    project_id = "bench-0000"
+    text = "def handler(event):\n    return {'status': 'ok', 'message': '生成完成'}\n"
+
+    frames.append(b'event: connected\ndata: {"status": "ready"}\n\n')
+
+    while total < target_bytes:
+        for phase in PHASES:
+            frames.append(
+                f"event: phase_start\ndata: {json.dumps({'project_id': project_id, 'phase': phase, 'type': 'phase_start'})}\n\n".encode()
+            )
+            phase_content = []
+            for _ in range(400):
+                piece = text[:32]
+                phase_content.append(piece)
+                payload = json.dumps({'project_id': project_id, 'phase': phase, 'type': 'chunk', 'content': piece}, ensure_ascii=False)
+                frames.append(f"event: chunk\ndata: {payload}\n\n".encode())
+            payload = json.dumps({'project_id': project_id, 'phase': phase, 'type': 'phase_complete', 'content': text * 2000}, ensure_ascii=False)
+            frames.append(f"event: phase_complete\ndata: {payload}\n\n".encode())
+
+        content = text * 200
+        for offset in range(0, len(content), 50):
+            payload = json.dumps({'project_id': project_id, 'type': 'file_content_update', 'path': 'main.py', 'content': content[offset:offset + 50], 'offset': offset, 'is_complete': False}, ensure_ascii=False)
+            frames.append(f"event: file_content_update\ndata: {payload}\n\n".encode())
+
+        total = sum(len(frame) for frame in frames)
+
+    frames.append(b'event: generation_complete\ndata: {"type": "generation_complete"}\n\n')
+    return b"".join(frames)
+
+
+def split_chunks(stream: bytes, chunk_size: int) -> List[bytes]:
+    """Slice the stream the way a socket would hand it to us."""
+    return [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+
+
+def legacy_parse(chunks: Iterable[bytes]) -> int:
+    """The str-concatenation parser previously copied across scripts/."""
+    count = 0
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk.decode("utf-8", errors="replace")
+        while "\n\n" in buffer:
+            message, buffer = buffer.split("\n\n", 1)
+            if message.strip():
+                count += 1
+    if buffer.strip():
+        count += 1
+    return count
+
+
+def incremental_parse(chunks: Iterable[bytes]) -> int:
+    """The shared bytearray-cursor parser."""
+    count = 0
+    for _ in iter_sse_events(chunks):
+        count += 1
+    return count
+
+
+def run(name: str, parse: Callable[[Iterable[bytes]], int], chunks: List[bytes], total_bytes: int, rounds: int) -> float:
+    best = float("inf")
+    events = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        events = parse(chunks)
+        best = min(best, time.perf_counter() - start)
+
+    print(f"{name:<12} {events:>8} events  {best * 1000:>9.1f} ms  "
+          f"{events / best:>12,.0f} events/s  {total_bytes / best / 1024 / 1024:>8.1f} MB/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE Parser Micro-Benchmark")
+    parser.add_argument("--input", type=str, help="Recorded raw SSE stream to replay")
+    parser.add_argument("--size-mb", type=float, default=8.0, help="Size of the synthesized stream (default: 8)")
+    parser.add_argument("--chunk-size", type=int, default=4096, help="Bytes per simulated network read (default: 4096)")
+    parser.add_argument("--rounds", type=int, default=3, help="Repetitions, best time is reported (default: 3)")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only benchmark the incremental parser")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, "rb") as f:
+            stream = f.read()
+        source = args.input
+    else:
+        stream = synthesize_stream(int(args.size_mb * 1024 * 1024))
+        source = "synthesized"
+
+    chunks = split_chunks(stream, args.chunk_size)
+    print(f"Stream: {source}, {len(stream) / 1024 / 1024:.2f} MB in {len(chunks)} chunks of {args.chunk_size} bytes")
+
+    incremental = run("incremental", incremental_parse, chunks, len(stream), args.rounds)
+    if not args.skip_legacy:
+        legacy = run("legacy", legacy_parse, chunks, len(stream), args.rounds)
+        print(f"Speedup: {legacy / incremental:.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Local MiniMax Stand-in Server
+
+Offline replacement for the MiniMax Anthropic-compatible endpoint used by
+`minimaxClient.generateCodeStream`, so the whole specify → plan → implement
+pipeline can be benchmarked deterministically without network or API cost.
+
+Speaks the Anthropic Messages wire format: `POST /v1/messages` with
+`"stream": true` answers with `message_start` / `content_block_*` /
+`message_delta` / `message_stop` SSE events, non-streaming requests get a
+single JSON message (enough for `testConnection()`).
+
+Canned output uses the filename-header format `parseGeneratedCode`
+understands. By default a small calculator project is returned; pass
+--project-dir to replay the files of an existing generated project
+(spec.md for specify, plan.md for plan, everything else for implement).
+
+Point the frontend at it with:
+    MINIMAX_BASE_URL=http://127.0.0.1:8765 MINIMAX_API_KEY=fake npm run dev
+
+Usage:
+    python scripts/fake_minimax.py [--port 8765] [--tokens-per-sec 80] [--ttft-ms 400]
+                                   [--jitter 0.2] [--error-rate 0.0] [--midstream-error-rate 0.0]
+                                   [--disconnect-rate 0.0] [--project-dir projects/<id>] [--seed 42]
+
+Endpoints:
+    POST /v1/messages   streaming / non-streaming completion
+    GET  /health        liveness
+    GET  /stats         request, token and injected-error counters
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Configuration
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MODEL = "MiniMax-M2.1"
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+TOKEN_PATTERN = re.compile(r"\s*\S+|\s+")
+
+# Checked in order; the implement prompt embeds the spec and plan, so it must win
+PHASE_KEYWORDS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("implement", ("implement", "实现代码", "代码实现", "生成代码")),
+    ("plan", ("plan", "实现计划", "计划")),
+    ("specify", ("specify", "specification", "规格", "需求")),
+]
+
+DEFAULT_OUTPUTS: Dict[str, str] = {
+    "specify": """spec.md
+# 需求规格说明
+
+## 功能
+- 命令行计算器，支持加、减、乘、除
+- 除数为零时给出友好提示
+- 输入非数字时提示重新输入
+
+## 非功能
+- 仅使用 Python 标准库
+""",
+    "plan": """plan.md
+# 实现计划
+
+1. 在 main.py 中实现 add / subtract / multiply / divide
+2. 实现 main() 读取用户输入并分派运算
+3. 编写 README.md 说明运行方式
+4. requirements.txt 标注无第三方依赖
+""",
+    "implement": """main.py
+def add(x, y):
+    return x + y
+
+
+def subtract(x, y):
+    return x - y
+
+
+def multiply(x, y):
+    return x * y
+
+
+def divide(x, y):
+    if y == 0:
+        return "Error: Division by zero"
+    return x / y
+
+
+def main():
+    print("Simple Calculator")
+    try:
+        num1 = float(input("Enter first number: "))
+        operation = input("Enter operation (+, -, *, /): ")
+        num2 = float(input("Enter second number: "))
+    except ValueError:
+        print("Invalid input. Please enter numbers.")
+        return
+
+    operations = {'+': add, '-': subtract, '*': multiply, '/': divide}
+    handler = operations.get(operation)
+    print(f"Result: {handler(num1, num2)}" if handler else "Invalid operation")
+
+
+if __name__ == "__main__":
+    main()
+
+README.md
+# Simple Calculator
+
+A command-line calculator built with the Python standard library.
+
+## Usage
+
+```bash
+python main.py
+```
+
+requirements.txt
+# No external dependencies required
+""",
+}
+
+
+def load_project_outputs(project_dir: Path) -> Dict[str, str]:
+    """Build per-phase canned outputs from an existing generated project."""
+    if not project_dir.is_dir():
+        raise ValueError(f"Project directory not found: {project_dir}")
+
+    outputs = {"specify": "", "plan": "", "implement": ""}
+    sections: List[str] = []
+
+    for path in sorted(project_dir.rglob("*")):
+        if not path.is_file():
+            continue
+        relative = path.relative_to(project_dir).as_posix()
+        content = path.read_text(encoding="utf-8", errors="replace").strip()
+        section = f"{relative}\n{content}\n\n"
+
+        if relative == "spec.md":
+            outputs["specify"] = section
+        elif relative == "plan.md":
+            outputs["plan"] = section
+        else:
+            sections.append(section)
+
+    outputs["implement"] = "".join(sections)
+    for phase, text in outputs.items():
+        if not text:
+            outputs[phase] = DEFAULT_OUTPUTS[phase]
+    return outputs
+
+
+def detect_phase(body: Dict) -> str:
+    """Guess the pipeline phase from the rendered prompt."""
+    parts: List[str] = []
+    system = body.get("system")
+    if isinstance(system, str):
+        parts.append(system)
+    elif isinstance(system, list):
+        parts.extend(block.get("text", "") for block in system if isinstance(block, dict))
+
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(block.get("text", "") for block in content if isinstance(block, dict))
+
+    text = "\n".join(parts).lower()
+    for phase, keywords in PHASE_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return phase
+    return "implement"
+
+
+def tokenize(text: str) -> List[str]:
+    """Split output into word-sized pseudo tokens, preserving whitespace exactly."""
+    return TOKEN_PATTERN.findall(text)
+
+
+def sse_frame(event: str, payload: Dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+class FakeMinimaxServer:
+    """Minimal HTTP/1.1 server (keep-alive, chunked streaming) on asyncio streams."""
+
+    def __init__(self, args: argparse.Namespace, outputs: Dict[str, str]):
+        self.args = args
+        self.outputs = outputs
+        self.rng = random.Random(args.seed)
+        self.started_at = time.time()
+        self.stats = {
+            "requests": 0,
+            "streams": 0,
+            "streams_completed": 0,
+            "tokens_sent": 0,
+            "injected_http_errors": 0,
+            "injected_midstream_errors": 0,
+            "injected_disconnects": 0,
+            "phases": {"specify": 0, "plan": 0, "implement": 0},
+        }
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                keep_alive = await self._route(writer, method, path, body) and keep_alive
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", "0") or 0)
+        if length > MAX_BODY_BYTES:
+            return None
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    async def _route(self, writer: asyncio.StreamWriter, method: str, path: str, body: bytes) -> bool:
+        """Dispatch a request; returns False when the connection must be closed."""
+        self.stats["requests"] += 1
+
+        if method == "GET" and path == "/health":
+            return await self._send_json(writer, 200, {"status": "ok"})
+
+        if method == "GET" and path == "/stats":
+            return await self._send_json(writer, 200, {**self.stats, "uptime": round(time.time() - self.started_at, 1)})
+
+        if method == "POST" and path.endswith("/v1/messages"):
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError:
+                return await self._send_error(writer, 400, "invalid_request_error", "Body is not valid JSON")
+            return await self._messages(writer, payload)
+
+        return await self._send_error(writer, 404, "not_found_error", f"No route for {method} {path}")
+
+    async def _messages(self, writer: asyncio.StreamWriter, payload: Dict) -> bool:
+        phase = detect_phase(payload)
+        self.stats["phases"][phase] += 1
+        model = payload.get("model") or DEFAULT_MODEL
+
+        if self.rng.random() < self.args.error_rate:
+            self.stats["injected_http_errors"] += 1
+            logger.info(f"Injecting HTTP 529 for {phase}")
+            return await self._send_error(writer, 529, "overloaded_error", "Overloaded (injected by fake_minimax)")
+
+        text = self.outputs[phase]
+        tokens = tokenize(text)
+
+        if not payload.get("stream"):
+            await asyncio.sleep(self.args.ttft_ms / 1000)
+            message = self._message_envelope(model, payload)
+            message["content"] = [{"type": "text", "text": text}]
+            message["stop_reason"] = "end_turn"
+            message["usage"]["output_tokens"] = len(tokens)
+            return await self._send_json(writer, 200, message)
+
+        return await self._stream(writer, model, payload, phase, tokens)
+
+    async def _stream(self, writer: asyncio.StreamWriter, model: str, payload: Dict, phase: str, tokens: List[str]) -> bool:
+        self.stats["streams"] += 1
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+        )
+
+        async def send(event: str, data: Dict) -> None:
+            frame = sse_frame(event, data)
+            writer.write(b"%x\r\n%s\r\n" % (len(frame), frame))
+            await writer.drain()
+
+        message = self._message_envelope(model, payload)
+        await send("message_start", {"type": "message_start", "message": message})
+
+        await asyncio.sleep(self._jittered(self.args.ttft_ms / 1000))
+        await send("ping", {"type": "ping"})
+
+        index = 0
+        if self.args.thinking:
+            await send("content_block_start", {"type": "content_block_start", "index": index,
+                                               "content_block": {"type": "thinking", "thinking": ""}})
+            await send("content_block_delta", {"type": "content_block_delta", "index": index,
+                                               "delta": {"type": "thinking_delta", "thinking": f"Working on the {phase} phase."}})
+            await send("content_block_stop", {"type": "content_block_stop", "index": index})
+            index += 1
+
+        await send("content_block_start", {"type": "content_block_start", "index": index,
+                                           "content_block": {"type": "text", "text": ""}})
+
+        fail_at = len(tokens) + 1
+        failure = None
+        roll = self.rng.random()
+        if roll < self.args.midstream_error_rate:
+            failure = "error"
+        elif roll < self.args.midstream_error_rate + self.args.disconnect_rate:
+            failure = "disconnect"
+        if failure:
+            fail_at = self.rng.randint(1, max(1, len(tokens) - 1))
+
+        per_delta = max(1, self.args.tokens_per_delta)
+        interval = per_delta / self.args.tokens_per_sec if self.args.tokens_per_sec > 0 else 0.0
+        sent = 0
+
+        for start in range(0, len(tokens), per_delta):
+            if sent >= fail_at:
+                if failure == "error":
+                    self.stats["injected_midstream_errors"] += 1
+                    logger.info(f"Injecting mid-stream error in {phase} after {sent} tokens")
+                    await send("error", {"type": "error", "error": {"type": "overloaded_error",
+                                                                    "message": "Overloaded (injected by fake_minimax)"}})
+                    writer.write(b"0\r\n\r\n")
+                    await writer.drain()
+                    return True
+
+                self.stats["injected_disconnects"] += 1
+                logger.info(f"Injecting disconnect in {phase} after {sent} tokens")
+                return False
+
+            group = tokens[start:start + per_delta]
+            await send("content_block_delta", {"type": "content_block_delta", "index": index,
+                                               "delta": {"type": "text_delta", "text": "".join(group)}})
+            sent += len(group)
+            self.stats["tokens_sent"] += len(group)
+            if interval:
+                await asyncio.sleep(self._jittered(interval))
+
+        await send("content_block_stop", {"type": "content_block_stop", "index": index})
+        await send("message_delta", {"type": "message_delta",
+                                     "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                     "usage": {"output_tokens": len(tokens)}})
+        await send("message_stop", {"type": "message_stop"})
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+        self.stats["streams_completed"] += 1
+        return True
+
+    def _message_envelope(self, model: str, payload: Dict) -> Dict:
+        prompt_chars = len(json.dumps(payload.get("messages", []), ensure_ascii=False))
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [],
+            "stop_reason": None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": max(1, prompt_chars // 4), "output_tokens": 0},
+        }
+
+    def _jittered(self, seconds: float) -> float:
+        if seconds <= 0 or self.args.jitter <= 0:
+            return max(0.0, seconds)
+        return max(0.0, seconds * (1 + self.rng.uniform(-self.args.jitter, self.args.jitter)))
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: Dict) -> bool:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 529: "Overloaded"}.get(status, "Error")
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: keep-alive\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+        return True
+
+    async def _send_error(self, writer: asyncio.StreamWriter, status: int, error_type: str, message: str) -> bool:
+        return await self._send_json(writer, status, {"type": "error", "error": {"type": error_type, "message": message}})
+
+
+async def serve(args: argparse.Namespace, outputs: Dict[str, str]) -> None:
+    fake = FakeMinimaxServer(args, outputs)
+    server = await asyncio.start_server(fake.handle_connection, args.host, args.port)
+    logger.info(f"Fake MiniMax listening on http://{args.host}:{args.port} "
+                f"({args.tokens_per_sec} tok/s, TTFT {args.ttft_ms}ms, jitter {args.jitter})")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local streaming MiniMax stand-in server")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Bind address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--tokens-per-sec", type=float, default=80.0, help="Output rate, 0 for unthrottled (default: 80)")
+    parser.add_argument("--tokens-per-delta", type=int, default=1, help="Tokens per content_block_delta (default: 1)")
+    parser.add_argument("--ttft-ms", type=float, default=400.0, help="Time to first token in ms (default: 400)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Relative jitter applied to every delay, 0-1 (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an HTTP 529 before streaming")
+    parser.add_argument("--midstream-error-rate", type=float, default=0.0, help="Probability of an SSE error event mid-stream")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0, help="Probability of dropping the connection mid-stream")
+    parser.add_argument("--thinking", action="store_true", help="Emit a thinking block before the text block")
+    parser.add_argument("--project-dir", type=str, help="Replay the files of an existing generated project")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for jitter and error injection")
+
+    args = parser.parse_args()
+
+    for name in ("jitter", "error_rate", "midstream_error_rate", "disconnect_rate"):
+        if not 0.0 <= getattr(args, name) <= 1.0:
+            parser.error(f"--{name.replace('_', '-')} must be between 0 and 1")
+
+    try:
+        outputs = load_project_outputs(Path(args.project_dir)) if args.project_dir else dict(DEFAULT_OUTPUTS)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    try:
+        asyncio.run(serve(args, outputs))
+    except KeyboardInterrupt:
+        logger.info("Shutting down")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Concurrent Load Generator for the Generation Pipeline
+
+Drives the Next.js backend with many simultaneous generations to find the
+point where the in-memory `streams` / `activeGenerations` maps and the event
+loop stop keeping up.
+
+Each virtual client opens `/api/stream/{project_id}`, waits for the
+`connected` handshake, then fires the matching `POST /api/generate` and
+follows the stream until `generation_complete` (or an error / timeout).
+Client start times follow a configurable arrival process:
+
+    constant  - evenly spaced at --rate clients per second
+    poisson   - exponential inter-arrival times with mean 1 / --rate
+    burst     - --burst-size clients at once, every --burst-interval seconds
+
+The report (stdout and --output) is JSON with p50/p95/p99 for
+time-to-connected, time-to-first-chunk and time-to-generation_complete,
+plus error, HTTP 409 (duplicate project) and HTTP 429 (scheduler rejection) rates.
+
+All virtual clients come from this machine's address, so the server counts
+them as one client. Its per-client limit (GENERATION_MAX_PER_CLIENT) is off by
+default; if it is set, every client beyond the limit is rejected with 429, so
+leave it unset when measuring capacity.
+
+Usage:
+    python scripts/load_generate.py --clients 20 --arrival poisson --rate 2
+    python scripts/load_generate.py --clients 50 --arrival burst --burst-size 10 --burst-interval 5 --output load.json
+
+Dependencies: httpx
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+from sse_parser import aiter_sse_events
+from stream_metrics import Histogram
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Configuration
+DEFAULT_BASE_URL = "http://localhost:3000"
+GENERATE_ENDPOINT = "/api/generate"
+STREAM_ENDPOINT_TEMPLATE = "/api/stream/{}"
+DEFAULT_PROMPT = "Create a simple Python hello world script"
+
+# Timeouts
+CONNECT_TIMEOUT = 10  # seconds
+GENERATION_TIMEOUT = 600  # seconds
+
+TERMINAL_EVENTS = {"generation_complete", "generation_error"}
+
+
+@dataclass
+class ClientResult:
+    """Outcome and timings of one virtual client (all times in ms)."""
+
+    project_id: str
+    scheduled_offset: float
+    status: str = "pending"
+    http_status: Optional[int] = None
+    error: Optional[str] = None
+    time_to_connected: Optional[float] = None
+    time_to_first_chunk: Optional[float] = None
+    time_to_complete: Optional[float] = None
+    events: int = 0
+    chunks: int = 0
+    event_counts: Dict[str, int] = field(default_factory=dict)
+
+
+def arrival_offsets(args: argparse.Namespace) -> List[float]:
+    """Start offsets (seconds from t0) for every client."""
+    rng = random.Random(args.seed)
+    offsets: List[float] = []
+
+    if args.arrival == "constant":
+        interval = 1.0 / args.rate if args.rate > 0 else 0.0
+        offsets = [i * interval for i in range(args.clients)]
+
+    elif args.arrival == "poisson":
+        t = 0.0
+        for _ in range(args.clients):
+            offsets.append(t)
+            t += rng.expovariate(args.rate) if args.rate > 0 else 0.0
+
+    elif args.arrival == "burst":
+        for i in range(args.clients):
+            offsets.append((i // args.burst_size) * args.burst_interval)
+
+    return offsets
+
+
+class LoadGenerator:
+    """Runs the virtual clients and aggregates their results."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.base_url = args.base_url.rstrip("/")
+        self.results: List[ClientResult] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._project_pool = [f"load-{uuid.uuid4()}" for _ in range(args.project_pool)]
+
+    def _project_id(self, index: int) -> str:
+        if self._project_pool:
+            return self._project_pool[index % len(self._project_pool)]
+        return f"load-{uuid.uuid4()}"
+
+    async def run(self) -> Dict:
+        offsets = arrival_offsets(self.args)
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=self.args.clients)
+        timeout = httpx.Timeout(CONNECT_TIMEOUT, read=self.args.timeout)
+
+        logger.info(f"Starting {self.args.clients} clients against {self.base_url} "
+                    f"(arrival={self.args.arrival}, rate={self.args.rate}/s)")
+
+        t0 = time.monotonic()
+        async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+            tasks = [
+                asyncio.create_task(self._run_client(client, self._project_id(i), t0, offset))
+                for i, offset in enumerate(offsets)
+            ]
+            self.results = await asyncio.gather(*tasks)
+
+        wall_time = time.monotonic() - t0
+        return self._report(wall_time)
+
+    async def _run_client(self, client: httpx.AsyncClient, project_id: str, t0: float, offset: float) -> ClientResult:
+        delay = t0 + offset - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        result = ClientResult(project_id=project_id, scheduled_offset=round(offset, 3))
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        try:
+            await asyncio.wait_for(self._drive(client, result), timeout=self.args.timeout)
+        except asyncio.TimeoutError:
+            result.status = "timeout"
+            result.error = f"no terminal event within {self.args.timeout}s"
+        except httpx.HTTPError as e:
+            result.status = "stream_error"
+            result.error = f"{type(e).__name__}: {e}"
+        finally:
+            self.in_flight -= 1
+
+        return result
+
+    async def _drive(self, client: httpx.AsyncClient, result: ClientResult) -> None:
+        stream_url = f"{self.base_url}{STREAM_ENDPOINT_TEMPLATE.format(result.project_id)}"
+        started = time.monotonic()
+        generate_sent: Optional[float] = None
+
+        async with client.stream("GET", stream_url, headers={"Accept": "text/event-stream"}) as response:
+            if response.status_code != 200:
+                result.status = "stream_error"
+                result.http_status = response.status_code
+                result.error = f"SSE connection failed: {response.status_code}"
+                return
+
+            async for event in aiter_sse_events(response.aiter_bytes()):
+                now = time.monotonic()
+                result.events += 1
+                result.event_counts[event.event] = result.event_counts.get(event.event, 0) + 1
+
+                if event.event == "connected" and generate_sent is None:
+                    result.time_to_connected = (now - started) * 1000
+                    generate_sent = now
+
+                    # The route returns as soon as it sees our stream registered;
+                    # events emitted meanwhile wait in the socket buffer.
+                    await self._post_generate(client, result)
+                    if result.status in ("conflict", "rejected", "http_error"):
+                        break
+
+                elif event.event == "chunk":
+                    result.chunks += 1
+                    if result.time_to_first_chunk is None and generate_sent is not None:
+                        result.time_to_first_chunk = (now - generate_sent) * 1000
+
+                elif event.event in TERMINAL_EVENTS:
+                    if generate_sent is not None:
+                        result.time_to_complete = (now - generate_sent) * 1000
+                    result.status = "completed" if event.event == "generation_complete" else "generation_error"
+                    break
+
+        if result.status == "pending":
+            result.status = "stream_closed"
+
+    async def _post_generate(self, client: httpx.AsyncClient, result: ClientResult) -> None:
+        payload = {"prompt": self.args.prompt, "projectId": result.project_id}
+        try:
+            response = await client.post(f"{self.base_url}{GENERATE_ENDPOINT}", json=payload)
+        except httpx.HTTPError as e:
+            result.status = "http_error"
+            result.error = f"{type(e).__name__}: {e}"
+            return
+
+        result.http_status = response.status_code
+        if response.status_code == 409:
+            result.status = "conflict"
+        elif response.status_code == 429:
+            # Turned away by the generation scheduler (queue full or per-client limit)
+            result.status = "rejected"
+            result.error = response.text[:200]
+        elif response.status_code != 200:
+            result.status = "http_error"
+            result.error = response.text[:200]
+
+    def _report(self, wall_time: float) -> Dict:
+        total = len(self.results)
+        histograms = {
+            "time_to_connected": Histogram("time_to_connected"),
+            "time_to_first_chunk": Histogram("time_to_first_chunk"),
+            "time_to_generation_complete": Histogram("time_to_generation_complete"),
+        }
+        statuses: Dict[str, int] = {}
+
+        for result in self.results:
+            statuses[result.status] = statuses.get(result.status, 0) + 1
+            if result.time_to_connected is not None:
+                histograms["time_to_connected"].record(result.time_to_connected)
+            if result.time_to_first_chunk is not None:
+                histograms["time_to_first_chunk"].record(result.time_to_first_chunk)
+            if result.status == "completed" and result.time_to_complete is not None:
+                histograms["time_to_generation_complete"].record(result.time_to_complete)
+
+        completed = statuses.get("completed", 0)
+        conflicts = statuses.get("conflict", 0)
+        rejected = statuses.get("rejected", 0)
+        errors = total - completed - conflicts - rejected
+
+        report = {
+            "config": {
+                "base_url": self.base_url,
+                "clients": self.args.clients,
+                "arrival": self.args.arrival,
+                "rate": self.args.rate,
+                "burst_size": self.args.burst_size,
+                "burst_interval": self.args.burst_interval,
+                "project_pool": self.args.project_pool,
+                "timeout": self.args.timeout,
+            },
+            "wall_time_s": round(wall_time, 3),
+            "peak_in_flight": self.peak_in_flight,
+            "statuses": statuses,
+            "rates": {
+                "completed": _ratio(completed, total),
+                "error": _ratio(errors, total),
+                "http_409": _ratio(conflicts, total),
+                "http_429": _ratio(rejected, total),
+            },
+            "latency_ms": {name: hist.summary((50.0, 95.0, 99.0)) for name, hist in histograms.items()},
+        }
+
+        if self.args.include_clients:
+            report["clients"] = [asdict(result) for result in self.results]
+
+        return report
+
+
+def _ratio(part: int, total: int) -> float:
+    return round(part / total, 4) if total else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load generator for /api/generate + /api/stream")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help=f"Backend base URL (default: {DEFAULT_BASE_URL})")
+    parser.add_argument("--clients", type=int, default=10, help="Number of virtual clients (default: 10)")
+    parser.add_argument("--arrival", choices=["constant", "poisson", "burst"], default="constant",
+                        help="Arrival process (default: constant)")
+    parser.add_argument("--rate", type=float, default=1.0, help="Clients per second for constant/poisson (default: 1)")
+    parser.add_argument("--burst-size", type=int, default=5, help="Clients per burst (default: 5)")
+    parser.add_argument("--burst-interval", type=float, default=10.0, help="Seconds between bursts (default: 10)")
+    parser.add_argument("--project-pool", type=int, default=0,
+                        help="Reuse this many project IDs round-robin to provoke 409s (default: 0, unique IDs)")
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT, help="Prompt sent with every generation")
+    parser.add_argument("--timeout", type=float, default=GENERATION_TIMEOUT,
+                        help=f"Per-client timeout in seconds (default: {GENERATION_TIMEOUT})")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for the poisson arrival process")
+    parser.add_argument("--output", type=str, help="Write the JSON report to this file")
+    parser.add_argument("--include-clients", action="store_true", help="Include per-client results in the report")
+
+    args = parser.parse_args()
+
+    if args.clients < 1 or args.burst_size < 1:
+        parser.error("--clients and --burst-size must be positive")
+
+    report = asyncio.run(LoadGenerator(args).run())
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        logger.info(f"Report written to {args.output}")
+
+    sys.exit(0 if report["rates"]["error"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
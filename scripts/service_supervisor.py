@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Service Supervisor for the Verification Scripts
+
+Shared start / attach / stop logic for verify_stream_output.py,
+verify_endpoints.py and verify_e2e_simple.py.
+
+Readiness is probed with a plain socket connect followed by the health JSON
+(`status` of "healthy" or "degraded") every PROBE_INTERVAL seconds, so a
+server is picked up as soon as it is listening instead of on the next 2s
+tick. A server that is already healthy on the port is reused; only a port
+held by an unhealthy process is cleared before a cold start.
+
+Every start or attach is appended to COLD_START_METRICS_FILE (JSONL), so
+cold-start time can be tracked across runs.
+
+Environment:
+    VERIFY_REUSE_SERVER=0   always cold-start, even if a healthy server is up
+    VERIFY_KEEP_SERVER=1    leave a server we started running for the next suite
+
+Usage:
+    from service_supervisor import ServiceSupervisor
+
+    with ServiceSupervisor(cmd, cwd=backend_dir, port=8001, suite="verify_endpoints") as service:
+        ...
+
+    # Keep a warm server around for several suites
+    python scripts/service_supervisor.py start
+    python scripts/service_supervisor.py status
+    python scripts/service_supervisor.py report
+    python scripts/service_supervisor.py stop
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import psutil
+import requests
+
+from stream_metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DEFAULT_HOST = "localhost"
+DEFAULT_PORT = 8001
+HEALTH_ENDPOINT = "/api/health"
+READY_STATUSES = ("healthy", "degraded")
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# Timeouts
+STARTUP_TIMEOUT = 30  # seconds
+PROBE_INTERVAL = 0.1  # seconds between readiness probes
+CONNECT_TIMEOUT = 0.5  # seconds for the socket probe
+HEALTH_TIMEOUT = 5  # seconds for the health request
+STOP_TIMEOUT = 5  # seconds before SIGKILL
+
+# Metrics
+COLD_START_METRICS_FILE = "service_cold_start.jsonl"
+
+
+def default_uvicorn_command(port: int = DEFAULT_PORT, python: Optional[str] = None,
+                            log_level: str = "info") -> List[str]:
+    """The backend's uvicorn command line."""
+    return [
+        python or sys.executable, "-m", "uvicorn",
+        "src.main:app",
+        "--host", "0.0.0.0",
+        "--port", str(port),
+        "--log-level", log_level,
+    ]
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("", "0", "false", "no")
+
+
+def port_is_open(host: str, port: int, timeout: float = CONNECT_TIMEOUT) -> bool:
+    """True if something accepts TCP connections on host:port."""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def listening_pids(port: int) -> List[int]:
+    """PIDs listening on a local TCP port."""
+    pids = []
+    for conn in psutil.net_connections(kind="tcp"):
+        if conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr.port == port and conn.pid:
+            pids.append(conn.pid)
+    return pids
+
+
+def free_port(port: int) -> None:
+    """Terminate whatever is listening on port (SIGKILL after STOP_TIMEOUT)."""
+    for pid in listening_pids(port):
+        try:
+            process = psutil.Process(pid)
+            logger.info(f"终止端口 {port} 上的进程: {process.name()} (PID: {pid})")
+            process.terminate()
+            try:
+                process.wait(timeout=STOP_TIMEOUT)
+            except psutil.TimeoutExpired:
+                logger.warning(f"强制终止进程: {pid}")
+                process.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+            logger.warning(f"无法终止进程 {pid}: {e}")
+
+
+class ServiceSupervisor:
+    """Attach to a healthy service on the port, or cold-start one and wait for readiness."""
+
+    def __init__(self, cmd: Optional[Sequence[str]] = None, cwd: Optional[Path] = None,
+                 host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, health_endpoint: str = HEALTH_ENDPOINT,
+                 startup_timeout: float = STARTUP_TIMEOUT, probe_interval: float = PROBE_INTERVAL,
+                 reuse: Optional[bool] = None, keep_running: Optional[bool] = None,
+                 log_file: Optional[Path] = None, suite: str = "",
+                 metrics_file: Optional[str] = COLD_START_METRICS_FILE):
+        self.cmd = list(cmd) if cmd else default_uvicorn_command(port)
+        self.cwd = cwd or BACKEND_DIR
+        self.host = host
+        self.port = port
+        self.health_url = f"http://{host}:{port}{health_endpoint}"
+        self.startup_timeout = startup_timeout
+        self.probe_interval = probe_interval
+        self.reuse = _env_flag("VERIFY_REUSE_SERVER", True) if reuse is None else reuse
+        self.keep_running = _env_flag("VERIFY_KEEP_SERVER", False) if keep_running is None else keep_running
+        self.log_file = log_file
+        self.suite = suite
+        self.metrics_file = metrics_file
+
+        self.process: Optional[subprocess.Popen] = None
+        self.attached = False
+        self.cold_start_seconds: Optional[float] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def probe(self) -> bool:
+        """Socket connect first (cheap), then the health JSON."""
+        if not port_is_open(self.host, self.port):
+            return False
+        try:
+            response = requests.get(self.health_url, timeout=HEALTH_TIMEOUT)
+            if response.status_code != 200:
+                return False
+            return response.json().get("status") in READY_STATUSES
+        except (requests.RequestException, ValueError, AttributeError):
+            return False
+
+    def ensure_running(self) -> bool:
+        """Reuse a healthy server if allowed, otherwise start one and wait until ready."""
+        if self.reuse and self.probe():
+            logger.info(f"✅ 复用已运行的服务: {self.base_url}")
+            self.attached = True
+            self._record("attached", 0.0, True)
+            return True
+
+        if port_is_open(self.host, self.port):
+            free_port(self.port)
+
+        return self._cold_start()
+
+    def _cold_start(self) -> bool:
+        logger.info(f"启动服务: {' '.join(self.cmd)}")
+        output = open(self.log_file, "ab") if self.log_file else subprocess.DEVNULL
+
+        started = time.perf_counter()
+        try:
+            self.process = subprocess.Popen(
+                self.cmd,
+                cwd=str(self.cwd),
+                stdout=output,
+                stderr=subprocess.STDOUT if self.log_file else subprocess.DEVNULL,
+                creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0,
+                start_new_session=self.keep_running and sys.platform != 'win32',
+            )
+        except OSError as e:
+            logger.error(f"启动服务失败: {e}")
+            self._record("cold", time.perf_counter() - started, False)
+            return False
+        finally:
+            if self.log_file:
+                output.close()
+
+        ready = self._wait_until_ready(started)
+        elapsed = time.perf_counter() - started
+        self._record("cold", elapsed, ready)
+
+        if ready:
+            self.cold_start_seconds = elapsed
+            logger.info(f"✅ 服务已就绪 (冷启动 {elapsed:.2f}s)")
+        else:
+            self.stop(force=True)
+        return ready
+
+    def _wait_until_ready(self, started: float) -> bool:
+        deadline = started + self.startup_timeout
+        while time.perf_counter() < deadline:
+            if self.process.poll() is not None:
+                logger.error(f"❌ 服务进程提前退出，退出码: {self.process.returncode}")
+                return False
+            if self.probe():
+                return True
+            time.sleep(self.probe_interval)
+
+        logger.error(f"❌ 服务启动超时 ({self.startup_timeout}s)")
+        return False
+
+    def stop(self, force: bool = False) -> None:
+        """Stop the server if we started it (and are not keeping it warm)."""
+        if self.process is None or self.process.poll() is not None:
+            return
+        if self.keep_running and not force:
+            logger.info(f"保留服务供后续测试复用 (PID: {self.process.pid})")
+            return
+
+        logger.info("停止服务进程...")
+        try:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                logger.warning("强制终止服务进程")
+                self.process.kill()
+        except OSError as e:
+            logger.error(f"停止服务失败: {e}")
+
+    def _record(self, mode: str, seconds: float, ready: bool) -> None:
+        if not self.metrics_file:
+            return
+        record = {
+            "timestamp": time.time(),
+            "suite": self.suite,
+            "port": self.port,
+            "mode": mode,
+            "seconds": round(seconds, 4),
+            "ready": ready,
+        }
+        try:
+            with open(self.metrics_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.warning(f"写入冷启动指标失败: {e}")
+
+    def __enter__(self) -> "ServiceSupervisor":
+        if not self.ensure_running():
+            raise RuntimeError(f"Service on port {self.port} did not become ready")
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+def summarize_metrics(path: str = COLD_START_METRICS_FILE) -> Dict:
+    """Cold-start / attach statistics from the metrics JSONL."""
+    cold = Histogram("cold_start", unit="s")
+    by_suite: Dict[str, Dict[str, int]] = {}
+    failures = 0
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            counts = by_suite.setdefault(record.get("suite") or "-", {"cold": 0, "attached": 0})
+            counts[record["mode"]] = counts.get(record["mode"], 0) + 1
+            if record["mode"] == "cold":
+                if record["ready"]:
+                    cold.record(record["seconds"])
+                else:
+                    failures += 1
+
+    return {"cold_start_s": cold.summary(), "failed_starts": failures, "by_suite": by_suite}
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Start, reuse and measure the backend service for the verify scripts")
+    parser.add_argument("command", choices=("start", "status", "stop", "report"))
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Service port (default: {DEFAULT_PORT})")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Service host (default: {DEFAULT_HOST})")
+    parser.add_argument("--log-file", type=Path, help="Append server output to this file")
+    parser.add_argument("--metrics-file", default=COLD_START_METRICS_FILE,
+                        help=f"Cold-start metrics JSONL (default: {COLD_START_METRICS_FILE})")
+    args = parser.parse_args()
+
+    if args.command == "report":
+        print(json.dumps(summarize_metrics(args.metrics_file), indent=2))
+        return
+
+    supervisor = ServiceSupervisor(host=args.host, port=args.port, keep_running=True,
+                                   log_file=args.log_file, suite="cli", metrics_file=args.metrics_file)
+
+    if args.command == "status":
+        healthy = supervisor.probe()
+        print(json.dumps({"url": supervisor.base_url, "healthy": healthy, "pids": listening_pids(args.port)}))
+        sys.exit(0 if healthy else 1)
+
+    if args.command == "stop":
+        free_port(args.port)
+        return
+
+    sys.exit(0 if supervisor.ensure_running() else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Incremental SSE Parser
+
+Shared Server-Sent Events parser for every client script in scripts/.
+It consumes raw bytes exactly as they come off the socket, keeps them in a
+single bytearray with a read cursor, and only decodes complete lines, so a
+large `chunk` or `phase_complete` payload is never re-concatenated as a str.
+
+Supports the full field set of the SSE spec (`event:`, multi-line `data:`,
+`id:`, `retry:` and `:` comments), LF / CRLF / CR line endings, and events
+split across arbitrary chunk boundaries.
+
+Usage:
+    from sse_parser import iter_sse_events, aiter_sse_events
+
+    # requests (sync)
+    response = requests.get(url, stream=True)
+    for event in iter_sse_events(response.iter_content(chunk_size=None)):
+        print(event.event, event.json())
+
+    # httpx (async)
+    async with client.stream("GET", url) as response:
+        async for event in aiter_sse_events(response.aiter_bytes()):
+            print(event.event, event.json())
+"""
+
+import codecs
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, List, Optional
+
+_utf8_decode = codecs.utf_8_decode
+
+# Compact the buffer once the consumed prefix grows past this many bytes
+COMPACT_THRESHOLD = 64 * 1024
+
+
+@dataclass
+class SSEEvent:
+    """A single dispatched SSE event."""
+
+    event: str = "message"
+    data: str = ""
+    id: Optional[str] = None
+    retry: Optional[int] = None
+
+    def json(self) -> Any:
+        """Decode the data field as JSON (done lazily, on demand)."""
+        return json.loads(self.data)
+
+
+class SSEParser:
+    """Incremental SSE parser working on raw bytes.
+
+    Call `feed()` with every chunk received from the network; it returns the
+    events completed by that chunk. Call `flush()` once the stream ends to
+    dispatch a trailing event that was not terminated by a blank line.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+        # Bytes before this offset hold no line terminator, so searching resumes
+        # here; keeps a long line spread over many chunks linear to scan
+        self._scan = 0
+        self._skip_lf = False
+
+        self._event_type = ""
+        self._data: List[str] = []
+        self._last_event_id: Optional[str] = None
+        self._retry: Optional[int] = None
+
+    @property
+    def last_event_id(self) -> Optional[str]:
+        """Last `id:` seen on the stream, as used for `Last-Event-ID` on reconnect."""
+        return self._last_event_id
+
+    @property
+    def retry(self) -> Optional[int]:
+        """Last reconnection time (ms) announced by the server via `retry:`."""
+        return self._retry
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """Append a chunk of raw bytes and return the events it completed."""
+        if not chunk:
+            return []
+
+        buf = self._buf
+        buf += chunk
+        events: List[SSEEvent] = []
+        pos = self._pos
+        scan = self._scan
+        end = len(buf)
+
+        with memoryview(buf) as view:
+            while pos < end:
+                if self._skip_lf:
+                    self._skip_lf = False
+                    if buf[pos] == 0x0A:
+                        pos += 1
+                        continue
+
+                scan = max(scan, pos)
+                lf = buf.find(b"\n", scan)
+                limit = lf if lf != -1 else end
+                cr = buf.find(b"\r", scan, limit)
+
+                if cr != -1:
+                    line_end = cr
+                    next_pos = cr + 1
+                    self._skip_lf = True
+                elif lf != -1:
+                    line_end = lf
+                    next_pos = lf + 1
+                else:
+                    scan = end
+                    break
+
+                event = self._process_line(view, pos, line_end)
+                if event is not None:
+                    events.append(event)
+                pos = next_pos
+
+        if pos >= end:
+            buf.clear()
+            pos = scan = 0
+        elif pos > COMPACT_THRESHOLD:
+            del buf[:pos]
+            scan -= pos
+            pos = 0
+
+        self._pos = pos
+        self._scan = scan
+        return events
+
+    def flush(self) -> List[SSEEvent]:
+        """Dispatch whatever is left once the stream has ended."""
+        events: List[SSEEvent] = []
+
+        if self._pos < len(self._buf):
+            with memoryview(self._buf) as view:
+                self._process_line(view, self._pos, len(self._buf))
+            self._buf.clear()
+            self._pos = self._scan = 0
+
+        event = self._dispatch()
+        if event is not None:
+            events.append(event)
+        return events
+
+    def _process_line(self, view: memoryview, start: int, end: int) -> Optional[SSEEvent]:
+        """Apply one line to the pending event; a blank line dispatches it."""
+        if start == end:
+            return self._dispatch()
+
+        line = view[start:end]
+        if line[0] == 0x3A:  # ':' comment line
+            return None
+
+        colon = self._buf.find(b":", start, end)
+        if colon == -1:
+            field = bytes(line)
+            value = ""
+        else:
+            field = bytes(view[start:colon])
+            value_start = colon + 1
+            if value_start < end and view[value_start] == 0x20:
+                value_start += 1
+            value = _utf8_decode(view[value_start:end], "replace")[0]
+
+        if field == b"data":
+            self._data.append(value)
+        elif field == b"event":
+            self._event_type = value
+        elif field == b"id":
+            if "\x00" not in value:
+                self._last_event_id = value
+        elif field == b"retry":
+            if value.isdigit():
+                self._retry = int(value)
+
+        return None
+
+    def _dispatch(self) -> Optional[SSEEvent]:
+        """Build the pending event and reset the per-event state."""
+        data = self._data
+        event_type = self._event_type or "message"
+        self._event_type = ""
+
+        if not data:
+            return None
+
+        self._data = []
+        return SSEEvent(
+            event=event_type,
+            data=data[0] if len(data) == 1 else "\n".join(data),
+            id=self._last_event_id,
+            retry=self._retry,
+        )
+
+
+def iter_sse_events(chunks: Iterable[bytes], parser: Optional[SSEParser] = None) -> Iterator[SSEEvent]:
+    """Yield events from a sync byte source such as `requests.Response.iter_content()`."""
+    parser = parser or SSEParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.flush()
+
+
+async def aiter_sse_events(chunks: AsyncIterable[bytes], parser: Optional[SSEParser] = None) -> AsyncIterator[SSEEvent]:
+    """Yield events from an async byte source such as `httpx.Response.aiter_bytes()`."""
+    parser = parser or SSEParser()
+    async for chunk in chunks:
+        for event in parser.feed(chunk):
+            yield event
+    for event in parser.flush():
+        yield event
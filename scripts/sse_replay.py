@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+SSE Trace Recorder and Replayer
+
+Records a real generation's SSE stream with per-frame arrival timestamps,
+then serves it back on a local `/api/stream/{project_id}` endpoint so the
+ui-client `WorkbenchView` and the frontend `SSEConnector` can be exercised
+against realistic event streams without the backend or MiniMax.
+
+Traces are NDJSON capture files (see stream_capture.py); a .gz or .xz suffix
+compresses them.
+
+Usage:
+    # Record: open the stream, optionally trigger a generation, save every frame
+    python scripts/sse_replay.py record --base-url http://localhost:3000 \\
+        --prompt "Create a simple Python hello world script" --output trace.ndjson.gz
+
+    # Replay at 1x, 5x or as fast as the client reads
+    python scripts/sse_replay.py serve --trace trace.ndjson.gz --port 3001 --speed 1
+    python scripts/sse_replay.py serve --trace trace.ndjson.gz --speed 5
+    python scripts/sse_replay.py serve --trace trace.ndjson.gz --speed max
+
+The replayer also accepts `POST /api/generate` (answering `{"status": "started"}`)
+so the normal UI flow works unchanged; with --wait-for-generate the trace is
+held after the `connected` handshake until that POST arrives.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from sse_parser import SSEEvent, iter_sse_events
+from stream_capture import CaptureWriter, format_frame, read_frames
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Configuration
+DEFAULT_BASE_URL = "http://localhost:3000"
+GENERATE_ENDPOINT = "/api/generate"
+STREAM_ENDPOINT_PREFIX = "/api/stream/"
+DEFAULT_REPLAY_PORT = 3001
+
+RECORD_TIMEOUT = 600  # seconds
+TERMINAL_EVENTS = {"generation_complete", "generation_error"}
+
+CORS_HEADERS = (
+    "Access-Control-Allow-Origin: *\r\n"
+    "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+    "Access-Control-Allow-Headers: Content-Type, Last-Event-ID, Cache-Control\r\n"
+)
+
+
+def record(args: argparse.Namespace) -> bool:
+    """Record one SSE session to a trace file."""
+    base_url = args.base_url.rstrip("/")
+    project_id = args.project_id or str(uuid.uuid4())
+    stream_url = f"{base_url}{STREAM_ENDPOINT_PREFIX}{project_id}"
+
+    logger.info(f"Recording {stream_url} -> {args.output}")
+
+    try:
+        response = requests.get(stream_url, stream=True, headers={"Accept": "text/event-stream"},
+                                timeout=(10, args.timeout))
+    except requests.RequestException as e:
+        logger.error(f"SSE connection failed: {e}")
+        return False
+
+    if response.status_code != 200:
+        logger.error(f"SSE connection failed: {response.status_code}")
+        return False
+
+    started = time.monotonic()
+    generation_sent = False
+
+    with response, CaptureWriter(args.output, fmt="ndjson", started_at=started) as writer:
+        for event in iter_sse_events(response.iter_content(chunk_size=None)):
+            writer.write_event(event, received_at=time.monotonic())
+
+            if event.event == "connected" and args.prompt and not generation_sent:
+                generation_sent = True
+                try:
+                    result = requests.post(f"{base_url}{GENERATE_ENDPOINT}",
+                                           json={"prompt": args.prompt, "projectId": project_id}, timeout=30)
+                except requests.RequestException as e:
+                    logger.error(f"Generation request failed: {e}")
+                    return False
+                if result.status_code != 200:
+                    logger.error(f"Generation request failed: {result.status_code} - {result.text[:200]}")
+                    return False
+                logger.info(f"Generation started for {project_id}")
+
+            if event.event in TERMINAL_EVENTS:
+                logger.info(f"Received {event.event}, stopping")
+                break
+
+            if time.monotonic() - started > args.timeout:
+                logger.warning(f"Recording timed out after {args.timeout}s")
+                break
+
+        count = writer.events_written
+
+    logger.info(f"Recorded {count} frames in {time.monotonic() - started:.1f}s")
+    return count > 0
+
+
+class TraceReplayer:
+    """Serves a recorded trace to every client that opens a stream."""
+
+    def __init__(self, frames: List[Tuple[float, SSEEvent]], speed: Optional[float],
+                 wait_for_generate: bool, source_project_id: Optional[str]):
+        self.frames = frames
+        self.speed = speed
+        self.wait_for_generate = wait_for_generate
+        self.source_project_id = source_project_id
+        self._generate_requested: Dict[str, asyncio.Event] = {}
+        self.sessions = 0
+
+    def _generate_event(self, project_id: str) -> asyncio.Event:
+        return self._generate_requested.setdefault(project_id, asyncio.Event())
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, body = request
+
+                if method == "OPTIONS":
+                    await self._send(writer, 204, b"", "text/plain")
+                elif method == "GET" and path.startswith(STREAM_ENDPOINT_PREFIX):
+                    await self._replay(writer, path[len(STREAM_ENDPOINT_PREFIX):].strip("/"))
+                    break
+                elif method == "POST" and path == GENERATE_ENDPOINT:
+                    await self._generate(writer, body)
+                else:
+                    await self._send(writer, 404, b'{"error": "not found"}', "application/json")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value.strip() or 0)
+
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], body
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str) -> None:
+        reason = {200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found"}.get(status, "Error")
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n{CORS_HEADERS}"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def _generate(self, writer: asyncio.StreamWriter, body: bytes) -> None:
+        try:
+            project_id = json.loads(body or b"{}").get("projectId")
+        except (json.JSONDecodeError, AttributeError):
+            project_id = None
+
+        if not project_id:
+            await self._send(writer, 400, '{"error": "项目ID不能为空"}'.encode("utf-8"), "application/json")
+            return
+
+        self._generate_event(project_id).set()
+        await self._send(writer, 200, b'{"status": "started"}', "application/json")
+
+    async def _replay(self, writer: asyncio.StreamWriter, project_id: str) -> None:
+        self.sessions += 1
+        session = self.sessions
+        logger.info(f"[{session}] Replaying {len(self.frames)} frames to {project_id} "
+                    f"at {'max' if self.speed is None else f'{self.speed}x'} speed")
+
+        writer.write(
+            f"HTTP/1.1 200 OK\r\n{CORS_HEADERS}"
+            "Content-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+            "Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+
+        started = time.monotonic()
+        base_offset = 0.0
+        sent = 0
+
+        for offset, event in self.frames:
+            frame = format_frame(event)
+            if self.source_project_id and self.source_project_id != project_id:
+                frame = frame.replace(self.source_project_id, project_id)
+
+            if self.speed is not None and offset is not None:
+                delay = started + (offset - base_offset) / self.speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            data = frame.encode("utf-8")
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+            await writer.drain()
+            sent += 1
+
+            if event.event == "connected" and self.wait_for_generate:
+                await self._generate_event(project_id).wait()
+                started = time.monotonic()
+                base_offset = offset or 0.0
+
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        self._generate_requested.pop(project_id, None)
+        logger.info(f"[{session}] Replay finished: {sent} frames in {time.monotonic() - started:.2f}s")
+
+
+def guess_project_id(frames: List[Tuple[float, SSEEvent]]) -> Optional[str]:
+    """Find the project_id the trace was recorded for."""
+    for _, event in frames:
+        if '"project_id"' not in event.data:
+            continue
+        try:
+            payload = event.json()
+        except json.JSONDecodeError:
+            continue
+        if isinstance(payload, dict) and payload.get("project_id"):
+            return payload["project_id"]
+    return None
+
+
+async def serve(args: argparse.Namespace) -> None:
+    frames = list(read_frames(args.trace))
+    if not frames:
+        raise ValueError(f"Trace is empty: {args.trace}")
+
+    speed = None if args.speed == "max" else float(args.speed)
+    if speed is not None and speed <= 0:
+        raise ValueError("--speed must be positive or 'max'")
+
+    source_project_id = guess_project_id(frames) if not args.keep_project_id else None
+    replayer = TraceReplayer(frames, speed, args.wait_for_generate, source_project_id)
+
+    duration = next((offset for offset, _ in reversed(frames) if offset is not None), None)
+    logger.info(f"Loaded {len(frames)} frames from {args.trace}"
+                + (f" spanning {duration:.1f}s" if duration is not None else ""))
+
+    server = await asyncio.start_server(replayer.handle_connection, args.host, args.port)
+    logger.info(f"Replaying on http://{args.host}:{args.port}{STREAM_ENDPOINT_PREFIX}{{project_id}}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE trace recorder and time-accurate replayer")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Record an SSE session to a trace file")
+    record_parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help=f"Backend base URL (default: {DEFAULT_BASE_URL})")
+    record_parser.add_argument("--project-id", type=str, help="Project ID to stream (default: random UUID)")
+    record_parser.add_argument("--prompt", type=str, help="Trigger a generation with this prompt once connected")
+    record_parser.add_argument("--output", required=True, help="Trace file (.ndjson, .ndjson.gz or .ndjson.xz)")
+    record_parser.add_argument("--timeout", type=float, default=RECORD_TIMEOUT,
+                               help=f"Stop recording after this many seconds (default: {RECORD_TIMEOUT})")
+
+    serve_parser = subparsers.add_parser("serve", help="Serve a recorded trace on /api/stream/{project_id}")
+    serve_parser.add_argument("--trace", required=True, help="Trace file recorded with `record`")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_REPLAY_PORT, help=f"Port (default: {DEFAULT_REPLAY_PORT})")
+    serve_parser.add_argument("--speed", default="1", help="Replay speed multiplier, or 'max' (default: 1)")
+    serve_parser.add_argument("--wait-for-generate", action="store_true",
+                              help="Hold the trace after `connected` until POST /api/generate arrives")
+    serve_parser.add_argument("--keep-project-id", action="store_true",
+                              help="Do not rewrite the recorded project_id to the requested one")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        sys.exit(0 if record(args) else 1)
+
+    try:
+        asyncio.run(serve(args))
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    except KeyboardInterrupt:
+        logger.info("Shutting down")
+
+
+if __name__ == "__main__":
+    main()
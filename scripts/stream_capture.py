@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+SSE Capture Writer / Reader
+
+Buffered on-disk capture of SSE events for the scripts/ clients. The writer
+keeps one file handle open for the whole session, writes through a large
+userspace buffer and only fsyncs on a timer, so capture keeps up with the
+server even on long implement phases. Event payloads are stored exactly as
+received: JSON is never decoded on the receive path.
+
+Formats:
+    sse     - raw `event:` / `id:` / `data:` frames, as on the wire
+    ndjson  - one JSON object per line: {"t": ..., "event": ..., "id": ..., "data": "<raw data>"}
+
+Compression is picked from the file suffix: `.gz` (gzip) or `.xz` (lzma).
+
+Usage:
+    from stream_capture import CaptureWriter, read_frames
+
+    with CaptureWriter("capture.ndjson.gz", fmt="ndjson") as writer:
+        for event in iter_sse_events(response.iter_content(chunk_size=None)):
+            writer.write_event(event)
+
+    for offset, event in read_frames("capture.ndjson.gz"):
+        payload = event.json()   # decoded lazily, only when needed
+"""
+
+import gzip
+import io
+import json
+import lzma
+import os
+import time
+from typing import IO, Iterator, Optional, Tuple
+
+from sse_parser import SSEEvent, iter_sse_events
+
+FORMATS = ("sse", "ndjson")
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024  # bytes
+DEFAULT_FSYNC_INTERVAL = 1.0  # seconds
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def _wrap_compressed(path: str, fileobj: IO[bytes], mode: str) -> Optional[IO[bytes]]:
+    """Wrap fileobj in a (de)compressor picked from the path suffix, or None if uncompressed."""
+    if path.endswith(".gz"):
+        return gzip.GzipFile(fileobj=fileobj, mode=mode, compresslevel=6)
+    if path.endswith(".xz"):
+        return lzma.LZMAFile(fileobj, mode=mode, preset=1 if "w" in mode else None)
+    return None
+
+
+def _open_for_read(path: str) -> IO[bytes]:
+    raw = open(path, "rb")
+    return _wrap_compressed(path, raw, "rb") or raw
+
+
+def format_frame(event: SSEEvent) -> str:
+    """Serialize an event back to its SSE wire form."""
+    lines = []
+    if event.event and event.event != "message":
+        lines.append(f"event: {event.event}")
+    if event.id is not None:
+        lines.append(f"id: {event.id}")
+    for line in event.data.split("\n"):
+        lines.append(f"data: {line}")
+    return "\n".join(lines) + "\n\n"
+
+
+class CaptureWriter:
+    """Single buffered writer for captured SSE events with periodic fsync."""
+
+    def __init__(self, path: str, fmt: str = "ndjson", buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL, started_at: Optional[float] = None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown capture format: {fmt} (expected one of {FORMATS})")
+
+        self.path = path
+        self.fmt = fmt
+        self.fsync_interval = fsync_interval
+        self.started_at = time.monotonic() if started_at is None else started_at
+        self.events_written = 0
+
+        self._raw = open(path, "wb")
+        self._compressed = _wrap_compressed(path, self._raw, "wb")
+        binary = io.BufferedWriter(self._compressed or self._raw, buffer_size=buffer_size)
+        self._writer = io.TextIOWrapper(binary, encoding="utf-8", newline="")
+        self._last_sync = time.monotonic()
+
+    def write_event(self, event: SSEEvent, received_at: Optional[float] = None) -> None:
+        """Append one event; received_at is a time.monotonic() value (defaults to now)."""
+        now = time.monotonic() if received_at is None else received_at
+
+        if self.fmt == "sse":
+            text = format_frame(event)
+        else:
+            record = {"t": round(now - self.started_at, 6), "event": event.event, "data": event.data}
+            if event.id is not None:
+                record["id"] = event.id
+            text = json.dumps(record, ensure_ascii=False) + "\n"
+
+        self._writer.write(text)
+        self.events_written += 1
+
+        if now - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        """Push buffered data to the OS and fsync it."""
+        self._writer.flush()
+        if self._compressed is not None:
+            self._compressed.flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        if self._writer.closed:
+            return
+        self.sync()
+        self._writer.close()
+        self._raw.close()
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def detect_format(path: str) -> str:
+    """Sniff the capture format from the first non-blank byte."""
+    with _open_for_read(path) as stream:
+        head = stream.read(256).lstrip()
+    return "ndjson" if head.startswith(b"{") else "sse"
+
+
+def read_frames(path: str, fmt: Optional[str] = None) -> Iterator[Tuple[Optional[float], SSEEvent]]:
+    """Yield (arrival offset in seconds or None, event) pairs from a capture file.
+
+    Payloads are left as raw strings; call `event.json()` only where needed.
+    """
+    fmt = fmt or detect_format(path)
+    with _open_for_read(path) as stream:
+        if fmt == "sse":
+            chunks = iter(lambda: stream.read(READ_CHUNK_SIZE), b"")
+            for event in iter_sse_events(chunks):
+                yield None, event
+            return
+
+        for line in stream:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield record.get("t"), SSEEvent(
+                event=record.get("event", "message"),
+                data=record.get("data", ""),
+                id=record.get("id"),
+            )
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Streaming Metrics Helpers
+
+HDR-style latency histogram shared by the benchmarking and verification
+scripts in scripts/. Values are recorded into log-linear buckets (a fixed
+number of linear sub-buckets per power of two), so memory stays constant no
+matter how many samples are recorded while percentiles stay within ~1.5%.
+
+Usage:
+    from stream_metrics import Histogram
+
+    hist = Histogram("time_to_first_chunk", unit="ms")
+    hist.record(12.5)
+    print(hist.summary())        # machine-readable dict
+    print(hist.format_table())   # HDR-style percentile distribution
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 95.0, 99.0, 99.9)
+
+
+class Histogram:
+    """Log-linear bucketed histogram with exact count/min/max/mean."""
+
+    def __init__(self, name: str, unit: str = "ms", sub_buckets: int = 64):
+        self.name = name
+        self.unit = unit
+        self.sub_buckets = sub_buckets
+        self._buckets: Dict[int, int] = {}
+        self._zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, value: float) -> None:
+        """Record a single non-negative sample."""
+        if value < 0:
+            value = 0.0
+
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+        if value == 0:
+            self._zero_count += 1
+            return
+
+        index = self._bucket_index(value)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def record_many(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.record(value)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Value at percentile p (0-100), reported as the bucket's upper edge."""
+        if not self.count:
+            return None
+
+        target = max(1, math.ceil(self.count * p / 100.0))
+        seen = self._zero_count
+        if seen >= target:
+            return 0.0
+
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= target:
+                return min(self._bucket_upper(index), self.max)
+
+        return self.max
+
+    def summary(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict:
+        """Machine-readable summary for JSON reports."""
+        result = {
+            "unit": self.unit,
+            "count": self.count,
+            "min": _round(self.min),
+            "mean": _round(self.mean),
+            "max": _round(self.max),
+        }
+        for p in percentiles:
+            result[_percentile_key(p)] = _round(self.percentile(p))
+        return result
+
+    def format_table(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> str:
+        """Human-readable HDR-style percentile distribution."""
+        if not self.count:
+            return f"{self.name}: no samples"
+
+        lines = [f"{self.name} ({self.unit}, n={self.count})"]
+        lines.append(f"  {'percentile':>10}  {'value':>12}")
+        for p in percentiles:
+            lines.append(f"  {p:>10.3f}  {self.percentile(p):>12.3f}")
+        lines.append(f"  {'max':>10}  {self.max:>12.3f}")
+        lines.append(f"  {'mean':>10}  {self.mean:>12.3f}")
+        return "\n".join(lines)
+
+    def _bucket_index(self, value: float) -> int:
+        mantissa, exponent = math.frexp(value)  # value = mantissa * 2**exponent, 0.5 <= mantissa < 1
+        sub = int((mantissa - 0.5) * 2 * self.sub_buckets)
+        return exponent * self.sub_buckets + min(sub, self.sub_buckets - 1)
+
+    def _bucket_upper(self, index: int) -> float:
+        exponent, sub = divmod(index, self.sub_buckets)
+        return math.ldexp(0.5 + (sub + 1) / (2 * self.sub_buckets), exponent)
+
+
+def _percentile_key(p: float) -> str:
+    return f"p{p:g}".replace(".", "_")
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+
+def summarize(histograms: List[Histogram]) -> Dict[str, Dict]:
+    """Summaries keyed by histogram name, ready for json.dumps."""
+    return {hist.name: hist.summary() for hist in histograms}
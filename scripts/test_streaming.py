@@ -5,36 +5,132 @@ Streaming Protocol Verification Script
 This script acts as a fake frontend client to verify the backend streaming logic.
 It tests the complete flow: generation request → SSE streaming → file verification.
 
+Every event is timestamped with a monotonic clock. At the end an HDR-style
+histogram summary is printed for connect latency, per-phase TTFB
+(`phase_start` → first `chunk`), inter-chunk gaps, chunk payload sizes and
+the gap between a `file_content_update` completion and its `file_created`,
+and the same numbers are written as a JSON report.
+
 Usage:
-    backend/.venv/Scripts/python.exe scripts/test_streaming.py
+    backend/.venv/Scripts/python.exe scripts/test_streaming.py [--report FILE]
 """
 
+import argparse
 import asyncio
 import json
 import sys
 import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import httpx
 import requests
 
+from sse_parser import SSEEvent, aiter_sse_events
+from stream_metrics import Histogram
+
 # Configuration
 BACKEND_URL = "http://localhost:8000"
 TEST_PROMPT = "Create a simple Python hello world script"
+REPORT_FILE = "streaming_latency_report.json"
+
+CHUNK_EVENTS = {'chunk'}
+FILE_CREATED_EVENTS = {'file_created', 'file_written'}
+
+
+class StreamTimings:
+    """Monotonic-clock latency instrumentation for one SSE session (times in ms)."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.connect_latency: Optional[float] = None
+        self.handshake_latency: Optional[float] = None
+
+        self.phase_ttfb = Histogram("phase_ttfb")
+        self.inter_chunk_gap = Histogram("inter_chunk_gap")
+        self.chunk_size = Histogram("chunk_payload_size", unit="bytes")
+        self.file_created_gap = Histogram("file_complete_to_created")
+        self.ttfb_by_phase: Dict[str, float] = {}
+
+        self._stream_opened: Optional[float] = None
+        self._phase_started: Dict[str, float] = {}
+        self._last_chunk_at: Optional[float] = None
+        self._file_completed: Dict[str, float] = {}
+
+    def stream_opened(self, requested_at: float, now: float) -> None:
+        self._stream_opened = now
+        self.connect_latency = (now - requested_at) * 1000
+
+    def record(self, event_type: str, data, payload_bytes: int, now: float) -> None:
+        """Fold one event (arrival time `now`) into the histograms."""
+        payload = data if isinstance(data, dict) else {}
+
+        if event_type == 'connected' and self.handshake_latency is None and self._stream_opened is not None:
+            self.handshake_latency = (now - self._stream_opened) * 1000
+
+        elif event_type == 'phase_start':
+            self._phase_started[payload.get('phase', 'unknown')] = now
+            self._last_chunk_at = None
+
+        elif event_type in CHUNK_EVENTS:
+            phase = payload.get('phase', 'unknown')
+            self.chunk_size.record(payload_bytes)
+
+            started = self._phase_started.get(phase)
+            if started is not None and phase not in self.ttfb_by_phase:
+                ttfb = (now - started) * 1000
+                self.ttfb_by_phase[phase] = ttfb
+                self.phase_ttfb.record(ttfb)
+
+            if self._last_chunk_at is not None:
+                self.inter_chunk_gap.record((now - self._last_chunk_at) * 1000)
+            self._last_chunk_at = now
+
+        elif event_type == 'file_content_update' and payload.get('is_complete'):
+            self._file_completed[payload.get('path')] = now
+
+        elif event_type in FILE_CREATED_EVENTS:
+            completed = self._file_completed.pop(payload.get('path'), None)
+            if completed is not None:
+                self.file_created_gap.record((now - completed) * 1000)
+
+    @property
+    def histograms(self) -> List[Histogram]:
+        return [self.phase_ttfb, self.inter_chunk_gap, self.chunk_size, self.file_created_gap]
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def report(self) -> Dict:
+        return {
+            "duration_s": round(self.elapsed(), 3),
+            "connect_latency_ms": _round_ms(self.connect_latency),
+            "handshake_latency_ms": _round_ms(self.handshake_latency),
+            "ttfb_by_phase_ms": {phase: _round_ms(value) for phase, value in self.ttfb_by_phase.items()},
+            "histograms": {hist.name: hist.summary() for hist in self.histograms},
+        }
+
+
+def _round_ms(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
 
 class StreamingVerifier:
     """Verifies the backend streaming protocol implementation."""
 
-    def __init__(self):
+    def __init__(self, report_file: str = REPORT_FILE):
         self.events_received: List[Dict] = []
         self.files_created: List[str] = []
         self.request_id: str = None
+        self.report_file = report_file
+        self.timings = StreamTimings()
 
     async def test_streaming_protocol(self):
         """Main test execution."""
         print("🚀 Starting Streaming Protocol Verification")
         print("=" * 50)
 
+        self.timings = StreamTimings()
+
         try:
             # Step 1: Start generation
             await self._start_generation()
@@ -90,6 +186,7 @@ class StreamingVerifier:
 
         try:
             async with httpx.AsyncClient(timeout=300.0) as client:  # 5 minute timeout
+                requested_at = time.monotonic()
                 async with client.stream(
                     "GET",
                     stream_url,
@@ -102,52 +199,33 @@ class StreamingVerifier:
                     if response.status_code != 200:
                         raise Exception(f"SSE connection failed: {response.status_code}")
 
-                    print("✅ SSE connection established")
+                    self.timings.stream_opened(requested_at, time.monotonic())
+                    print(f"✅ SSE connection established ({self.timings.connect_latency:.1f}ms)")
                     print("   Listening for events...")
 
                     # Process the SSE stream
-                    buffer = ""
-                    async for chunk in response.aiter_text():
-                        buffer += chunk
-
-                        # Process complete SSE messages
-                        while "\n\n" in buffer:
-                            message, buffer = buffer.split("\n\n", 1)
-                            self._process_sse_message(message.strip())
-
-                    # Process any remaining buffer
-                    if buffer.strip():
-                        self._process_sse_message(buffer.strip())
+                    async for event in aiter_sse_events(response.aiter_bytes()):
+                        self._process_sse_event(event)
 
         except Exception as e:
             print(f"❌ SSE streaming error: {e}")
             raise
 
-    def _process_sse_message(self, message: str):
-        """Process a single SSE message."""
-        if not message:
-            return
-
+    def _process_sse_event(self, event: SSEEvent):
+        """Process a single parsed SSE event."""
+        now = time.monotonic()
         try:
-            lines = message.split('\n')
-            event_data = {}
-
-            for line in lines:
-                if line.startswith('event: '):
-                    event_data['event'] = line[7:]
-                elif line.startswith('data: '):
-                    data_str = line[6:]
-                    try:
-                        event_data['data'] = json.loads(data_str)
-                    except json.JSONDecodeError:
-                        event_data['data'] = data_str
-
-            if event_data:
-                self._handle_event(event_data)
+            try:
+                data = event.json()
+            except json.JSONDecodeError:
+                data = event.data
+
+            self.timings.record(event.event, data, len(event.data.encode('utf-8')), now)
+            self._handle_event({'event': event.event, 'data': data})
 
         except Exception as e:
-            print(f"⚠️  Error processing SSE message: {e}")
-            print(f"   Raw message: {message}")
+            print(f"⚠️  Error processing SSE event: {e}")
+            print(f"   Raw data: {event.data[:200]}")
 
     def _handle_event(self, event: Dict):
         """Handle a parsed SSE event."""
@@ -158,8 +236,7 @@ class StreamingVerifier:
         self.events_received.append(event)
 
         # Print event details
-        timestamp = time.strftime('%H:%M:%S')
-        print(f"📨 [{timestamp}] Event: {event_type}")
+        print(f"📨 [+{self.timings.elapsed():8.3f}s] Event: {event_type}")
 
         if isinstance(event_data, dict):
             if 'content' in event_data:
@@ -242,13 +319,40 @@ class StreamingVerifier:
         print(f"\n📈 Test Summary:")
         print(f"   Total events: {len(self.events_received)}")
         print(f"   Files created (reported): {len(self.files_created)}")
-        print(f"   Test duration: ~{time.time() - time.time()}s")  # Would need to track actual start time
+        print(f"   Test duration: {self.timings.elapsed():.2f}s")
+
+        self._report_timings()
+
+    def _report_timings(self):
+        """Print the latency histograms and write the JSON report."""
+        print(f"\n⏱️  Latency Summary:")
+        if self.timings.connect_latency is not None:
+            print(f"   Connect latency: {self.timings.connect_latency:.1f}ms")
+        for phase, ttfb in self.timings.ttfb_by_phase.items():
+            print(f"   TTFB [{phase}]: {ttfb:.1f}ms")
+        for hist in self.timings.histograms:
+            print()
+            print(hist.format_table())
+
+        report = self.timings.report()
+        report["events"] = len(self.events_received)
+        try:
+            with open(self.report_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"\n📝 Latency report written to: {self.report_file}")
+        except OSError as e:
+            print(f"⚠️  Failed to write latency report: {e}")
 
 async def main():
     """Main entry point."""
-    if len(sys.argv) > 1 and sys.argv[1] == '--help':
-        print(__doc__)
-        return
+    parser = argparse.ArgumentParser(description="Streaming Protocol Verifier")
+    parser.add_argument(
+        "--report",
+        type=str,
+        default=REPORT_FILE,
+        help=f"JSON latency report path (default: {REPORT_FILE})"
+    )
+    args = parser.parse_args()
 
     print("🎭 Streaming Protocol Verifier")
     print("This script tests the backend SSE streaming implementation")
@@ -265,7 +369,7 @@ async def main():
         print("⚠️  Cannot connect to backend, but continuing with test...")
 
     # Run the verification
-    verifier = StreamingVerifier()
+    verifier = StreamingVerifier(report_file=args.report)
     success = await verifier.test_streaming_protocol()
 
     sys.exit(0 if success else 1)
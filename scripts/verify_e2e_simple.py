@@ -3,10 +3,14 @@
 Simple E2E Verification Script - Brute Force
 
 This script performs a complete end-to-end test of the code generation system:
-Start generation -> Wait blindly (retry on errors) -> Download ZIP.
+Start generation -> Wait for the SSE completion event -> Download ZIP.
 
-The script handles server blocking during generation by continuing to wait
-when connection errors occur.
+Completion is read from /api/stream/{id}, subscribed with Last-Event-ID 0 so
+events sent before the subscription are replayed. If SSE is unavailable, asks
+for a resync, or goes quiet for SSE_IDLE_TIMEOUT seconds, the script falls
+back to polling the download endpoint with exponential backoff and jitter,
+continuing to wait when connection errors occur. Wall time is reported per
+stage.
 
 Usage:
     python scripts/verify_e2e_simple.py
@@ -16,17 +20,19 @@ Dependencies: requests, psutil
 
 import json
 import logging
+import random
 import signal
-import subprocess
 import sys
 import time
-import zipfile
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
-import psutil
 import requests
 
+from service_supervisor import ServiceSupervisor, default_uvicorn_command
+from sse_parser import iter_sse_events
+from zip_verify import ZipDownloadResult, verify_zip_download
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -40,119 +46,52 @@ SERVICE_PORT = 8001
 BASE_URL = f"{SERVICE_HOST}:{SERVICE_PORT}"
 GENERATE_ENDPOINT = "/api/generate-code"
 DOWNLOAD_ENDPOINT_TEMPLATE = "/api/projects/{}/download"
+STREAM_ENDPOINT_TEMPLATE = "/api/stream/{}"
+
+# Terminal SSE events ("complete"/"error" are the legacy backend names)
+COMPLETION_EVENTS = {"generation_complete", "complete"}
+ERROR_EVENTS = {"generation_error", "error"}
+# Events that say nothing about progress
+IDLE_EVENTS = {"heartbeat", "connected"}
 
 # Test configuration
 COMPLEX_PROMPT = "Create a Python GUI Calculator with tkinter. Include addition, subtraction, multiplication, and division operations. Add proper error handling for division by zero. Make the interface user-friendly with clear buttons and display."
-DOWNLOAD_FILENAME = "final.zip"
 
 # Timing configuration
 MAX_WAIT_TIME = 300  # 5 minutes total
-RETRY_INTERVAL = 10  # 10 seconds between attempts
+POLL_INITIAL_INTERVAL = 1  # first fallback poll delay, doubled per attempt
+POLL_MAX_INTERVAL = 10  # cap for the fallback poll delay
+DOWNLOAD_TIMEOUT = 10  # seconds per download attempt
+SSE_CONNECT_TIMEOUT = 5  # seconds
+SSE_READ_TIMEOUT = 60  # seconds without bytes (heartbeats arrive every 10s)
+SSE_IDLE_TIMEOUT = 30  # seconds with only heartbeats before switching to polling
 STARTUP_TIMEOUT = 30  # 30 seconds for initial startup
 
-# Process management
-uvicorn_process: Optional[subprocess.Popen] = None
-
 
 class E2ETester:
     """Simple E2E tester that handles blocking I/O gracefully."""
 
     def __init__(self):
-        self.uvicorn_process: Optional[subprocess.Popen] = None
-
-    def cleanup_port_processes(self, port: int) -> None:
-        """Kill any processes using the specified port."""
-        logger.info(f"清理端口 {port} 上的进程...")
-
-        try:
-            # Find processes using the port
-            for conn in psutil.net_connections():
-                if conn.status == 'LISTEN' and conn.laddr.port == port:
-                    try:
-                        process = psutil.Process(conn.pid)
-                        logger.info(f"终止进程: {process.name()} (PID: {conn.pid})")
-                        process.terminate()
-
-                        # Wait for graceful termination
-                        try:
-                            process.wait(timeout=5)
-                        except psutil.TimeoutExpired:
-                            logger.warning(f"强制终止进程: {conn.pid}")
-                            process.kill()
-
-                    except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                        logger.warning(f"无法终止进程 {conn.pid}: {e}")
-
-        except Exception as e:
-            logger.error(f"清理端口进程失败: {e}")
+        self.service = ServiceSupervisor(port=SERVICE_PORT, startup_timeout=STARTUP_TIMEOUT, suite="verify_e2e_simple")
+        self.stage_times: Dict[str, float] = {}
 
     def start_service(self) -> bool:
-        """Start the uvicorn service."""
-        logger.info("启动 uvicorn 服务...")
-
-        # Clean up any existing processes
-        self.cleanup_port_processes(8001)
+        """Attach to a healthy uvicorn service or start one from the backend venv."""
+        backend_dir = Path(__file__).resolve().parent.parent / "backend"
+        venv_python = backend_dir / "backend" / "venv" / "Scripts" / "python.exe"
 
-        try:
-            # Get the backend directory path - make it robust against different working directories
-            script_dir = Path(__file__).resolve().parent
-            project_root = script_dir.parent
-            backend_dir = project_root / "backend"
-            venv_python = backend_dir / "backend" / "venv" / "Scripts" / "python.exe"
-
-            if not venv_python.exists():
-                logger.error(f"虚拟环境 Python 不存在: {venv_python}")
-                logger.error(f"当前工作目录: {Path.cwd()}")
-                logger.error(f"脚本目录: {Path(__file__).parent}")
-                return False
+        if self.service.reuse and self.service.probe():
+            return self.service.ensure_running()
 
-            # Start uvicorn process
-            cmd = [
-                str(venv_python),  # Convert to string for subprocess
-                "-m", "uvicorn",
-                "src.main:app",
-                "--host", "0.0.0.0",
-                "--port", str(SERVICE_PORT),
-                "--log-level", "error"  # Reduce log noise
-            ]
-
-            logger.info(f"执行命令: {' '.join(cmd)}")
-
-            self.uvicorn_process = subprocess.Popen(
-                cmd,
-                cwd=str(backend_dir),
-                stdout=subprocess.DEVNULL,  # Suppress stdout
-                stderr=subprocess.DEVNULL,  # Suppress stderr
-                creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
-            )
-
-            # Wait for service to be ready
-            logger.info("等待服务启动...")
-            return self._wait_for_service_ready()
-
-        except Exception as e:
-            logger.error(f"启动服务失败: {e}")
-            self._cleanup_process()
+        if not venv_python.exists():
+            logger.error(f"虚拟环境 Python 不存在: {venv_python}")
+            logger.error(f"当前工作目录: {Path.cwd()}")
+            logger.error(f"脚本目录: {Path(__file__).parent}")
             return False
 
-    def _wait_for_service_ready(self) -> bool:
-        """Wait for service to respond to health check."""
-        health_url = f"{BASE_URL}/api/health"
-        start_time = time.time()
-
-        while time.time() - start_time < STARTUP_TIMEOUT:
-            try:
-                response = requests.get(health_url, timeout=5)
-                if response.status_code == 200:
-                    logger.info("✅ 服务已就绪")
-                    return True
-            except requests.RequestException:
-                pass
-
-            time.sleep(1)
-
-        logger.error("❌ 服务启动超时")
-        return False
+        self.service.cmd = default_uvicorn_command(SERVICE_PORT, python=str(venv_python), log_level="error")
+        self.service.cwd = backend_dir
+        return self.service.ensure_running()
 
     def start_generation(self) -> Optional[str]:
         """Start code generation and return request_id."""
@@ -185,117 +124,187 @@ class E2ETester:
         return None
 
     def wait_and_download(self, request_id: str) -> bool:
-        """Wait for generation to complete and download the result."""
-        download_url = f"{BASE_URL}{DOWNLOAD_ENDPOINT_TEMPLATE.format(request_id)}"
+        """Wait for generation to complete and download the result.
+
+        Completion is taken from the project's SSE stream; polling the
+        download endpoint is only a fallback for when the stream is unavailable.
+        """
+        deadline = time.monotonic() + MAX_WAIT_TIME
 
         logger.info("⏳ 开始等待生成完成...")
         logger.info(f"最长等待时间: {MAX_WAIT_TIME} 秒")
-        logger.info(f"重试间隔: {RETRY_INTERVAL} 秒")
 
-        start_time = time.time()
-        attempt = 0
+        stage_start = time.perf_counter()
+        outcome = self._wait_for_completion_event(request_id, deadline)
+        self.stage_times["generation"] = time.perf_counter() - stage_start
 
-        while time.time() - start_time < MAX_WAIT_TIME:
-            attempt += 1
-            elapsed = int(time.time() - start_time)
+        if outcome == "error":
+            return False
+
+        if outcome == "complete":
+            stage_start = time.perf_counter()
+            status = self._download_and_verify(request_id)
+            self.stage_times["download"] = time.perf_counter() - stage_start
+            if status is not None:
+                return status
+            logger.warning("⚠️ 收到完成事件但下载尚不可用，转为轮询")
+
+        stage_start = time.perf_counter()
+        success = self._poll_and_download(request_id, deadline)
+        self.stage_times["poll_and_download"] = time.perf_counter() - stage_start
+        return success
+
+    def _wait_for_completion_event(self, request_id: str, deadline: float) -> Optional[str]:
+        """Block on the SSE stream until a terminal event.
+
+        Returns "complete", "error", or None when SSE is unavailable, the
+        stream went idle, or it ended without a terminal event.
+        """
+        stream_url = f"{BASE_URL}{STREAM_ENDPOINT_TEMPLATE.format(request_id)}"
+        logger.info(f"📡 订阅 SSE: {stream_url}")
+
+        # The generation was started before this subscription; Last-Event-ID 0
+        # replays whatever it has sent so far, completion included
+        headers = {"Accept": "text/event-stream", "Last-Event-ID": "0"}
+        try:
+            response = requests.get(stream_url, stream=True, headers=headers,
+                                    timeout=(SSE_CONNECT_TIMEOUT, SSE_READ_TIMEOUT))
+        except requests.RequestException as e:
+            logger.warning(f"⚠️ SSE 不可用 ({e})，改用轮询")
+            return None
 
+        with response:
+            content_type = response.headers.get("content-type", "")
+            if response.status_code != 200 or "text/event-stream" not in content_type:
+                logger.warning(f"⚠️ SSE 不可用 (状态码 {response.status_code}, {content_type or '无 Content-Type'})，改用轮询")
+                return None
+
+            last_progress = time.monotonic()
             try:
-                logger.info(f"尝试 #{attempt} (已等待 {elapsed}s/{MAX_WAIT_TIME}s)...")
+                for event in iter_sse_events(response.iter_content(chunk_size=None)):
+                    if event.event in COMPLETION_EVENTS:
+                        logger.info(f"✅ 收到 {event.event} 事件")
+                        return "complete"
+
+                    if event.event in ERROR_EVENTS:
+                        logger.error(f"❌ 生成失败: {event.data[:500]}")
+                        return "error"
+
+                    if event.event == "resync":
+                        logger.warning("⚠️ 服务器无法重放完整事件，改用轮询")
+                        return None
+
+                    if event.event == "phase_start":
+                        logger.info(f"🔄 阶段开始: {event.data[:200]}")
+
+                    now = time.monotonic()
+                    if now > deadline:
+                        logger.error(f"❌ 等待超时 ({MAX_WAIT_TIME} 秒)")
+                        return "error"
+
+                    # The completion may have been missed (no replay support); check the download instead
+                    if event.event not in IDLE_EVENTS:
+                        last_progress = now
+                    elif now - last_progress > SSE_IDLE_TIMEOUT:
+                        logger.warning(f"⚠️ SSE {SSE_IDLE_TIMEOUT} 秒无进展，改用轮询")
+                        return None
+            except requests.RequestException as e:
+                logger.warning(f"⚠️ SSE 连接中断 ({e})，改用轮询")
+                return None
+
+        logger.warning("⚠️ SSE 流在完成前关闭，改用轮询")
+        return None
 
-                response = requests.get(download_url, timeout=10)
+    def _download_and_verify(self, request_id: str) -> Optional[bool]:
+        """Download and verify the ZIP once; None means it is not ready yet."""
+        download_url = f"{BASE_URL}{DOWNLOAD_ENDPOINT_TEMPLATE.format(request_id)}"
+        try:
+            result = verify_zip_download(download_url, timeout=DOWNLOAD_TIMEOUT)
+        except requests.exceptions.Timeout:
+            logger.warning("⚠️ 请求超时 - 服务器可能忙碌，继续等待...")
+            return None
+        except requests.exceptions.ConnectionError:
+            logger.warning("⚠️ 连接错误 - 服务器阻塞中，继续等待...")
+            return None
+        except requests.RequestException as e:
+            logger.warning(f"⚠️ 下载请求失败: {e} - 继续等待...")
+            return None
 
-                if response.status_code == 200:
-                    logger.info("✅ 生成完成！开始下载...")
-                    return self._save_and_verify_zip(response.content)
+        try:
+            if result.status_code == 200:
+                logger.info("✅ 生成完成！已流式下载并校验")
+                return self._verify_zip(result)
 
-                elif response.status_code == 404:
-                    logger.info("⏳ 生成中... (服务器响应但项目未完成)")
-                    time.sleep(RETRY_INTERVAL)
-                    continue
+            if result.status_code == 404:
+                logger.info("⏳ 生成中... (服务器响应但项目未完成)")
+            else:
+                logger.warning(f"⚠️ 意外状态码: {result.status_code} - {'; '.join(result.errors)}")
+            return None
+        finally:
+            result.close()
 
-                else:
-                    logger.warning(f"⚠️ 意外状态码: {response.status_code} - {response.text}")
-                    time.sleep(RETRY_INTERVAL)
-                    continue
+    def _poll_and_download(self, request_id: str, deadline: float) -> bool:
+        """Poll the download endpoint with exponential backoff and jitter."""
+        attempt = 0
+        start_time = time.monotonic()
 
-            except requests.exceptions.Timeout:
-                logger.warning("⚠️ 请求超时 - 服务器可能忙碌，继续等待...")
-                time.sleep(RETRY_INTERVAL)
-                continue
+        while time.monotonic() < deadline:
+            attempt += 1
+            elapsed = int(time.monotonic() - start_time)
 
-            except requests.exceptions.ConnectionError:
-                logger.warning("⚠️ 连接错误 - 服务器阻塞中，继续等待...")
-                time.sleep(RETRY_INTERVAL)
-                continue
+            try:
+                logger.info(f"尝试 #{attempt} (已轮询 {elapsed}s)...")
+                status = self._download_and_verify(request_id)
+                if status is not None:
+                    return status
 
             except Exception as e:
                 logger.warning(f"⚠️ 未知错误: {e} - 继续等待...")
-                time.sleep(RETRY_INTERVAL)
-                continue
+
+            # Exponential backoff with jitter so retries do not hammer the ZIP builder
+            delay = min(POLL_MAX_INTERVAL, POLL_INITIAL_INTERVAL * (2 ** (attempt - 1)))
+            delay = random.uniform(delay / 2, delay)
+            time.sleep(max(0.0, min(delay, deadline - time.monotonic())))
 
         logger.error(f"❌ 等待超时 ({MAX_WAIT_TIME} 秒)")
         return False
 
-    def _save_and_verify_zip(self, content: bytes) -> bool:
-        """Save ZIP content and verify it's valid with main.py."""
-        try:
-            logger.info(f"保存 ZIP 到: {DOWNLOAD_FILENAME}")
-
-            # Save the ZIP file
-            with open(DOWNLOAD_FILENAME, 'wb') as f:
-                f.write(content)
-
-            # Verify ZIP format
-            with zipfile.ZipFile(DOWNLOAD_FILENAME, 'r') as zip_ref:
-                # Check if it's a valid ZIP
-                bad_file = zip_ref.testzip()
-                if bad_file:
-                    logger.error(f"❌ ZIP 文件损坏: {bad_file}")
-                    return False
-
-                # Get file list
-                file_list = zip_ref.namelist()
-                logger.info(f"✅ ZIP 有效，包含 {len(file_list)} 个文件")
-
-                # Check for main.py (anywhere in the structure)
-                main_py_files = [f for f in file_list if f.endswith('main.py')]
-                if not main_py_files:
-                    logger.error("❌ ZIP 不包含 main.py 文件")
-                    return False
-
-                main_py_path = main_py_files[0]
-                logger.info(f"✅ 找到 main.py: {main_py_path}")
-
-                # Try to read main.py content
-                try:
-                    with zip_ref.open(main_py_path) as f:
-                        content = f.read().decode('utf-8', errors='ignore')
-                        logger.info(f"✅ main.py 内容长度: {len(content)} 字符")
-                except Exception as e:
-                    logger.warning(f"⚠️ 无法读取 main.py 内容: {e}")
-
-                return True
-
-        except zipfile.BadZipFile:
-            logger.error("❌ 无效的 ZIP 文件格式")
+    def _verify_zip(self, result: ZipDownloadResult) -> bool:
+        """Check a streamed ZIP download is valid and contains main.py."""
+        logger.info(f"📦 下载 {result.bytes} 字节: TTFB {result.ttfb_ms} ms, "
+                    f"总耗时 {result.duration_ms} ms, 吞吐 {result.throughput_mbps} MB/s")
+
+        # CRCs and the central directory were checked while the body streamed in
+        if not result.ok:
+            for error in result.errors:
+                logger.error(f"❌ ZIP 文件损坏: {error}")
             return False
-        except Exception as e:
-            logger.error(f"❌ ZIP 验证失败: {e}")
+
+        file_list = result.entries
+        logger.info(f"✅ ZIP 有效，包含 {len(file_list)} 个文件")
+
+        # Check for main.py (anywhere in the structure)
+        main_py_files = [f for f in file_list if f.endswith('main.py')]
+        if not main_py_files:
+            logger.error("❌ ZIP 不包含 main.py 文件")
             return False
 
+        main_py_path = main_py_files[0]
+        logger.info(f"✅ 找到 main.py: {main_py_path}")
+
+        # Try to read main.py content
+        try:
+            with result.open_zip() as zip_ref, zip_ref.open(main_py_path) as f:
+                content = f.read().decode('utf-8', errors='ignore')
+                logger.info(f"✅ main.py 内容长度: {len(content)} 字符")
+        except Exception as e:
+            logger.warning(f"⚠️ 无法读取 main.py 内容: {e}")
+
+        return True
+
     def _cleanup_process(self) -> None:
-        """Clean up the uvicorn process."""
-        if self.uvicorn_process and self.uvicorn_process.poll() is None:
-            logger.info("清理 uvicorn 进程...")
-            try:
-                self.uvicorn_process.terminate()
-                try:
-                    self.uvicorn_process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    logger.warning("强制终止 uvicorn 进程")
-                    self.uvicorn_process.kill()
-            except Exception as e:
-                logger.error(f"清理进程失败: {e}")
+        """Stop the service if this run started it."""
+        self.service.stop()
 
     def run_e2e_test(self) -> bool:
         """Run the complete E2E test."""
@@ -304,12 +313,17 @@ class E2ETester:
             logger.info(f"测试提示: {COMPLEX_PROMPT[:50]}...")
 
             # 1. Start service
-            if not self.start_service():
+            stage_start = time.perf_counter()
+            service_ready = self.start_service()
+            self.stage_times["service_start"] = time.perf_counter() - stage_start
+            if not service_ready:
                 logger.error("❌ 服务启动失败")
                 return False
 
             # 2. Start generation
+            stage_start = time.perf_counter()
             request_id = self.start_generation()
+            self.stage_times["generation_request"] = time.perf_counter() - stage_start
             if not request_id:
                 logger.error("❌ 生成启动失败")
                 return False
@@ -329,8 +343,19 @@ class E2ETester:
             logger.error(f"测试过程出错: {e}")
             return False
         finally:
+            self._report_stage_times()
             self._cleanup_process()
 
+    def _report_stage_times(self) -> None:
+        """Log end-to-end wall time per stage."""
+        if not self.stage_times:
+            return
+
+        logger.info("⏱️ 各阶段耗时:")
+        for stage, seconds in self.stage_times.items():
+            logger.info(f"  {stage:<20} {seconds:8.2f}s")
+        logger.info(f"  {'total':<20} {sum(self.stage_times.values()):8.2f}s")
+
 
 def main():
     """Main entry point."""
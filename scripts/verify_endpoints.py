@@ -5,27 +5,40 @@ Full API Verification Suite
 This script automatically manages service lifecycle and verifies all static endpoints.
 It handles process cleanup, service startup, endpoint verification, and result validation.
 
+With --all it sweeps every project directory under projects/: the tree endpoint,
+every file via /api/projects/{id}/files/..., and the ZIP download, over a pooled
+httpx.AsyncClient with bounded concurrency. Per-endpoint throughput and latency
+percentiles are reported, so the sweep doubles as a read-path benchmark.
+
 Usage:
     python scripts/verify_endpoints.py [--id PROJECT_ID]
+    python scripts/verify_endpoints.py --all --base-url http://localhost:3000 --concurrency 32
 
 Arguments:
     --id PROJECT_ID: Optional project ID to test (defaults to f79287ca-97b1-4348-935a-1c78a69f2f6c)
+    --all: Verify every project under --projects-dir instead of a single --id
+    --base-url URL: Use an already running service instead of starting uvicorn
 """
 
 import argparse
+import asyncio
 import json
 import logging
 import signal
-import subprocess
 import sys
 import time
-import zipfile
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
+from urllib.parse import quote
 
-import psutil
+import httpx
 import requests
 
+from service_supervisor import ServiceSupervisor, default_uvicorn_command
+from stream_metrics import Histogram
+from zip_verify import StreamingZipVerifier, verify_zip_download
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -38,19 +51,225 @@ SERVICE_HOST = "http://localhost"
 SERVICE_PORT = 8001  # Use 8001 as specified in requirements
 HEALTH_ENDPOINT = "/api/health"
 PROJECT_DETAILS_ENDPOINT_TEMPLATE = "/api/projects/{}/"
+# No trailing slash: Next.js (trailingSlash off) answers the slashed path with a 308
+PROJECT_TREE_ENDPOINT_TEMPLATE = "/api/projects/{}"
 PROJECT_DOWNLOAD_ENDPOINT_TEMPLATE = "/api/projects/{}/download"
+PROJECT_FILE_ENDPOINT_TEMPLATE = "/api/projects/{}/files/{}"
 
 # Test configuration
 DEFAULT_PROJECT_ID = "f79287ca-97b1-4348-935a-1c78a69f2f6c"
-DOWNLOAD_FILENAME = "test_download.zip"
+DEFAULT_PROJECTS_DIR = Path(__file__).resolve().parent.parent / "projects"
+CHECKPOINT_DIR = ".generation"  # generation checkpoints, not served as project files
+SWEEP_CONCURRENCY = 16  # in-flight requests for --all
 
-# Timeouts and retries
-HEALTH_CHECK_TIMEOUT = 10  # seconds
-HEALTH_CHECK_RETRIES = 10
+# Timeouts
 REQUEST_TIMEOUT = 30  # seconds
 
-# Output file
+# Output files
 REPORT_FILE = "final_report.log"
+SWEEP_REPORT_FILE = "endpoint_sweep_report.json"
+
+
+@dataclass
+class EndpointStats:
+    """Latency and throughput for one endpoint across the sweep."""
+
+    name: str
+    latency: Optional[Histogram] = None
+    requests: int = 0
+    bytes: int = 0
+    errors: int = 0
+
+    def __post_init__(self):
+        if self.latency is None:
+            self.latency = Histogram(f"{self.name}_latency", unit="ms")
+
+    def record(self, elapsed_ms: float, size: int, ok: bool) -> None:
+        self.requests += 1
+        self.bytes += size
+        self.latency.record(elapsed_ms)
+        if not ok:
+            self.errors += 1
+
+    def summary(self, wall_time: float) -> Dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "requests_per_s": round(self.requests / wall_time, 3) if wall_time else None,
+            "mb_per_s": round(self.bytes / wall_time / 1024 / 1024, 3) if wall_time else None,
+            "latency_ms": self.latency.summary(),
+        }
+
+
+class ProjectSweep:
+    """Checks tree, files and ZIP download for every project over a pooled async client."""
+
+    def __init__(self, base_url: str, projects_dir: Path, concurrency: int = SWEEP_CONCURRENCY):
+        self.base_url = base_url.rstrip("/")
+        self.projects_dir = projects_dir
+        self.concurrency = concurrency
+        self.stats = {name: EndpointStats(name) for name in ("tree", "file", "download")}
+        self.failures: List[str] = []
+        self.projects: List[str] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def discover_projects(self) -> List[str]:
+        """Project IDs are the non-hidden directories directly under projects/."""
+        return sorted(
+            entry.name for entry in self.projects_dir.iterdir()
+            if entry.is_dir() and not entry.name.startswith(".")
+        )
+
+    async def run(self) -> Dict:
+        self.projects = self.discover_projects()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        timeout = httpx.Timeout(REQUEST_TIMEOUT)
+
+        started = time.perf_counter()
+        # Redirects are followed in case the backend canonicalises paths the other way
+        async with httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True) as client:
+            await asyncio.gather(*(self._check_project(client, project_id) for project_id in self.projects))
+        wall_time = time.perf_counter() - started
+
+        return {
+            "base_url": self.base_url,
+            "projects": len(self.projects),
+            "concurrency": self.concurrency,
+            "wall_time_s": round(wall_time, 3),
+            "failures": self.failures,
+            "endpoints": {name: stats.summary(wall_time) for name, stats in self.stats.items()},
+        }
+
+    def _fail(self, project_id: str, message: str) -> None:
+        self.failures.append(f"{project_id}: {message}")
+
+    def _disk_files(self, project_id: str) -> Dict[str, Path]:
+        project_dir = self.projects_dir / project_id
+        files = {}
+        for path in project_dir.rglob("*"):
+            relative = path.relative_to(project_dir)
+            # Generation checkpoints are hidden from the tree and the download
+            if path.is_file() and relative.parts[0] != CHECKPOINT_DIR:
+                files[relative.as_posix()] = path
+        return files
+
+    async def _check_project(self, client: httpx.AsyncClient, project_id: str) -> None:
+        disk_files = self._disk_files(project_id)
+
+        await asyncio.gather(
+            self._check_tree(client, project_id, disk_files),
+            self._check_download(client, project_id, disk_files),
+            *(self._check_file(client, project_id, relative, path) for relative, path in disk_files.items()),
+        )
+
+    async def _check_tree(self, client: httpx.AsyncClient, project_id: str, disk_files: Dict[str, Path]) -> None:
+        url = f"{self.base_url}{PROJECT_TREE_ENDPOINT_TEMPLATE.format(project_id)}"
+        ok = False
+        size = 0
+
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.get(url)
+                size = len(response.content)
+                if response.status_code != 200:
+                    self._fail(project_id, f"tree HTTP {response.status_code}")
+                else:
+                    ok = self._tree_matches(project_id, response.json(), disk_files)
+            except (httpx.HTTPError, json.JSONDecodeError) as e:
+                self._fail(project_id, f"tree request failed: {e}")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+        self.stats["tree"].record(elapsed_ms, size, ok)
+
+    def _tree_matches(self, project_id: str, data: Dict, disk_files: Dict[str, Path]) -> bool:
+        # Next.js returns {"root": {...}}; the legacy backend returns {"file_structure": ...}
+        if "root" not in data:
+            if "main.py" in json.dumps(data.get("file_structure", {}), ensure_ascii=False):
+                return True
+            self._fail(project_id, "tree does not list main.py")
+            return False
+
+        tree_files = set()
+        pending = [data["root"]]
+        while pending:
+            node = pending.pop()
+            if node.get("type") == "file":
+                tree_files.add(node.get("path", "").replace("\\", "/"))
+            pending.extend(node.get("children") or [])
+
+        missing = sorted(set(disk_files) - tree_files)
+        if missing:
+            self._fail(project_id, f"tree is missing {missing}")
+            return False
+        return True
+
+    async def _check_file(self, client: httpx.AsyncClient, project_id: str, relative: str, path: Path) -> None:
+        url = f"{self.base_url}{PROJECT_FILE_ENDPOINT_TEMPLATE.format(project_id, quote(relative))}"
+        ok = False
+        size = 0
+
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.get(url)
+                size = len(response.content)
+                if response.status_code != 200:
+                    self._fail(project_id, f"{relative} HTTP {response.status_code}")
+                elif response.text != path.read_bytes().decode("utf-8", errors="replace"):
+                    self._fail(project_id, f"{relative} content differs from disk")
+                else:
+                    ok = True
+            except httpx.HTTPError as e:
+                self._fail(project_id, f"{relative} request failed: {e}")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+        self.stats["file"].record(elapsed_ms, size, ok)
+
+    async def _check_download(self, client: httpx.AsyncClient, project_id: str, disk_files: Dict[str, Path]) -> None:
+        url = f"{self.base_url}{PROJECT_DOWNLOAD_ENDPOINT_TEMPLATE.format(project_id)}"
+        verifier = StreamingZipVerifier()
+        ok = False
+
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                async with client.stream("GET", url) as response:
+                    if response.status_code != 200:
+                        self._fail(project_id, f"download HTTP {response.status_code}")
+                    else:
+                        async for chunk in response.aiter_bytes():
+                            verifier.feed(chunk)
+                        ok = verifier.finish()
+            except httpx.HTTPError as e:
+                self._fail(project_id, f"download request failed: {e}")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+        try:
+            if ok:
+                ok = self._archive_matches(project_id, verifier, disk_files)
+            elif verifier.errors:
+                self._fail(project_id, f"download ZIP invalid: {verifier.errors[0]}")
+        finally:
+            verifier.close()
+
+        self.stats["download"].record(elapsed_ms, verifier.bytes_received, ok)
+
+    def _archive_matches(self, project_id: str, verifier: StreamingZipVerifier, disk_files: Dict[str, Path]) -> bool:
+        # The Next.js route nests everything under a "<project_id>/" folder
+        prefix = f"{project_id}/"
+        names = {
+            entry.name[len(prefix):] if entry.name.startswith(prefix) else entry.name
+            for entry in verifier.entries if not entry.name.endswith("/")
+        }
+        missing = sorted(set(disk_files) - names)
+        if missing:
+            self._fail(project_id, f"ZIP is missing {missing}")
+            return False
+        return True
 
 
 class EndpointVerifier:
@@ -59,7 +278,8 @@ class EndpointVerifier:
     def __init__(self, project_id: str):
         self.project_id = project_id
         self.base_url = f"{SERVICE_HOST}:{SERVICE_PORT}"
-        self.uvicorn_process: Optional[subprocess.Popen] = None
+        self.service = ServiceSupervisor(default_uvicorn_command(SERVICE_PORT), port=SERVICE_PORT,
+                                         health_endpoint=HEALTH_ENDPOINT, suite="verify_endpoints")
         self.report_lines = []
 
     def log_report(self, message: str) -> None:
@@ -67,97 +287,17 @@ class EndpointVerifier:
         logger.info(message)
         self.report_lines.append(message)
 
-    def cleanup_port_processes(self, port: int) -> None:
-        """Kill any processes using the specified port."""
-        self.log_report(f"清理端口 {port} 上的进程...")
-
-        try:
-            # Find processes using the port
-            for conn in psutil.net_connections():
-                if conn.status == 'LISTEN' and conn.laddr.port == port:
-                    try:
-                        process = psutil.Process(conn.pid)
-                        self.log_report(f"终止进程: {process.name()} (PID: {conn.pid})")
-                        process.terminate()
-
-                        # Wait for graceful termination
-                        try:
-                            process.wait(timeout=5)
-                        except psutil.TimeoutExpired:
-                            self.log_report(f"强制终止进程: {conn.pid}")
-                            process.kill()
-
-                    except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                        logger.warning(f"无法终止进程 {conn.pid}: {e}")
-
-        except Exception as e:
-            logger.error(f"清理端口进程失败: {e}")
-
     def start_service(self) -> bool:
-        """Start the uvicorn service and wait for it to be ready."""
-        self.log_report("启动 uvicorn 服务...")
-
-        # Clean up any existing processes on the ports
-        self.cleanup_port_processes(8000)
-        self.cleanup_port_processes(8001)
-
-        try:
-            # Start uvicorn process
-            cmd = [
-                sys.executable, "-m", "uvicorn",
-                "src.main:app",
-                "--host", "0.0.0.0",
-                "--port", str(SERVICE_PORT),
-                "--log-level", "info"
-            ]
-
-            self.log_report(f"执行命令: {' '.join(cmd)}")
-
-            self.uvicorn_process = subprocess.Popen(
-                cmd,
-                cwd=Path(__file__).parent.parent / "backend",  # Backend directory
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-
-            # Wait for service to be ready
-            self.log_report("等待服务启动...")
-            return self._wait_for_service_ready()
-
-        except Exception as e:
-            logger.error(f"启动服务失败: {e}")
-            self._cleanup_process()
+        """Attach to a healthy service or start uvicorn and wait for it to be ready."""
+        self.log_report(f"准备服务: {self.service.base_url}")
+        if not self.service.ensure_running():
             return False
 
-    def _wait_for_service_ready(self) -> bool:
-        """Poll the health endpoint until service is ready."""
-        health_url = f"{self.base_url}{HEALTH_ENDPOINT}"
-
-        for attempt in range(HEALTH_CHECK_RETRIES):
-            try:
-                self.log_report(f"健康检查 (尝试 {attempt + 1}/{HEALTH_CHECK_RETRIES})...")
-
-                response = requests.get(
-                    health_url,
-                    timeout=HEALTH_CHECK_TIMEOUT
-                )
-
-                if response.status_code == 200:
-                    health_data = response.json()
-                    if health_data.get("status") in ["healthy", "degraded"]:
-                        self.log_report("✅ 服务已就绪")
-                        return True
-
-                self.log_report(f"服务未就绪，状态码: {response.status_code}")
-
-            except requests.RequestException as e:
-                logger.warning(f"健康检查失败: {e}")
-
-            time.sleep(2)
-
-        self.log_report("❌ 服务启动超时")
-        return False
+        if self.service.attached:
+            self.log_report("✅ 复用已运行的服务")
+        else:
+            self.log_report(f"✅ 服务已就绪 (冷启动 {self.service.cold_start_seconds:.2f}s)")
+        return True
 
     def test_case_a_project_details(self) -> bool:
         """Test Case A: GET /projects/{id} - Project Details Endpoint"""
@@ -224,71 +364,61 @@ class EndpointVerifier:
             url = f"{self.base_url}{PROJECT_DOWNLOAD_ENDPOINT_TEMPLATE.format(self.project_id)}"
             self.log_report(f"请求 URL: {url}")
 
-            response = requests.get(url, timeout=REQUEST_TIMEOUT)
+            # Stream the archive into memory and validate CRCs while it downloads
+            result = verify_zip_download(url, timeout=REQUEST_TIMEOUT)
 
-            # Check HTTP status
-            if response.status_code != 200:
-                self.log_report(f"❌ HTTP 状态码错误: {response.status_code} (期望: 200)")
-                return False
+            try:
+                # Check HTTP status
+                if result.status_code != 200:
+                    self.log_report(f"❌ HTTP 状态码错误: {result.status_code} (期望: 200)")
+                    return False
 
-            self.log_report("✅ HTTP 状态码: 200")
+                self.log_report("✅ HTTP 状态码: 200")
 
-            # Check Content-Type header
-            content_type = response.headers.get("content-type", "")
-            if "application/zip" not in content_type:
-                self.log_report(f"❌ Content-Type 错误: {content_type} (期望包含: application/zip)")
-                return False
+                # Check Content-Type header
+                if "application/zip" not in result.content_type:
+                    self.log_report(f"❌ Content-Type 错误: {result.content_type} (期望包含: application/zip)")
+                    return False
 
-            self.log_report("✅ Content-Type: application/zip")
+                self.log_report("✅ Content-Type: application/zip")
+                self.log_report(f"下载 {result.bytes} 字节: TTFB {result.ttfb_ms} ms, "
+                                f"总耗时 {result.duration_ms} ms, 吞吐 {result.throughput_mbps} MB/s")
 
-            # Save response content to file
-            try:
-                with open(DOWNLOAD_FILENAME, 'wb') as f:
-                    f.write(response.content)
-                self.log_report(f"✅ 响应内容已保存到: {DOWNLOAD_FILENAME}")
-            except Exception as e:
-                self.log_report(f"❌ 保存文件失败: {e}")
-                return False
+                if not result.ok:
+                    for error in result.errors:
+                        self.log_report(f"❌ ZIP 校验失败: {error}")
+                    return False
 
-            # Verify ZIP file format and contents
-            try:
-                with zipfile.ZipFile(DOWNLOAD_FILENAME, 'r') as zip_ref:
-                    # Check if it's a valid ZIP file
-                    zip_ref.testzip()  # This will raise an exception if the ZIP is corrupted
-
-                    # Get list of files in ZIP
-                    file_list = zip_ref.namelist()
-                    self.log_report(f"ZIP 文件包含 {len(file_list)} 个文件: {file_list}")
-
-                    # Check if main.py exists in the ZIP (may be in subdirectories)
-                    main_py_files = [f for f in file_list if f.endswith("main.py")]
-                    if not main_py_files:
-                        self.log_report("❌ ZIP 文件不包含 main.py")
-                        return False
-
-                    main_py_path = main_py_files[0]  # Take the first main.py found
-                    self.log_report(f"✅ ZIP 文件包含 main.py: {main_py_path}")
-
-                    # Verify we can read the main.py content
-                    try:
-                        with zip_ref.open(main_py_path) as main_file:
-                            content = main_file.read().decode('utf-8')
-                            self.log_report(f"✅ main.py 内容长度: {len(content)} 字符")
-                            if len(content.strip()) == 0:
-                                self.log_report("⚠️ main.py 文件为空")
-                    except Exception as e:
-                        self.log_report(f"❌ 读取 main.py 失败: {e}")
-                        return False
+                self.log_report("✅ 中央目录与 CRC 校验通过")
+
+                # Check the ZIP contents from the in-memory buffer
+                file_list = result.entries
+                self.log_report(f"ZIP 文件包含 {len(file_list)} 个文件: {file_list}")
+
+                # Check if main.py exists in the ZIP (may be in subdirectories)
+                main_py_files = [f for f in file_list if f.endswith("main.py")]
+                if not main_py_files:
+                    self.log_report("❌ ZIP 文件不包含 main.py")
+                    return False
+
+                main_py_path = main_py_files[0]  # Take the first main.py found
+                self.log_report(f"✅ ZIP 文件包含 main.py: {main_py_path}")
+
+                # Verify we can read the main.py content
+                try:
+                    with result.open_zip() as zip_ref, zip_ref.open(main_py_path) as main_file:
+                        content = main_file.read().decode('utf-8')
+                        self.log_report(f"✅ main.py 内容长度: {len(content)} 字符")
+                        if len(content.strip()) == 0:
+                            self.log_report("⚠️ main.py 文件为空")
+                except Exception as e:
+                    self.log_report(f"❌ 读取 main.py 失败: {e}")
+                    return False
 
                 self.log_report("✅ ZIP 文件格式有效且包含所需内容")
                 return True
-
-            except zipfile.BadZipFile:
-                self.log_report("❌ 文件不是有效的 ZIP 格式")
-                return False
-            except Exception as e:
-                self.log_report(f"❌ ZIP 验证失败: {e}")
-                return False
+            finally:
+                result.close()
 
         except requests.RequestException as e:
             self.log_report(f"❌ 请求失败: {e}")
@@ -298,18 +428,8 @@ class EndpointVerifier:
             return False
 
     def _cleanup_process(self) -> None:
-        """Clean up the uvicorn process."""
-        if self.uvicorn_process and self.uvicorn_process.poll() is None:
-            self.log_report("清理 uvicorn 进程...")
-            try:
-                self.uvicorn_process.terminate()
-                try:
-                    self.uvicorn_process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    self.log_report("强制终止 uvicorn 进程")
-                    self.uvicorn_process.kill()
-            except Exception as e:
-                logger.error(f"清理进程失败: {e}")
+        """Stop the service if this run started it."""
+        self.service.stop()
 
     def save_report(self) -> None:
         """Save the final report to file."""
@@ -320,14 +440,14 @@ class EndpointVerifier:
         except Exception as e:
             logger.error(f"保存报告失败: {e}")
 
-    def run_verification(self) -> bool:
+    def run_verification(self, start_service: bool = True) -> bool:
         """Run the complete verification process."""
         try:
             self.log_report("🚀 开始全接口自动化验收...")
             self.log_report(f"测试项目 ID: {self.project_id}")
 
-            # 1. Start service
-            if not self.start_service():
+            # 1. Start service (skipped when verifying an already running one)
+            if start_service and not self.start_service():
                 self.log_report("❌ 服务启动失败")
                 return False
 
@@ -359,6 +479,50 @@ class EndpointVerifier:
             self.save_report()
             self._cleanup_process()
 
+    def run_sweep(self, projects_dir: Path, concurrency: int, json_report: str, start_service: bool = True) -> bool:
+        """Verify every project under projects_dir and report per-endpoint throughput."""
+        try:
+            self.log_report("🚀 开始全项目并发验收...")
+            self.log_report(f"项目目录: {projects_dir} (并发数: {concurrency})")
+
+            if start_service and not self.start_service():
+                self.log_report("❌ 服务启动失败")
+                return False
+
+            sweep = ProjectSweep(self.base_url, projects_dir, concurrency)
+            report = asyncio.run(sweep.run())
+
+            self.log_report(f"\n=== 全项目验收结果 ({report['projects']} 个项目, {report['wall_time_s']}s) ===")
+            for name, stats in sweep.stats.items():
+                summary = report["endpoints"][name]
+                self.log_report(f"{name}: {summary['requests']} 请求, {summary['errors']} 失败, "
+                                f"{summary['requests_per_s']} req/s, {summary['mb_per_s']} MB/s")
+                self.log_report(stats.latency.format_table())
+
+            for failure in report["failures"]:
+                self.log_report(f"❌ {failure}")
+
+            with open(json_report, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.log_report(f"JSON 报告已保存到: {json_report}")
+
+            if report["failures"]:
+                self.log_report(f"\n❌ {len(report['failures'])} 项检查失败")
+                return False
+
+            self.log_report("\n🎉 ALL PROJECTS GO!")
+            return True
+
+        except KeyboardInterrupt:
+            self.log_report("收到中断信号，正在清理...")
+            return False
+        except Exception as e:
+            self.log_report(f"验证过程出错: {e}")
+            return False
+        finally:
+            self.save_report()
+            self._cleanup_process()
+
 
 def main():
     """Main entry point."""
@@ -370,6 +534,35 @@ def main():
         help=f"Project ID to test (default: {DEFAULT_PROJECT_ID})"
     )
 
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Verify every project under --projects-dir concurrently instead of a single --id"
+    )
+    parser.add_argument(
+        "--projects-dir",
+        type=Path,
+        default=DEFAULT_PROJECTS_DIR,
+        help=f"Projects directory scanned by --all (default: {DEFAULT_PROJECTS_DIR})"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=SWEEP_CONCURRENCY,
+        help=f"Maximum in-flight requests for --all (default: {SWEEP_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--base-url",
+        type=str,
+        help="Verify an already running service at this URL instead of starting uvicorn"
+    )
+    parser.add_argument(
+        "--json-report",
+        type=str,
+        default=SWEEP_REPORT_FILE,
+        help=f"JSON report written by --all (default: {SWEEP_REPORT_FILE})"
+    )
+
     args = parser.parse_args()
 
     # Check if psutil is available
@@ -388,7 +581,14 @@ def main():
 
     # Run verification
     verifier = EndpointVerifier(project_id=args.id)
-    success = verifier.run_verification()
+    if args.base_url:
+        verifier.base_url = args.base_url.rstrip("/")
+
+    if args.all:
+        success = verifier.run_sweep(args.projects_dir, args.concurrency, args.json_report,
+                                     start_service=not args.base_url)
+    else:
+        success = verifier.run_verification(start_service=not args.base_url)
 
     # Exit with appropriate code
     sys.exit(0 if success else 1)
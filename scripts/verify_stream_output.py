@@ -6,25 +6,28 @@ This script automatically manages service lifecycle and captures stream output f
 It handles process cleanup, service startup, stream capture, and result validation.
 
 Usage:
-    python scripts/verify_stream_output.py [--id REQUEST_ID]
+    python scripts/verify_stream_output.py [--id REQUEST_ID] [--output FILE] [--format ndjson|sse]
 
 Arguments:
     --id REQUEST_ID: Optional existing request ID to reuse for streaming
+    --output FILE: Capture file (default: verify_stream_result.txt); a .gz or .xz suffix compresses it
+    --format FORMAT: ndjson (default) or raw sse frames
 """
 
 import argparse
 import json
 import logging
 import signal
-import subprocess
 import sys
 import time
-from pathlib import Path
 from typing import Optional
 
-import psutil
 import requests
 
+from service_supervisor import ServiceSupervisor, default_uvicorn_command
+from sse_parser import iter_sse_events
+from stream_capture import FORMATS, CaptureWriter, read_frames
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -39,9 +42,7 @@ HEALTH_ENDPOINT = "/api/health"
 GENERATE_ENDPOINT = "/api/generate-code"
 STREAM_ENDPOINT_TEMPLATE = "/api/generate-code/{}/stream"
 
-# Timeouts and retries
-HEALTH_CHECK_TIMEOUT = 10  # seconds
-HEALTH_CHECK_RETRIES = 10
+# Timeouts
 STREAM_TIMEOUT = 60  # seconds
 
 # Output file
@@ -51,102 +52,18 @@ RESULT_FILE = "verify_stream_result.txt"
 class StreamVerifier:
     """Automated stream verification handler."""
 
-    def __init__(self, request_id: Optional[str] = None):
+    def __init__(self, request_id: Optional[str] = None, result_file: str = RESULT_FILE,
+                 capture_format: str = "ndjson"):
         self.request_id = request_id
+        self.result_file = result_file
+        self.capture_format = capture_format
         self.base_url = f"{SERVICE_HOST}:{SERVICE_PORT}"
-        self.uvicorn_process: Optional[subprocess.Popen] = None
-
-    def cleanup_port_processes(self, port: int) -> None:
-        """Kill any processes using the specified port."""
-        logger.info(f"清理端口 {port} 上的进程...")
-
-        try:
-            # Find processes using the port
-            for conn in psutil.net_connections():
-                if conn.status == 'LISTEN' and conn.laddr.port == port:
-                    try:
-                        process = psutil.Process(conn.pid)
-                        logger.info(f"终止进程: {process.name()} (PID: {conn.pid})")
-                        process.terminate()
-
-                        # Wait for graceful termination
-                        try:
-                            process.wait(timeout=5)
-                        except psutil.TimeoutExpired:
-                            logger.warning(f"强制终止进程: {conn.pid}")
-                            process.kill()
-
-                    except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                        logger.warning(f"无法终止进程 {conn.pid}: {e}")
-
-        except Exception as e:
-            logger.error(f"清理端口进程失败: {e}")
+        self.service = ServiceSupervisor(default_uvicorn_command(SERVICE_PORT), port=SERVICE_PORT,
+                                         health_endpoint=HEALTH_ENDPOINT, suite="verify_stream_output")
 
     def start_service(self) -> bool:
-        """Start the uvicorn service and wait for it to be ready."""
-        logger.info("启动 uvicorn 服务...")
-
-        # Clean up any existing processes on the ports
-        self.cleanup_port_processes(8000)
-        self.cleanup_port_processes(8001)
-
-        try:
-            # Start uvicorn process
-            cmd = [
-                sys.executable, "-m", "uvicorn",
-                "src.main:app",
-                "--host", "0.0.0.0",
-                "--port", str(SERVICE_PORT),
-                "--log-level", "info"
-            ]
-
-            logger.info(f"执行命令: {' '.join(cmd)}")
-
-            self.uvicorn_process = subprocess.Popen(
-                cmd,
-                cwd=Path(__file__).parent.parent / "backend",  # Backend directory
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-
-            # Wait for service to be ready
-            logger.info("等待服务启动...")
-            return self._wait_for_service_ready()
-
-        except Exception as e:
-            logger.error(f"启动服务失败: {e}")
-            self._cleanup_process()
-            return False
-
-    def _wait_for_service_ready(self) -> bool:
-        """Poll the health endpoint until service is ready."""
-        health_url = f"{self.base_url}{HEALTH_ENDPOINT}"
-
-        for attempt in range(HEALTH_CHECK_RETRIES):
-            try:
-                logger.info(f"健康检查 (尝试 {attempt + 1}/{HEALTH_CHECK_RETRIES})...")
-
-                response = requests.get(
-                    health_url,
-                    timeout=HEALTH_CHECK_TIMEOUT
-                )
-
-                if response.status_code == 200:
-                    health_data = response.json()
-                    if health_data.get("status") in ["healthy", "degraded"]:
-                        logger.info("✅ 服务已就绪")
-                        return True
-
-                logger.warning(f"服务未就绪，状态码: {response.status_code}")
-
-            except requests.RequestException as e:
-                logger.warning(f"健康检查失败: {e}")
-
-            time.sleep(2)
-
-        logger.error("❌ 服务启动超时")
-        return False
+        """Attach to a healthy service or start uvicorn and wait for it to be ready."""
+        return self.service.ensure_running()
 
     def create_generation_request(self) -> Optional[str]:
         """Create a new code generation request."""
@@ -183,13 +100,9 @@ class StreamVerifier:
         stream_url = f"{self.base_url}{STREAM_ENDPOINT_TEMPLATE.format(request_id)}"
 
         logger.info(f"连接流式接口: {stream_url}")
-        logger.info(f"输出将保存到: {RESULT_FILE}")
+        logger.info(f"输出将保存到: {self.result_file} (格式: {self.capture_format})")
 
         try:
-            # Clear result file
-            with open(RESULT_FILE, 'w', encoding='utf-8') as f:
-                f.write("")
-
             # Connect to stream with timeout
             response = requests.get(
                 stream_url,
@@ -204,107 +117,77 @@ class StreamVerifier:
 
             logger.info("✅ 流式连接成功，开始捕获数据...")
 
-            # Capture SSE events
-            captured_data = []
+            # Capture raw SSE events; JSON is only decoded in verify_results()
             start_time = time.time()
-            current_event = {}
-            content_buffer = ""
-
-            for line in response.iter_lines():
-                if line:
-                    line_str = line.decode('utf-8').strip()
-
-                    # Parse SSE format
-                    if line_str.startswith('event: '):
-                        # Save previous event if exists
-                        if current_event and 'data' in current_event:
-                            try:
-                                json_data = json.loads(current_event['data'])
-                                captured_data.append(json_data)
-
-                                # Write to file immediately
-                                with open(RESULT_FILE, 'a', encoding='utf-8') as f:
-                                    f.write(f"{json.dumps(json_data, ensure_ascii=False)}\n")
-
-                                logger.info(f"收到事件 {current_event.get('event', 'unknown')}: {current_event['data'][:100]}...")
-
-                            except json.JSONDecodeError as e:
-                                logger.warning(f"JSON解析失败: {e}, 数据: {current_event['data'][:200]}...")
-
-                        # Start new event
-                        current_event = {'event': line_str[7:]}  # Remove 'event: '
-
-                    elif line_str.startswith('data: '):
-                        # Accumulate data lines
-                        data_content = line_str[6:]  # Remove 'data: '
-                        if 'data' not in current_event:
-                            current_event['data'] = data_content
-                        else:
-                            current_event['data'] += data_content
-
-                    elif line_str == '':
-                        # Empty line indicates end of event
-                        if current_event and 'data' in current_event:
-                            try:
-                                json_data = json.loads(current_event['data'])
-                                captured_data.append(json_data)
-
-                                # Write to file immediately
-                                with open(RESULT_FILE, 'a', encoding='utf-8') as f:
-                                    f.write(f"{json.dumps(json_data, ensure_ascii=False)}\n")
-
-                                logger.info(f"收到事件 {current_event.get('event', 'unknown')}: {current_event['data'][:100]}...")
-
-                            except json.JSONDecodeError as e:
-                                logger.warning(f"JSON解析失败: {e}, 数据: {current_event['data'][:200]}...")
-
-                        current_event = {}
-
-                # Check for timeout
-                if time.time() - start_time > STREAM_TIMEOUT:
-                    logger.warning(f"流式输出超时 ({STREAM_TIMEOUT}s)")
-                    break
 
-            # Handle any remaining event
-            if current_event and 'data' in current_event:
-                try:
-                    json_data = json.loads(current_event['data'])
-                    captured_data.append(json_data)
+            with CaptureWriter(self.result_file, fmt=self.capture_format) as writer:
+                for event in iter_sse_events(response.iter_content(chunk_size=None)):
+                    writer.write_event(event)
 
-                    with open(RESULT_FILE, 'a', encoding='utf-8') as f:
-                        f.write(f"{json.dumps(json_data, ensure_ascii=False)}\n")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"收到事件 {event.event}: {event.data[:100]}...")
 
-                    logger.info(f"收到最终事件 {current_event.get('event', 'unknown')}: {current_event['data'][:100]}...")
+                    # Check for timeout
+                    if time.time() - start_time > STREAM_TIMEOUT:
+                        logger.warning(f"流式输出超时 ({STREAM_TIMEOUT}s)")
+                        break
 
-                except json.JSONDecodeError as e:
-                    logger.warning(f"最终事件JSON解析失败: {e}")
+                captured = writer.events_written
 
-            logger.info(f"流式捕获完成，共收到 {len(captured_data)} 个数据块")
+            logger.info(f"流式捕获完成，共收到 {captured} 个数据块")
 
             # Check if we got any meaningful data
-            return len(captured_data) > 0
+            return captured > 0
 
         except requests.RequestException as e:
             logger.error(f"流式连接错误: {e}")
             return False
+        except OSError as e:
+            logger.error(f"写入结果文件失败: {e}")
+            return False
 
     def verify_results(self) -> bool:
         """Verify that the captured results contain expected content."""
         logger.info("验证结果文件...")
 
         try:
-            with open(RESULT_FILE, 'r', encoding='utf-8') as f:
-                content = f.read()
+            has_phase = False
+            has_content = False
+            has_implement = False
+            events = 0
+            decode_errors = 0
+
+            # Decode lazily and stop as soon as every check has passed
+            for _, event in read_frames(self.result_file):
+                events += 1
+                try:
+                    payload = event.json()
+                except json.JSONDecodeError:
+                    decode_errors += 1
+                    continue
+
+                if not isinstance(payload, dict):
+                    continue
 
-            if not content.strip():
+                has_phase = has_phase or "phase" in payload
+                has_content = has_content or "content" in payload
+                has_implement = has_implement or payload.get("phase") == "implement"
+
+                if has_phase and has_content and has_implement:
+                    break
+
+            if events == 0:
                 logger.error("❌ 结果文件为空")
                 return False
 
+            if decode_errors:
+                logger.warning(f"{decode_errors} 个事件的 JSON 解析失败")
+
             # Check for expected JSON fields
             checks = [
-                '"phase":' in content,
-                '"content":' in content,
-                '"implement"' in content or '"phase"' in content
+                has_phase,
+                has_content,
+                has_implement or has_phase
             ]
 
             passed_checks = sum(checks)
@@ -317,7 +200,6 @@ class StreamVerifier:
                 return True
             else:
                 logger.warning("❌ 验证失败 - 缺少关键字段")
-                logger.info(f"文件内容预览: {content[:500]}...")
                 return False
 
         except FileNotFoundError:
@@ -328,18 +210,8 @@ class StreamVerifier:
             return False
 
     def _cleanup_process(self) -> None:
-        """Clean up the uvicorn process."""
-        if self.uvicorn_process and self.uvicorn_process.poll() is None:
-            logger.info("清理 uvicorn 进程...")
-            try:
-                self.uvicorn_process.terminate()
-                try:
-                    self.uvicorn_process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    logger.warning("强制终止 uvicorn 进程")
-                    self.uvicorn_process.kill()
-            except Exception as e:
-                logger.error(f"清理进程失败: {e}")
+        """Stop the service if this run started it."""
+        self.service.stop()
 
     def run_verification(self) -> bool:
         """Run the complete verification process."""
@@ -393,6 +265,18 @@ def main():
         type=str,
         help="Optional existing request ID to reuse for streaming"
     )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=RESULT_FILE,
+        help=f"Capture file, .gz/.xz suffix enables compression (default: {RESULT_FILE})"
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="ndjson",
+        help="Capture format (default: ndjson)"
+    )
 
     args = parser.parse_args()
 
@@ -411,7 +295,7 @@ def main():
         sys.exit(1)
 
     # Run verification
-    verifier = StreamVerifier(request_id=args.id)
+    verifier = StreamVerifier(request_id=args.id, result_file=args.output, capture_format=args.format)
     success = verifier.run_verification()
 
     # Exit with appropriate code
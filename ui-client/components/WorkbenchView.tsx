@@ -2,6 +2,53 @@ import React, { useEffect, useState, useRef } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { FileNode, LogEntry, ProjectState } from '../types';
 
+// `tree_delta` SSE event: moves the project tree from base_version to version
+interface TreeDelta {
+  base_version: number;
+  version: number;
+  added: { path: string; size_bytes: number }[];
+  removed: string[];
+  resized: { path: string; size_bytes: number }[];
+}
+
+const pathToId = (path: string) => path.replace(/\//g, '-');
+
+// Insert a file node at `path`, creating parent folders as needed; an existing
+// node is kept as is (with its content)
+const upsertFile = (nodes: FileNode[], parts: string[], prefix = ''): FileNode[] => {
+  const [name, ...rest] = parts;
+  const path = prefix ? `${prefix}/${name}` : name;
+  const existing = nodes.find(node => node.name === name);
+
+  if (rest.length === 0) {
+    if (existing) return nodes;
+    return [...nodes, { id: pathToId(path), name, type: 'file', content: '', path }];
+  }
+
+  const folder: FileNode = existing && existing.type === 'folder'
+    ? existing
+    : { id: pathToId(path), name, type: 'folder', isOpen: true, children: [], path };
+  const updated = { ...folder, children: upsertFile(folder.children || [], rest, path) };
+  return existing ? nodes.map(node => (node === existing ? updated : node)) : [...nodes, updated];
+};
+
+const removePath = (nodes: FileNode[], path: string): FileNode[] =>
+  nodes
+    .filter(node => node.path !== path)
+    .map(node => (node.children ? { ...node, children: removePath(node.children, path) } : node));
+
+// Apply a tree delta locally; applying the same delta twice is harmless
+const applyTreeDelta = (nodes: FileNode[], delta: TreeDelta): FileNode[] => {
+  let result = nodes;
+  for (const path of delta.removed) {
+    result = removePath(result, path);
+  }
+  for (const { path } of [...delta.added, ...delta.resized]) {
+    result = upsertFile(result, path.split('/'));
+  }
+  return result;
+};
+
 interface WorkbenchViewProps {
   initialPrompt: string;
   projectId: string;
@@ -15,6 +62,8 @@ const WorkbenchView: React.FC<WorkbenchViewProps> = ({ initialPrompt, projectId,
   });
 
   const [files, setFiles] = useState<FileNode[]>([]);
+  // Version of the tree in `files`; null until a tree or delta has been seen
+  const treeVersionRef = useRef<number | null>(null);
   const [projectStructureLoaded, setProjectStructureLoaded] = useState(false);
   const [streamingContent, setStreamingContent] = useState<Record<string, string>>({});
 
@@ -70,6 +119,18 @@ const WorkbenchView: React.FC<WorkbenchViewProps> = ({ initialPrompt, projectId,
       }
     });
 
+    eventSource.addEventListener('queued', (event) => {
+      const data = JSON.parse(event.data);
+      console.log('⏳ [DEBUG] Queued event:', data);
+      const newLog: LogEntry = {
+        id: Date.now().toString(),
+        timestamp: new Date().toLocaleTimeString([], { hour12: false, hour: '2-digit', minute: '2-digit', second: '2-digit' }),
+        message: `⏳ 排队等待生成，当前位置 ${data.position}/${data.queue_length}`,
+        type: 'info'
+      };
+      setLogs(prev => [...prev, newLog]);
+    });
+
     eventSource.addEventListener('phase_start', (event) => {
       const data = JSON.parse(event.data);
       console.log('🚀 [DEBUG] Phase start event:', data);
@@ -132,82 +193,7 @@ const WorkbenchView: React.FC<WorkbenchViewProps> = ({ initialPrompt, projectId,
       const data = JSON.parse(event.data);
       console.log('📁 [DEBUG] File created event received:', data.filename, 'at path:', data.path, 'size:', data.size_bytes);
 
-      // Immediately add the file to the file tree
-      setFiles(prevFiles => {
-        const addFileToTree = (nodes: FileNode[]): FileNode[] => {
-          return nodes.map(node => {
-            if (node.type === 'folder') {
-              // Check if this file should be added to this folder
-              const filePathParts = data.path.split('/');
-              if (filePathParts.length > 1 && node.name === filePathParts[0]) {
-                const newFile: FileNode = {
-                  id: data.path.replace(/\//g, '-'),
-                  name: data.filename,
-                  type: 'file',
-                  content: '', // Will be loaded when clicked or when content is written
-                  path: data.path
-                };
-
-                // If there's a subfolder structure
-                if (filePathParts.length > 2) {
-                  const subFolderName = filePathParts[1];
-                  const existingSubFolder = node.children?.find(child => child.name === subFolderName && child.type === 'folder');
-
-                  if (existingSubFolder) {
-                    return {
-                      ...node,
-                      children: addFileToTree(node.children || [])
-                    };
-                  } else {
-                    // Create subfolder
-                    const subFolder: FileNode = {
-                      id: `${node.id}-${subFolderName}`,
-                      name: subFolderName,
-                      type: 'folder',
-                      isOpen: true,
-                      children: [newFile],
-                      path: filePathParts.slice(0, 2).join('/')
-                    };
-
-                    return {
-                      ...node,
-                      children: [...(node.children || []), subFolder]
-                    };
-                  }
-                } else {
-                  // Add directly to this folder
-                  return {
-                    ...node,
-                    children: [...(node.children || []), newFile]
-                  };
-                }
-              }
-
-              // Recursively check children
-              return {
-                ...node,
-                children: node.children ? addFileToTree(node.children) : undefined
-              };
-            }
-            return node;
-          });
-        };
-
-        // Check if file should be added to root
-        const filePathParts = data.path.split('/');
-        if (filePathParts.length === 1) {
-          const newFile: FileNode = {
-            id: data.path.replace(/\//g, '-'),
-            name: data.filename,
-            type: 'file',
-            content: '', // Will be loaded when clicked or when content is written
-            path: data.path
-          };
-          return [...prevFiles, newFile];
-        }
-
-        return addFileToTree(prevFiles);
-      });
+      // The node itself was added by the preceding tree_delta
 
       // Try to load the file content immediately after creation
       try {
@@ -252,14 +238,32 @@ const WorkbenchView: React.FC<WorkbenchViewProps> = ({ initialPrompt, projectId,
       setLogs(prev => [...prev, newLog]);
     });
 
+    // Explorer updates arrive as deltas; the full tree is only refetched when
+    // a delta does not follow on from the version we hold
+    eventSource.addEventListener('tree_delta', (event) => {
+      const delta: TreeDelta = JSON.parse(event.data);
+      const current = treeVersionRef.current;
+      if (current !== null && delta.version <= current) {
+        return; // Already applied (replayed after a reconnect)
+      }
+      if (current !== null && delta.base_version !== current) {
+        console.log('🌳 [DEBUG] Tree version mismatch, reloading:', current, '->', delta.base_version);
+        loadProjectStructure();
+        return;
+      }
+      treeVersionRef.current = delta.version;
+      setFiles(prevFiles => applyTreeDelta(prevFiles, delta));
+    });
+
     eventSource.addEventListener('file_content_update', (event) => {
       const data = JSON.parse(event.data);
       console.log('📝 [STREAMING] File content update received:', data.path, 'chunk length:', data.content.length, 'offset:', data.offset, 'complete:', data.is_complete);
       console.log('📝 [STREAMING] Chunk content preview:', data.content.substring(0, 50) + (data.content.length > 50 ? '...' : ''));
 
-      // Update streaming content for this file
+      // Update streaming content for this file; `replace` marks the first slice
+      // of a file being sent again, which starts the content over
       setStreamingContent(prev => {
-        const currentContent = prev[data.path] || '';
+        const currentContent = data.replace ? '' : (prev[data.path] || '');
         const newContent = currentContent + data.content;
 
         // Update the file content in the file tree
@@ -321,12 +325,7 @@ const WorkbenchView: React.FC<WorkbenchViewProps> = ({ initialPrompt, projectId,
       const data = JSON.parse(event.data);
       console.log('✅ [DEBUG] Generation complete:', data);
 
-      // Optionally refresh the project structure to ensure we have the final state
-      // This handles any files that might have been modified after the initial creation
-      if (projectStructureLoaded) {
-        console.log('🔄 [DEBUG] Refreshing project structure...');
-        await loadProjectStructure();
-      }
+      // No refetch needed: tree_delta events kept the explorer current
 
       const newLog: LogEntry = {
         id: Date.now().toString(),
@@ -512,6 +511,7 @@ const WorkbenchView: React.FC<WorkbenchViewProps> = ({ initialPrompt, projectId,
         };
 
         const fileNodes = data.root.children ? data.root.children.map(convertToFileNode) : [];
+        treeVersionRef.current = data.version ?? null;
         setFiles(fileNodes);
         setProjectStructureLoaded(true);
 